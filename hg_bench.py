@@ -0,0 +1,181 @@
+"""Benchmarks for the GUI data path: profile load, round build, tick scrub and maze painting.
+
+Run through ``python run.py --headless bench-gui``; profiles are generated synthetically so
+results only depend on the parameters and the code under test.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import struct
+import tempfile
+import subprocess
+
+LAYERS = ("fov", "influence", "gem_prediction", "debug_json", "gems")
+
+
+def synthetic_round(rng, width, height, ticks, layers, vis_radius=5):
+    walls = [[x in (0, width - 1) or y in (0, height - 1) or rng.random() < 0.2 for x in range(width)]
+             for y in range(height)]
+    floor = [(x, y) for y in range(height) for x in range(width) if not walls[y][x]]
+    pos = rng.choice(floor)
+    gem = None
+    seen = set()
+    protocol = []
+    for tick in range(ticks):
+        moves = [(pos[0] + dx, pos[1] + dy) for dx, dy in ((0, 1), (1, 0), (0, -1), (-1, 0))]
+        moves = [m for m in moves if 0 <= m[0] < width and 0 <= m[1] < height and not walls[m[1]][m[0]]]
+        if moves:
+            pos = rng.choice(moves)
+        if gem is None and rng.random() < 0.05:
+            gem = {"position": list(rng.choice(floor)), "ttl": 300}
+        if gem and list(pos) == gem["position"]:
+            gem = None
+        near = [(x, y) for y in range(max(0, pos[1] - 2), min(height, pos[1] + 3))
+                for x in range(max(0, pos[0] - 2), min(width, pos[0] + 3)) if walls[y][x]]
+        new_walls = [list(w) for w in near if w not in seen]
+        seen.update(near)
+        data = {"tick": tick, "config": {"width": width, "height": height}, "bot": list(pos), "wall_new": new_walls}
+        debug_json = None
+        if "debug_json" in layers:
+            debug_json = json.dumps({
+                "highlight": [[pos[0], pos[1], "#ff000080"]],
+                "path": [list(m) for m in moves],
+                "decision": rng.choice(("explore", "collect", "wait")),
+                "state_delta": {"added": new_walls, "removed": [], "changed": []},
+            })
+        entry = {"tick": tick, "bots": {"data": data, "debug_json": debug_json}}
+        if "fov" in layers:
+            entry["fov"] = [[x, y] for x, y in floor if abs(x - pos[0]) + abs(y - pos[1]) <= vis_radius]
+        if "influence" in layers:
+            entry["influence"] = [[round(rng.random(), 3) for _ in range(width)] for _ in range(height)]
+        if "gem_prediction" in layers:
+            entry["gem_prediction"] = [[round(rng.random(), 3) for _ in range(width)] for _ in range(height)]
+        if "gems" in layers:
+            entry["all_gems"] = [dict(gem)] if gem else []
+        protocol.append(entry)
+    response_times = [int(rng.lognormvariate(13, 0.5)) for _ in range(ticks)]
+    return {
+        "seed": format(rng.randrange(36 ** 6), "x"),
+        "score": rng.randrange(1000),
+        "gem_utilization": rng.random() * 100,
+        "floor_coverage": rng.random() * 100,
+        "ticks_to_first_capture": rng.randrange(ticks) if ticks else None,
+        "disqualified_for": None,
+        "response_time_stats": {"first": response_times[0] if ticks else None},
+        "response_times_ns": {"dtype": "int32", "data": base64.b64encode(
+            struct.pack(f"<{ticks}i", *[min(t, 2 ** 31 - 1) for t in response_times])).decode()},
+        "map": ["".join("#" if w else "." for w in row) for row in walls],
+        "debug_protocol": protocol,
+    }
+
+
+def synthetic_profile(width=19, height=19, ticks=1000, rounds=2, bots=1, layers=LAYERS, seed=0):
+    """Profile reports shaped like the patched runner's output, with random maps and random-walk bots."""
+    rng = random.Random(seed)
+    reports = []
+    for b in range(bots):
+        report_rounds = [synthetic_round(rng, width, height, ticks, layers) for _ in range(rounds)]
+        reports.append({
+            "name": f"bench-bot-{b + 1}", "emoji": "🤖", "stage_key": "bench", "stage_title": "Bench",
+            "seed": "bench", "timestamp": 0, "total_score": sum(r["score"] for r in report_rounds),
+            "rounds": report_rounds,
+        })
+    return reports
+
+
+def stats(times):
+    times = sorted(times)
+    return {"n": len(times), "min_s": times[0], "median_s": times[len(times) // 2], "max_s": times[-1]}
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return stats(times)
+
+
+def git_revision(base):
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=base,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(params, repeat=3, paint_frames=50, view_size=800, archive=False, base=None):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    from hg_core import DebugModel, write_archive
+    from hg_debug import DebugDock, MazeView
+
+    start = time.perf_counter()
+    reports = synthetic_profile(**params)
+    generate_s = time.perf_counter() - start
+    result = {
+        "params": dict(params, layers=list(params.get("layers", LAYERS)), archive=archive),
+        "revision": git_revision(base) if base else None,
+        "python": sys.version.split()[0],
+        "generate_s": generate_s,
+    }
+    with tempfile.TemporaryDirectory(prefix="hg_bench_") as tmp:
+        path = os.path.join(tmp, "profile.hgprof" if archive else "profile.json")
+        if archive:
+            write_archive(reports, path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(reports, f)
+        result["profile_bytes"] = os.path.getsize(path)
+
+        dock = DebugDock()
+        result["load"] = timed(lambda: dock.load(path), repeat)
+        debug = dock.debug
+        if not debug:
+            raise RuntimeError(f"DebugDock could not load {path}")
+        del reports
+
+        model = DebugModel(debug)
+        rounds = len(model.rounds)
+        def build():
+            for i in range(rounds):
+                model.set_round(i)
+                model.decode_debug()
+        result["round_build"] = timed(build, repeat)
+        result["round_build"]["per_round_s"] = result["round_build"]["median_s"] / max(1, rounds)
+
+        ticks = len(model.ticks)
+        result["scrub"] = timed(lambda: [model.set_tick(i) for i in range(ticks)], repeat)
+        result["scrub"]["per_tick_s"] = result["scrub"]["median_s"] / max(1, ticks)
+
+        view = MazeView(model)
+        view.resize(view_size, view_size)
+        frames = [ticks * i // paint_frames for i in range(paint_frames)] if ticks else [0]
+        def paint():
+            for i in frames:
+                model.set_tick(i)
+                view.grab()
+        result["paint"] = timed(paint, repeat)
+        result["paint"]["per_frame_s"] = result["paint"]["median_s"] / len(frames)
+        dock.deleteLater()
+        view.deleteLater()
+    app.processEvents()
+    return result
+
+
+def compare(old, new):
+    """Lines of median timing changes between two bench-gui results."""
+    lines = []
+    for key in ("load", "round_build", "scrub", "paint"):
+        a = (old.get(key) or {}).get("median_s")
+        b = (new.get(key) or {}).get("median_s")
+        if a and b:
+            lines.append(f"{key:<12} {a * 1000:10.2f} ms -> {b * 1000:10.2f} ms  ({(b / a - 1) * 100:+6.1f}%)")
+    if old.get("params") != new.get("params"):
+        lines.append("note: benchmark parameters differ")
+    return lines
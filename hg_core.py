@@ -0,0 +1,3402 @@
+"""Qt-free core of the Hidden Gems launcher.
+
+Runner patching, launch argument building, profile loading and analytics
+live here so they can be used from the headless CLI without importing
+PySide6 (``python run.py --headless ...``).
+"""
+import sys
+import os
+import stat
+import subprocess
+import shlex
+import json
+import re
+import time
+import math
+import base64
+import hashlib
+import argparse
+import struct
+import gzip
+import functools
+import threading
+from collections import deque
+from bisect import bisect_left, bisect_right
+
+
+DEFAULT_SETTINGS = {
+    "seed": "",
+    "width": 19,
+    "height": 19,
+    "generator": "arena",
+    "ticks": 1000,
+    "vis_radius": 10,
+    "gem_spawn": 0.05,
+    "gem_ttl": 300,
+    "max_gems": 1,
+    "emit_signals": False,
+    "swap_bots": False,
+    "cache": False,
+    "profile": False,
+    "check_determinism": False,
+    "use_docker": False,
+    "warm_bots": False,
+    "docker_pool": "",
+    "multi_core": False,
+    "threads": 0,
+    "adaptive_ci": 0.0,
+    "adaptive_sprt": 0.0,
+    "resource_sample_every": 0,
+    "coordinator": "",
+    "shard_size": 8,
+    "rounds": 1,
+    "round_seeds": "",
+    "verbose": 2,
+    "max_tps": 15,
+    "announcer": True,
+    "show_timings": False,
+    "start_paused": False,
+    "highlight_color": "#ffffff",
+    "enable_debug": True,
+    "replay_debug": False,
+    "map_cache": True,
+    "stderr_cap_kb": 64,
+    "stderr_spill": False,
+    "archive_profiles": True,
+}
+
+# bump whenever the patches applied by Launcher.patch_runner change
+PATCHSET_VERSION = 16
+# --stderr-spill target, relative to the runner directory
+STDERR_SPILL_DIR = "stderr_logs"
+PATCH_HEADER_RE = re.compile(r"^# hg-patch source-sha256=([0-9a-f]{64}) patchset=(\d+)(?: missed=(\S+))?$", re.M)
+
+# stages.yaml / customstages.yaml key -> settings key
+PRESET_KEYS = {
+    "width": "width",
+    "height": "height",
+    "generator": "generator",
+    "emit_signals": "emit_signals",
+    "vis_radius": "vis_radius",
+    "gem_spawn_rate": "gem_spawn",
+    "gem_ttl": "gem_ttl",
+    "max_gems": "max_gems",
+    "seed": "seed",
+    "ticks": "ticks",
+    "rounds": "rounds",
+    "round_seeds": "round_seeds",
+    "verbose": "verbose",
+    "max_tps": "max_tps",
+    "use_multicore": "multi_core",
+    "thread_count": "threads",
+}
+
+
+def parse_value(x):
+    if isinstance(x, (int, float, bool)):
+        return x
+    if isinstance(x, str) and ".." in x:
+        a = x.split("..")[0]
+        return float(a) if "." in a else int(a)
+    return x
+
+
+def decode_ns_column(column):
+    """Decode a packed little-endian int32 nanosecond column from the patched runner."""
+    if not isinstance(column, dict) or not column.get("data"):
+        return None
+    import numpy as np
+    return np.frombuffer(base64.b64decode(column["data"]), dtype="<i4")
+
+
+def response_time_outliers(times_ns):
+    """Return (p95, p99, spike indices) for a per-tick response time column."""
+    import numpy as np
+    p95, p99, median = np.percentile(times_ns, [95, 99, 50])
+    spikes = np.flatnonzero(times_ns > max(p99, 3 * median))
+    return p95, p99, spikes
+
+
+ROUND_SELECTIONS = ("worst", "disqualified", "outliers")
+
+
+def select_rounds(rounds, mode, n=10):
+    """Indices of rounds worth a debug re-run: the n lowest scores, the disqualified ones, or outliers.
+
+    Outliers are rounds outside the Tukey fences on score plus rounds whose slowest response is a spike
+    among the per-round maxima.
+    """
+    import numpy as np
+    if mode == "disqualified":
+        return [i for i, r in enumerate(rounds) if r.get("disqualified_for") is not None]
+    scored = [(r.get("score"), i) for i, r in enumerate(rounds) if r.get("score") is not None]
+    if mode == "worst":
+        return sorted(i for _, i in sorted(scored)[:n])
+    if mode != "outliers":
+        raise ValueError(f"unknown round selection: {mode}")
+    selected = set()
+    if len(scored) >= 4:
+        scores = np.array([x[0] for x in scored], dtype=float)
+        q1, q3 = np.percentile(scores, [25, 75])
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        selected.update(i for score, i in scored if score < low or score > high)
+    slowest = [((r.get("response_time_stats") or {}).get("max"), i) for i, r in enumerate(rounds)]
+    slowest = [(t, i) for t, i in slowest if t is not None]
+    if len(slowest) >= 4:
+        _, _, spikes = response_time_outliers(np.array([t for t, _ in slowest], dtype=float))
+        selected.update(slowest[k][1] for k in spikes)
+    return sorted(selected)
+
+
+class ProfileAnalytics:
+    """Per-round metric columns of one profile, built once and queried vectorized."""
+    PLOTS = (
+        ("score", "Score"),
+        ("gem_utilization", "Gem utilization %"),
+        ("floor_coverage", "Floor coverage %"),
+        ("ticks_to_first_capture", "Ticks to first capture"),
+        ("rt_median_ms", "Median response ms"),
+        ("rt_max_ms", "Max response ms"),
+    )
+
+    def __init__(self, profile, bootstrap_samples=1000, seed=0):
+        import numpy as np
+        rounds = profile.get("rounds", [])
+        self.n = len(rounds)
+        self.bootstrap_samples = bootstrap_samples
+        self.rng = np.random.default_rng(seed)
+        self.columns = {}
+        for key in ("score", "gem_utilization", "floor_coverage", "ticks_to_first_capture"):
+            self.columns[key] = np.array(
+                [r.get(key) if r.get(key) is not None else np.nan for r in rounds], dtype=float
+            )
+        for key in ("first", "min", "median", "max"):
+            self.columns[f"rt_{key}_ms"] = np.array(
+                [(r.get("response_time_stats") or {}).get(key) or np.nan for r in rounds], dtype=float
+            ) / 1_000_000
+        self.disqualified = np.array([r.get("disqualified_for") is not None for r in rounds], dtype=bool)
+        self.seeds = [r.get("seed") for r in rounds]
+
+    def values(self, name):
+        import numpy as np
+        column = self.columns[name]
+        return column[~np.isnan(column)]
+
+    def percentiles(self, name, q=(5, 25, 50, 75, 95)):
+        import numpy as np
+        values = self.values(name)
+        if not len(values):
+            return None
+        return dict(zip(q, np.percentile(values, q)))
+
+    def histogram(self, name, bins=30):
+        import numpy as np
+        values = self.values(name)
+        if len(values) and values.min() == values.max():
+            return np.histogram(values, bins=1, range=(values.min() - 0.5, values.max() + 0.5))
+        return np.histogram(values, bins=min(bins, max(1, len(values))))
+
+    def bootstrap_ci(self, name, statistic=None, alpha=0.05):
+        import numpy as np
+        statistic = statistic or np.mean
+        values = self.values(name)
+        if not len(values):
+            return None
+        idx = self.rng.integers(0, len(values), size=(self.bootstrap_samples, len(values)))
+        stats = statistic(values[idx], axis=1)
+        return tuple(float(x) for x in np.percentile(stats, [100 * alpha / 2, 100 * (1 - alpha / 2)]))
+
+    def summary(self, name):
+        import numpy as np
+        values = self.values(name)
+        if not len(values):
+            return None
+        p5, p50, p95 = np.percentile(values, [5, 50, 95])
+        return {
+            "n": len(values),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "p5": float(p5),
+            "p50": float(p50),
+            "p95": float(p95),
+            "ci": self.bootstrap_ci(name),
+        }
+
+
+ARCHIVE_MAGIC = b"HGPROF1\n"
+# per-tick fields that change little from one tick to the next and are stored as deltas;
+# "set" fields are coordinate lists whose order does not matter and is not kept
+DELTA_FIELDS = (
+    (("bots", "data", "wall"), "set"),
+    (("fov",), "set"),
+    (("influence",), "grid"),
+    (("gem_prediction",), "grid"),
+)
+
+
+def archive_codec(name=None):
+    """Return (name, compress, decompress); zstd if installed, gzip otherwise."""
+    if name in (None, "zstd"):
+        try:
+            import zstandard
+        except ImportError:
+            if name == "zstd":
+                raise
+        else:
+            return "zstd", zstandard.ZstdCompressor(level=10).compress, zstandard.ZstdDecompressor().decompress
+    return "gzip", lambda data: gzip.compress(data, 6, mtime=0), gzip.decompress
+
+
+def get_path(d, path):
+    for key in path:
+        if not isinstance(d, dict):
+            return None
+        d = d.get(key)
+    return d
+
+
+def replace_path(d, path, value):
+    """Copy of d with d[path] = value; only the dicts along path are copied."""
+    d = dict(d)
+    if len(path) == 1:
+        d[path[0]] = value
+    else:
+        d[path[0]] = replace_path(d.get(path[0]) or {}, path[1:], value)
+    return d
+
+
+def set_key(v):
+    return tuple(v) if isinstance(v, list) else v
+
+
+def encode_delta(prev, value, kind):
+    if not isinstance(prev, list) or not isinstance(value, list):
+        return value
+    if value == prev:
+        return {"$same": 1}
+    if kind == "grid":
+        if len(value) != len(prev) or any(len(a) != len(b) for a, b in zip(value, prev)):
+            return value
+        cells = [[y, x, v] for y, (row, prev_row) in enumerate(zip(value, prev))
+                 for x, (v, p) in enumerate(zip(row, prev_row)) if v != p]
+        if len(cells) * 3 < sum(len(row) for row in value):
+            return {"$cells": cells}
+        return value
+    try:
+        now = set(map(set_key, value))
+        before = set(map(set_key, prev))
+    except TypeError:
+        return value
+    delta = {
+        "$del": [v for v in prev if set_key(v) not in now],
+        "$add": [v for v in value if set_key(v) not in before],
+    }
+    if len(delta["$del"]) + len(delta["$add"]) < len(value):
+        return delta
+    return value
+
+
+def decode_delta(prev, stored):
+    if not isinstance(stored, dict):
+        return stored
+    if "$same" in stored:
+        return prev
+    if "$cells" in stored:
+        grid = [list(row) for row in prev]
+        for y, x, v in stored["$cells"]:
+            grid[y][x] = v
+        return grid
+    if "$add" in stored:
+        removed = set(map(set_key, stored["$del"]))
+        return [v for v in prev if set_key(v) not in removed] + stored["$add"]
+    return stored
+
+
+def delta_encode_protocol(protocol):
+    prev = {}
+    out = []
+    for entry in protocol:
+        for path, kind in DELTA_FIELDS:
+            value = get_path(entry, path)
+            if value is None:
+                continue
+            encoded = encode_delta(prev.get(path), value, kind)
+            prev[path] = value
+            if encoded is not value:
+                entry = replace_path(entry, path, encoded)
+        out.append(entry)
+    return out
+
+
+def delta_decode_protocol(protocol, fields=DELTA_FIELDS):
+    """Undo delta_encode_protocol; fields left out of fields keep their stored deltas."""
+    prev = {}
+    out = []
+    for entry in protocol:
+        for path, _ in fields:
+            stored = get_path(entry, path)
+            if stored is None:
+                continue
+            value = decode_delta(prev.get(path), stored)
+            prev[path] = value
+            if value is not stored:
+                entry = replace_path(entry, path, value)
+        out.append(entry)
+    return out
+
+
+def write_archive(reports, path, codec=None):
+    """Write profile reports as an archive: one compressed chunk per round's debug protocol, then the index."""
+    name, compress, _ = archive_codec(codec)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(ARCHIVE_MAGIC + name.encode().ljust(8))
+        index = []
+        for report in reports:
+            rounds = []
+            for r in report.get("rounds", []):
+                r = dict(r)
+                protocol = r.pop("debug_protocol", None)
+                if protocol:
+                    blob = compress(json.dumps(delta_encode_protocol(protocol), separators=(",", ":")).encode())
+                    r["debug_chunk"] = [f.tell(), len(blob)]
+                    f.write(blob)
+                rounds.append(r)
+            index.append(dict(report, rounds=rounds))
+        blob = compress(json.dumps(index, separators=(",", ":")).encode())
+        offset = f.tell()
+        f.write(blob)
+        f.write(struct.pack("<QQ", offset, len(blob)))
+    os.replace(tmp, path)
+
+
+class LazyRound(dict):
+    """Round of an archived profile; debug_protocol is decompressed from disk each time it is read."""
+
+    def __init__(self, data, path, decompress):
+        super().__init__(data)
+        self.path = path
+        self.decompress = decompress
+
+    def load_protocol(self, fields=DELTA_FIELDS):
+        offset, length = dict.get(self, "debug_chunk")
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            blob = f.read(length)
+        return delta_decode_protocol(json_decoder()[1](self.decompress(blob)), fields)
+
+    def get(self, key, default=None):
+        if key == "debug_protocol" and "debug_chunk" in self:
+            return self.load_protocol()
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        if key == "debug_protocol" and "debug_chunk" in self:
+            return self.load_protocol()
+        return super().__getitem__(key)
+
+
+def is_archive(path):
+    with open(path, "rb") as f:
+        return f.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+
+
+def read_archive(path):
+    with open(path, "rb") as f:
+        header = f.read(len(ARCHIVE_MAGIC) + 8)
+        _, _, decompress = archive_codec(header[len(ARCHIVE_MAGIC):].decode().strip())
+        f.seek(-16, os.SEEK_END)
+        offset, length = struct.unpack("<QQ", f.read(16))
+        f.seek(offset)
+        reports = json.loads(decompress(f.read(length)))
+    for report in reports:
+        report["rounds"] = [LazyRound(r, path, decompress) for r in report.get("rounds", [])]
+    return reports
+
+
+def read_reports(path):
+    """All bot reports of a profile JSON or archive."""
+    if is_archive(path):
+        return read_archive(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+class JsonStream:
+    """Reads a JSON file value by value from a buffer that only holds the value being decoded."""
+
+    WHITESPACE = re.compile(r"\s*")
+
+    def __init__(self, f, chunk_size=1 << 20):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+
+    def fill(self, n=0):
+        """Drop the consumed text and read at least n more characters; False at the end of the file."""
+        data = self.f.read(max(n, self.chunk_size))
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = self.WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def take(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r}, got {self.peek()!r}")
+        self.pos += 1
+
+    def items(self, close):
+        """Yield once per element of the array or object just opened, until close is taken."""
+        if self.peek() == close:
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() != ",":
+                return self.take(close)
+            self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # doubling the read keeps a large value from being re-decoded once per chunk
+                if not self.fill(len(self.buf) - self.pos):
+                    raise
+                continue
+            # a number near the end of the buffer may go on in the next chunk ("1." + "5", "1e" + "-3")
+            if isinstance(value, (int, float)) and len(self.buf) - end <= 2 and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_rounds(path):
+    """Rounds of all reports of a profile JSON, parsed one at a time so only one round is in memory."""
+    with open(path, "r", encoding="utf-8") as f:
+        stream = JsonStream(f)
+        if stream.peek() == "[":
+            stream.take("[")
+            reports = stream.items("]")
+        else:
+            reports = iter([None])
+        for _ in reports:
+            stream.take("{")
+            for _ in stream.items("}"):
+                key = stream.value()
+                stream.take(":")
+                if key == "rounds" and stream.peek() == "[":
+                    stream.take("[")
+                    for _ in stream.items("]"):
+                        yield stream.value()
+                else:
+                    stream.value()
+
+
+def load_profile(path):
+    """Load a profile JSON or archive and return the report of the first bot."""
+    reports = read_reports(path)
+    return reports[0] if reports else {}
+
+
+HEATMAP_LAYERS = ("visits", "captures", "spawns")
+
+
+def round_heatmaps(round_data):
+    """(height, width, grids) with visit, capture and gem spawn counts of one round; None without a debug protocol."""
+    import numpy as np
+    if isinstance(round_data, LazyRound) and "debug_chunk" in round_data:
+        # bot position, gems and config are never delta encoded, the delta fields are not needed
+        protocol = round_data.load_protocol(fields=())
+    else:
+        protocol = round_data.get("debug_protocol") or []
+    if not protocol:
+        return None
+    rows = round_data.get("map")
+    height, width = (len(rows), len(rows[0])) if rows else (None, None)
+    cells = {name: [] for name in HEATMAP_LAYERS}
+    prev_gems = set()
+    prev_pos = None
+    for entry in protocol:
+        data = (entry.get("bots") or {}).get("data") or {}
+        if width is None:
+            config = data.get("config") or {}
+            width, height = config.get("width"), config.get("height")
+        pos = tuple(data["bot"][:2]) if data.get("bot") else None
+        if pos:
+            cells["visits"].append(pos)
+        # same rules as DebugModel.rebuild_events
+        gems = {tuple(g["position"][:2]) for g in entry.get("all_gems") or [] if g.get("position")}
+        cells["spawns"].extend(gems - prev_gems)
+        cells["captures"].extend(g for g in prev_gems - gems if g == pos or g == prev_pos)
+        prev_gems = gems
+        if pos:
+            prev_pos = pos
+    if not width or not height:
+        return None
+    grids = {}
+    for name in HEATMAP_LAYERS:
+        grid = np.zeros((height, width), dtype=np.int64)
+        xy = np.asarray(cells[name], dtype=np.int64).reshape(-1, 2)
+        xy = xy[(xy[:, 0] >= 0) & (xy[:, 1] >= 0) & (xy[:, 0] < width) & (xy[:, 1] < height)]
+        np.add.at(grid, (xy[:, 1], xy[:, 0]), 1)
+        grids[name] = grid
+    return height, width, grids
+
+
+def add_heatmaps(totals, rounds):
+    """Sum round_heatmaps results into totals, keyed by map size; returns totals."""
+    for heatmaps in rounds:
+        if heatmaps is None:
+            totals["no_protocol"] = totals.get("no_protocol", 0) + 1
+            continue
+        height, width, grids = heatmaps
+        total = totals.setdefault((height, width), {"rounds": 0})
+        total["rounds"] += 1
+        for name, grid in grids.items():
+            total[name] = total[name] + grid if name in total else grid
+    return totals
+
+
+def merge_heatmaps(totals, part):
+    """Add the add_heatmaps totals part (e.g. from a pool worker) into totals."""
+    for key, total in part.items():
+        if key == "no_protocol":
+            totals[key] = totals.get(key, 0) + total
+        elif key not in totals:
+            totals[key] = total
+        else:
+            for name, value in total.items():
+                totals[key][name] = totals[key].get(name, 0) + value
+    return totals
+
+
+def archive_heatmaps(path, keys):
+    """Process pool task: heatmap totals of the (report, round) indices keys of an archive."""
+    reports = read_archive(path)
+    return add_heatmaps({}, (round_heatmaps(reports[b]["rounds"][r]) for b, r in keys))
+
+
+def aggregate_heatmaps(path=None, reports=None, workers=None):
+    """Visits, captures and gem spawns summed over all rounds and bots of a profile.
+
+    Archives are split into a few rounds per task over a process pool, each worker decompressing
+    only its own rounds. JSON profiles are streamed one round at a time, reports already in
+    memory and single-worker archive runs are walked once in this process (archives still one
+    round at a time). Rounds of another map size than the most common one are counted in skipped.
+    """
+    totals = {}
+    workers = workers or os.cpu_count() or 1
+    if path and is_archive(path) and workers > 1:
+        import concurrent.futures
+        import multiprocessing
+        keys = [(b, r) for b, report in enumerate(read_archive(path)) for r in range(len(report["rounds"]))]
+        size = max(1, -(-len(keys) // (workers * 4)))
+        # spawn: the GUI calls this from a thread, forking a Qt process there is not safe
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            tasks = [pool.submit(archive_heatmaps, path, keys[i:i + size]) for i in range(0, len(keys), size)]
+            for task in concurrent.futures.as_completed(tasks):
+                merge_heatmaps(totals, task.result())
+    elif reports is None and not is_archive(path):
+        add_heatmaps(totals, (round_heatmaps(round_data) for round_data in iter_json_rounds(path)))
+    else:
+        reports = read_reports(path) if reports is None else reports
+        add_heatmaps(totals, (round_heatmaps(r) for report in reports for r in report.get("rounds", [])))
+    sizes = [key for key in totals if key != "no_protocol"]
+    if not sizes:
+        return None
+    height, width = max(sizes, key=lambda key: totals[key]["rounds"])
+    result = dict(totals[(height, width)], width=width, height=height, no_protocol=totals.get("no_protocol", 0))
+    result["skipped"] = sum(totals[key]["rounds"] for key in sizes if key != (height, width))
+    return result
+
+
+class StderrPages:
+    """Full bot stderr log spilled by the runner to a .log.gz file, decompressed one page at a time.
+
+    The runner writes each page as its own gzip member with the member size in an "HG" header extra
+    field, so the pages are found by reading their headers. Files of older runners are a single gzip
+    stream; those are paged by seeking, which decompresses everything before the page.
+    """
+
+    def __init__(self, path, page_size=64 * 1024):
+        self.path = path
+        self.page_size = page_size
+        self.members = []
+        with open(path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            offset = 0
+            while offset < end:
+                f.seek(offset)
+                header = f.read(20)
+                if len(header) < 20 or not header[3] & 4 or header[12:14] != b"HG":
+                    self.members = None
+                    break
+                size = struct.unpack_from("<I", header, 16)[0]
+                self.members.append((offset, size))
+                offset += size
+            if self.members is None:
+                # gzip trailer: uncompressed size mod 2**32, plenty for a single round
+                f.seek(-4, os.SEEK_END)
+                self.size = struct.unpack("<I", f.read(4))[0]
+
+    def __len__(self):
+        if self.members is not None:
+            return max(1, len(self.members))
+        return max(1, -(-self.size // self.page_size))
+
+    def page(self, i):
+        if self.members is not None:
+            if not self.members:
+                return ""
+            offset, size = self.members[i]
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return gzip.decompress(f.read(size)).decode("utf-8", "replace")
+        with gzip.open(self.path, "rb") as f:
+            f.seek(i * self.page_size)
+            return f.read(self.page_size).decode("utf-8", "replace")
+
+
+def sign_test(wins, losses):
+    """Exact two-sided binomial sign test, ties dropped."""
+    n = wins + losses
+    if n == 0:
+        return 1.0
+    k = min(wins, losses)
+    tail = sum(math.comb(n, i) for i in range(k + 1)) / 2 ** n
+    return min(1.0, 2 * tail)
+
+
+def wilcoxon_signed_rank(deltas, exact_max=25):
+    """Wilcoxon signed-rank test, two-sided.
+
+    Up to exact_max non-zero deltas the p-value comes from the exact null distribution of the
+    observed (tied) ranks, above that from the normal approximation with tie and continuity correction.
+    """
+    import numpy as np
+    d = deltas[deltas != 0]
+    n = len(d)
+    if n == 0:
+        return 0.0, 1.0
+    magnitude = np.abs(d)
+    order = np.argsort(magnitude, kind="mergesort")
+    ranks = np.empty(n)
+    ranks[order] = np.arange(1, n + 1)
+    _, inverse, counts = np.unique(magnitude, return_inverse=True, return_counts=True)
+    rank_sums = np.bincount(inverse, weights=ranks)
+    ranks = rank_sums[inverse] / counts[inverse]
+    w_plus = ranks[d > 0].sum()
+    if n <= exact_max:
+        # every sign assignment is equally likely under H0; tied ranks are halves, so count in doubled ranks
+        doubled = np.rint(2 * ranks).astype(np.int64)
+        ways = np.zeros(int(doubled.sum()) + 1)
+        ways[0] = 1
+        for r in doubled:
+            ways[r:] = ways[r:] + ways[:-r].copy()
+        w = int(round(2 * w_plus))
+        tail = min(ways[:w + 1].sum(), ways[w:].sum()) / 2 ** n
+        return float(w_plus), float(min(1.0, 2 * tail))
+    mean = n * (n + 1) / 4
+    var = n * (n + 1) * (2 * n + 1) / 24 - (counts ** 3 - counts).sum() / 48
+    if var <= 0:
+        return float(w_plus), 1.0
+    z = max(0.0, abs(w_plus - mean) - 0.5) / math.sqrt(var)
+    return float(w_plus), math.erfc(z / math.sqrt(2))
+
+
+def compare_profiles(a, b, worst=10):
+    """Pair the rounds of two profiles by seed and compare B against A."""
+    import numpy as np
+    index = {}
+    for r in b.get("rounds", []):
+        if r.get("seed") is not None and r.get("score") is not None:
+            index[r["seed"]] = r
+    pairs = []
+    for r in a.get("rounds", []):
+        other = index.get(r.get("seed"))
+        if other is not None and r.get("score") is not None:
+            pairs.append((r["seed"], r["score"], other["score"]))
+    
+    result = {"n": len(pairs), "unmatched_a": len(a.get("rounds", [])) - len(pairs),
+              "unmatched_b": len(index) - len(pairs)}
+    if not pairs:
+        return result
+    
+    score_a = np.array([p[1] for p in pairs], dtype=float)
+    score_b = np.array([p[2] for p in pairs], dtype=float)
+    deltas = score_b - score_a
+    wins = int((deltas > 0).sum())
+    losses = int((deltas < 0).sum())
+    mean = float(deltas.mean())
+    sd = float(deltas.std(ddof=1)) if len(deltas) > 1 else 0.0
+    _, wilcoxon_p = wilcoxon_signed_rank(deltas)
+    
+    # rounds needed for a two-sided 5% test with 80% power at the observed effect
+    needed = math.ceil(((1.959964 + 0.841621) * sd / mean) ** 2) if mean and sd else None
+    
+    order = np.argsort(deltas, kind="mergesort")[:worst]
+    result.update({
+        "deltas": deltas,
+        "mean_a": float(score_a.mean()),
+        "mean_b": float(score_b.mean()),
+        "mean_delta": mean,
+        "median_delta": float(np.median(deltas)),
+        "sd_delta": sd,
+        "wins": wins,
+        "losses": losses,
+        "ties": len(deltas) - wins - losses,
+        "sign_p": sign_test(wins, losses),
+        "wilcoxon_p": wilcoxon_p,
+        "rounds_needed": needed,
+        "worst": [(pairs[i][0], pairs[i][1], pairs[i][2], float(deltas[i])) for i in order if deltas[i] < 0],
+    })
+    return result
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def bot_hash(path):
+    """Content hash of a bot folder, so history follows bot versions rather than names."""
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(".pyc"):
+                continue
+            full = os.path.join(root, name)
+            h.update(os.path.relpath(full, path).replace(os.sep, "/").encode() + b"\0")
+            with open(full, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+class ResultsStore:
+    """SQLite history of finished runs; aggregates are stored at ingest so queries never touch JSON."""
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        profile_sha256 TEXT UNIQUE,
+        timestamp INTEGER,
+        stage_key TEXT,
+        stage_title TEXT,
+        seed TEXT,
+        git_hash TEXT,
+        rounds INTEGER,
+        ingested_at INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS bots (
+        id INTEGER PRIMARY KEY,
+        run_id INTEGER REFERENCES runs(id) ON DELETE CASCADE,
+        slot INTEGER,
+        name TEXT,
+        emoji TEXT,
+        bot_hash TEXT,
+        total_score REAL,
+        mean_score REAL,
+        gem_utilization_mean REAL,
+        gem_utilization_cv REAL,
+        floor_coverage_mean REAL,
+        disqualified INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS rounds (
+        id INTEGER PRIMARY KEY,
+        bot_id INTEGER REFERENCES bots(id) ON DELETE CASCADE,
+        round_index INTEGER,
+        seed TEXT,
+        score REAL,
+        gem_utilization REAL,
+        floor_coverage REAL,
+        ticks_to_first_capture INTEGER,
+        disqualified_for TEXT,
+        rt_first_ms REAL,
+        rt_median_ms REAL,
+        rt_max_ms REAL
+    );
+    CREATE TABLE IF NOT EXISTS tick_summaries (
+        round_id INTEGER PRIMARY KEY REFERENCES rounds(id) ON DELETE CASCADE,
+        ticks INTEGER,
+        rt_mean_ms REAL,
+        rt_p95_ms REAL,
+        rt_p99_ms REAL,
+        spikes INTEGER,
+        cpu_ms INTEGER,
+        rss_kb_max INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS runs_timestamp ON runs(timestamp);
+    CREATE INDEX IF NOT EXISTS runs_stage ON runs(stage_key, timestamp);
+    CREATE INDEX IF NOT EXISTS bots_hash ON bots(bot_hash, run_id);
+    CREATE INDEX IF NOT EXISTS bots_name ON bots(name, run_id);
+    CREATE INDEX IF NOT EXISTS bots_run ON bots(run_id);
+    CREATE INDEX IF NOT EXISTS rounds_bot ON rounds(bot_id);
+    CREATE INDEX IF NOT EXISTS rounds_seed ON rounds(seed);
+    """
+
+    def __init__(self, path):
+        import sqlite3
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(self.SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def ingest(self, profile_path, bot_dirs=()):
+        """Store one profile JSON; returns the run id, or None if this file was ingested before."""
+        digest = file_sha256(profile_path)
+        if self.db.execute("SELECT 1 FROM runs WHERE profile_sha256 = ?", (digest,)).fetchone():
+            return None
+        reports = read_reports(profile_path)
+        if not reports:
+            return None
+        first = reports[0]
+        with self.db:
+            run_id = self.db.execute(
+                "INSERT INTO runs (profile_sha256, timestamp, stage_key, stage_title, seed, git_hash, rounds, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, first.get("timestamp") or int(os.path.getmtime(profile_path)), first.get("stage_key"),
+                 first.get("stage_title"), first.get("seed"), first.get("git_hash"),
+                 len(first.get("rounds", [])), int(time.time()))
+            ).lastrowid
+            for slot, report in enumerate(reports):
+                self.ingest_bot(run_id, slot, report, bot_dirs[slot] if slot < len(bot_dirs) else None)
+        return run_id
+
+    def ingest_bot(self, run_id, slot, report, bot_dir):
+        import numpy as np
+        rounds = report.get("rounds", [])
+        scores = [r["score"] for r in rounds if r.get("score") is not None]
+        if bot_dir and os.path.isdir(bot_dir):
+            digest = bot_hash(bot_dir)
+        else:
+            digest = "name:" + str(report.get("name", ""))
+        bot_id = self.db.execute(
+            "INSERT INTO bots (run_id, slot, name, emoji, bot_hash, total_score, mean_score, gem_utilization_mean, "
+            "gem_utilization_cv, floor_coverage_mean, disqualified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, slot, report.get("name"), report.get("emoji"), digest, report.get("total_score"),
+             sum(scores) / len(scores) if scores else None, report.get("gem_utilization_mean"),
+             report.get("gem_utilization_cv"), report.get("floor_coverage_mean"),
+             sum(1 for r in rounds if r.get("disqualified_for")))
+        ).lastrowid
+        for index, r in enumerate(rounds):
+            rt = r.get("response_time_stats") or {}
+            ms = lambda key: rt[key] / 1e6 if rt.get(key) is not None else None
+            round_id = self.db.execute(
+                "INSERT INTO rounds (bot_id, round_index, seed, score, gem_utilization, floor_coverage, "
+                "ticks_to_first_capture, disqualified_for, rt_first_ms, rt_median_ms, rt_max_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (bot_id, index, r.get("seed"), r.get("score"), r.get("gem_utilization"), r.get("floor_coverage"),
+                 r.get("ticks_to_first_capture"), r.get("disqualified_for"), ms("first"), ms("median"), ms("max"))
+            ).lastrowid
+            times_ns = decode_ns_column(r.get("response_times_ns"))
+            samples = r.get("resource_samples") or {}
+            if times_ns is None and not samples.get("tick"):
+                continue
+            ticks = rt_mean = p95 = p99 = spikes = None
+            if times_ns is not None and len(times_ns):
+                p95, p99, spike_index = response_time_outliers(times_ns)
+                ticks, rt_mean, spikes = len(times_ns), float(times_ns.mean()) / 1e6, len(spike_index)
+                p95, p99 = float(p95) / 1e6, float(p99) / 1e6
+            cpu_ms = samples["cpu_ms"][-1] if samples.get("cpu_ms") else None
+            rss_kb_max = int(np.max(samples["rss_kb"])) if samples.get("rss_kb") else None
+            self.db.execute(
+                "INSERT INTO tick_summaries (round_id, ticks, rt_mean_ms, rt_p95_ms, rt_p99_ms, spikes, cpu_ms, rss_kb_max) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (round_id, ticks, rt_mean, p95, p99, spikes, cpu_ms, rss_kb_max)
+            )
+
+    def bots(self):
+        """(bot_hash, name, runs, last timestamp) per bot version, newest first."""
+        return self.db.execute(
+            "SELECT b.bot_hash, b.name, COUNT(*), MAX(r.timestamp) FROM bots b JOIN runs r ON r.id = b.run_id "
+            "GROUP BY b.bot_hash ORDER BY MAX(r.timestamp) DESC"
+        ).fetchall()
+
+    def stages(self):
+        return [row[0] for row in self.db.execute(
+            "SELECT DISTINCT stage_key FROM runs WHERE stage_key IS NOT NULL ORDER BY stage_key"
+        )]
+
+    def history(self, bot_hash=None, name=None, stage_key=None, limit=1000):
+        """Per-run rows, oldest first: dicts with run and bot aggregate columns."""
+        where, params = [], []
+        if bot_hash:
+            where.append("b.bot_hash = ?")
+            params.append(bot_hash)
+        if name:
+            where.append("b.name = ?")
+            params.append(name)
+        if stage_key:
+            where.append("r.stage_key = ?")
+            params.append(stage_key)
+        sql = (
+            "SELECT r.id, r.timestamp, r.stage_key, r.seed, r.rounds, b.name, b.emoji, b.bot_hash, b.total_score, "
+            "b.mean_score, b.gem_utilization_mean, b.floor_coverage_mean, b.disqualified "
+            "FROM bots b JOIN runs r ON r.id = b.run_id"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.timestamp DESC, r.id DESC, b.slot LIMIT ?"
+        params.append(limit)
+        keys = ("run_id", "timestamp", "stage_key", "seed", "rounds", "name", "emoji", "bot_hash", "total_score",
+                "mean_score", "gem_utilization_mean", "floor_coverage_mean", "disqualified")
+        return [dict(zip(keys, row)) for row in reversed(self.db.execute(sql, params).fetchall())]
+
+
+def yaml_loader():
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_stages(base):
+    import yaml
+    stages = {}
+    customstages = {}
+    stages_file = os.path.join(base, "stages.yaml")
+    if os.path.exists(stages_file):
+        with open(stages_file) as f:
+            stages = yaml.load(f, Loader=yaml_loader()) or {}
+    customstages_file = os.path.join(base, "customstages.yaml")
+    if os.path.exists(customstages_file):
+        with open(customstages_file) as f:
+            customstages = yaml.load(f, Loader=yaml_loader()) or {}
+    return stages, customstages
+
+
+def save_stages(path, stages):
+    import yaml
+    with open(path, "w") as f:
+        yaml.safe_dump(stages, f)
+
+
+def apply_preset(settings, preset):
+    for key, target in PRESET_KEYS.items():
+        if key in preset:
+            value = parse_value(preset[key])
+            default = DEFAULT_SETTINGS[target]
+            if isinstance(default, bool):
+                value = bool(value)
+            elif isinstance(default, (int, float)):
+                value = type(default)(value)
+            else:
+                value = str(value)
+            settings[target] = value
+    return settings
+
+
+class Instrumentation:
+    """Wall-clock timings of the GUI hot paths; recorded only while enabled, plus an optional cProfile capture."""
+
+    def __init__(self, keep=1000):
+        self.enabled = False
+        self.keep = keep
+        self.samples = {}
+        self.profiler = None
+        self.profile_text = None
+
+    def record(self, name, seconds):
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.keep)
+        self.samples[name].append(seconds)
+
+    def reset(self):
+        self.samples = {}
+
+    def stats(self):
+        """name -> count, last, mean and p95 in milliseconds over the kept samples."""
+        out = {}
+        for name, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            out[name] = {
+                "count": len(samples),
+                "last_ms": samples[-1] * 1000,
+                "mean_ms": sum(samples) / len(samples) * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            }
+        return out
+
+    def start_profile(self):
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profile(self, limit=25):
+        """Stop the cProfile capture and return its top functions by cumulative time."""
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        import io
+        import pstats
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        self.profiler = None
+        self.profile_text = out.getvalue()
+        return self.profile_text
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "stats": self.stats(),
+                "samples_ms": {name: [x * 1000 for x in v] for name, v in self.samples.items()},
+                "profile": self.profile_text,
+            }, f, indent=2)
+
+
+INSTRUMENTATION = Instrumentation()
+
+
+def instrumented(name):
+    """Time the decorated function under name while INSTRUMENTATION is enabled; one flag check otherwise."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            if not INSTRUMENTATION.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                INSTRUMENTATION.record(name, time.perf_counter() - start)
+        return timed
+    return wrap
+
+
+# debug_json keys the visualizer renders; everything else (e.g. a bot's memory dump) is dropped after parsing
+DEBUG_RENDER_KEYS = ("highlight", "state_delta", "decision", "path")
+
+
+@functools.lru_cache(maxsize=None)
+def json_decoder():
+    """Return (name, loads); orjson if installed, json otherwise."""
+    try:
+        import orjson
+    except ImportError:
+        return "json", json.loads
+    return "orjson", orjson.loads
+
+
+def decode_debug_json(raw):
+    """Rendered keys of one tick's debug_json; ValueError if it is not a JSON object, TypeError if not a string."""
+    # every payload is parsed, so truncated ones are counted even if they name no rendered key
+    data = json_decoder()[1](raw)
+    if not isinstance(data, dict):
+        raise ValueError(f"expected an object, got {type(data).__name__}")
+    return {k: data[k] for k in DEBUG_RENDER_KEYS if k in data}
+
+
+class DebugModel:
+    def __init__(self, debug_data, replayer=None, round_index=0, defer_replay=False):
+        self.debug_data = debug_data
+        # replayer(round_index) -> the round re-simulated with its debug protocol, for --replay-debug profiles
+        self.replayer = replayer
+        self.replayed = {}
+        self.replay_errors = {}
+        self.replay_error = None
+        # with defer_replay the round is left empty (replaying = True) until the caller ran replay()
+        self.defer_replay = defer_replay
+        self.replaying = False
+        self.round_index = round_index
+        self.tick_index = 0
+        self.width = None
+        self.height = None
+        self.rounds = debug_data.get("rounds", [])
+        self.ticks = []
+        self.walls = None
+        self.wall_ticks = None
+        self.visits = {}
+        self.trail = []
+        self.events = []
+        self.event_ticks = []
+        self.response_times = None
+        # debug_json is decoded per tick on first use, or for the whole round by decode_debug()
+        self.decode_lock = threading.Lock()
+        self.generation = 0
+        self.debug_pending = 0
+        self.decode_errors = 0
+        self.decode_error = None
+        self.rebuild_round()
+    @instrumented("rebuild_round")
+    def rebuild_round(self):
+        self.generation += 1
+        self.replaying = False
+        self.debug_pending = 0
+        self.decode_errors = 0
+        self.decode_error = None
+        self.ticks = []
+        self.walls = None
+        self.wall_ticks = None
+        self.visits = {}
+        self.trail = []
+        self.events = []
+        self.event_ticks = []
+        self.response_times = None
+        
+        if not self.rounds:
+            return
+        
+        round_data = self.rounds[self.round_index]
+        self.response_times = decode_ns_column(round_data.get("response_times_ns"))
+        self.replay_error = None
+        if not round_data.get("debug_protocol") and round_data.get("replay") and self.replayer:
+            if self.round_index not in self.replayed and self.round_index not in self.replay_errors:
+                if self.defer_replay:
+                    self.replaying = True
+                    return
+                self.replay(self.round_index)
+            if self.round_index in self.replay_errors:
+                # reported once, the next visit of the round tries again
+                self.replay_error = self.replay_errors.pop(self.round_index)
+                return
+            # response times stay those of the real run, the replay only restores the ticks
+            round_data = dict(round_data, **{k: self.replayed[self.round_index].get(k) for k in ("debug_protocol", "map")})
+        protocol = round_data.get("debug_protocol") or []
+        
+        if not protocol:
+            return
+        
+        temp_ticks = {}
+        # walls as reported: x, y and the tick they were reported in
+        wall_x, wall_y, wall_t = [], [], []
+        
+        for entry in protocol:
+            tick = entry.get("tick", 0)
+            bots = entry.get("bots") or {}
+            data = bots.get("data") or {}
+            debug_json_raw = bots.get("debug_json")
+            
+            config = data.get("config") or {}
+            if self.width is None:
+                self.width = config.get("width", self.width)
+            if self.height is None:
+                self.height = config.get("height", self.height)
+            
+            bot_pos = data.get("bot")
+            walls = data.get("wall_new") or data.get("wall") or []
+            all_gems_data = entry.get("all_gems") or []
+            gems = [tuple(g.get("position")) for g in all_gems_data if g.get("position")]
+            
+            for wall in walls:
+                if len(wall) >= 2:
+                    wall_x.append(wall[0])
+                    wall_y.append(wall[1])
+                    wall_t.append(tick)
+            
+            if tick not in temp_ticks:
+                temp_ticks[tick] = {
+                    "tick": tick,
+                    "bot_pos": None,
+                    "gems": [],
+                    "debug_raw": None
+                }
+            
+            if bot_pos:
+                temp_ticks[tick]["bot_pos"] = tuple(bot_pos)
+                pos_key = tuple(bot_pos)
+                self.visits[pos_key] = self.visits.get(pos_key, 0) + 1
+            
+            if gems:
+                temp_ticks[tick]["gems"] = gems
+            
+            if debug_json_raw:
+                temp_ticks[tick]["debug_raw"] = debug_json_raw
+            
+            fov_data = entry.get("fov")
+            if fov_data:
+                temp_ticks[tick]["fov"] = fov_data
+            
+            influence = entry.get("influence")
+            if influence:
+                temp_ticks[tick]["influence"] = influence
+            
+            gem_prediction = entry.get("gem_prediction")
+            if gem_prediction:
+                temp_ticks[tick]["gem_prediction"] = gem_prediction
+        
+        self.ticks = [temp_ticks[k] for k in sorted(temp_ticks.keys())]
+        self.debug_pending = sum(1 for t in self.ticks if t["debug_raw"])
+        self.rebuild_walls(round_data.get("map"), wall_x, wall_y, wall_t)
+        self.tick_index = 0
+        self.rebuild_events()
+        self.rebuild_trail()
+
+    def replay(self, round_index):
+        """Run the replayer for round_index; blocking, so deferred models call it from a worker thread."""
+        try:
+            self.replayed[round_index] = self.replayer(round_index)
+        except Exception as e:
+            self.replay_errors[round_index] = str(e)
+
+    def rebuild_walls(self, rows, wall_x, wall_y, wall_t):
+        """Boolean wall grid of the round (from the map header if there is one) plus the tick each wall was seen first."""
+        import numpy as np
+        x = np.asarray(wall_x, dtype=np.int64)
+        y = np.asarray(wall_y, dtype=np.int64)
+        t = np.searchsorted([d["tick"] for d in self.ticks], np.asarray(wall_t, dtype=np.int64))
+        if rows:
+            self.height, self.width = len(rows), len(rows[0])
+        if self.width is None:
+            self.width = int(x.max()) + 1 if x.size else 1
+        if self.height is None:
+            self.height = int(y.max()) + 1 if y.size else 1
+        inside = (x >= 0) & (y >= 0) & (x < self.width) & (y < self.height)
+        x, y, t = x[inside], y[inside], t[inside]
+        never = len(self.ticks)
+        self.wall_ticks = np.full((self.height, self.width), never, dtype=np.int32)
+        np.minimum.at(self.wall_ticks, (y, x), t)
+        if rows:
+            self.walls = np.frombuffer("".join(rows).encode(), dtype=np.uint8).reshape(self.height, self.width) == ord("#")
+        else:
+            self.walls = self.wall_ticks < never
+
+    def debug_extra(self, index):
+        """Rendered debug_json keys of tick index, decoded now if that has not happened yet."""
+        return self.decode_tick(self.ticks[index], self.generation)
+
+    def decode_tick(self, tick_data, generation):
+        if "debug_extra" in tick_data:
+            return tick_data["debug_extra"]
+        with self.decode_lock:
+            if "debug_extra" not in tick_data:
+                extra = error = None
+                if tick_data["debug_raw"]:
+                    try:
+                        extra = decode_debug_json(tick_data["debug_raw"])
+                    # TypeError: a payload that is not a string at all, e.g. a number or a list
+                    except (TypeError, ValueError) as e:
+                        error = f"tick {tick_data['tick']}: {e}"
+                tick_data["debug_extra"] = extra
+                # a worker still decoding a previous round must not touch the counters of this one
+                if tick_data["debug_raw"] and generation == self.generation:
+                    self.debug_pending -= 1
+                    if error:
+                        self.decode_errors += 1
+                        self.decode_error = self.decode_error or error
+        return tick_data["debug_extra"]
+
+    @instrumented("decode_debug")
+    def decode_debug(self, generation=None, events=True):
+        """Decode every pending tick of the round, then add the debug events unless events is False.
+
+        Safe to run in a worker thread with events=False; returns False once the round changed
+        since generation, the caller then drops the result.
+        """
+        generation = self.generation if generation is None else generation
+        ticks = self.ticks
+        for tick_data in ticks:
+            if generation != self.generation:
+                return False
+            self.decode_tick(tick_data, generation)
+        if generation != self.generation:
+            return False
+        if events:
+            self.rebuild_events()
+        return True
+
+    def rebuild_events(self):
+        events = []
+        captures = 0
+        prev_gems = set()
+        prev_pos = None
+        prev_decision = None
+        for i, tick_data in enumerate(self.ticks):
+            tick = tick_data.get("tick", i)
+            gems = set(tick_data.get("gems") or [])
+            bot_pos = tick_data.get("bot_pos")
+            
+            for gem in sorted(gems - prev_gems):
+                events.append((i, tick, "gem", f"Gem appeared at {gem}"))
+            for gem in sorted(prev_gems - gems):
+                if gem == bot_pos or gem == prev_pos:
+                    captures += 1
+                    events.append((i, tick, "capture", f"Capture #{captures} at {gem}"))
+                else:
+                    events.append((i, tick, "gem", f"Gem disappeared at {gem}"))
+            
+            # ticks not decoded yet contribute their debug events once decode_debug() ran
+            debug_extra = tick_data.get("debug_extra") or {}
+            state_delta = debug_extra.get("state_delta") or {}
+            if any(state_delta.get(k) for k in ("added", "removed", "changed")):
+                events.append((i, tick, "delta", "State delta"))
+            
+            decision = debug_extra.get("decision")
+            if decision is not None:
+                if prev_decision is not None and decision != prev_decision:
+                    events.append((i, tick, "decision", f"Decision: {prev_decision} → {decision}"))
+                prev_decision = decision
+            
+            prev_gems = gems
+            if bot_pos:
+                prev_pos = bot_pos
+        
+        round_data = self.rounds[self.round_index] if self.rounds else {}
+        if round_data.get("disqualified_for") is not None and self.ticks:
+            last = len(self.ticks) - 1
+            events.append((
+                last, self.ticks[last].get("tick", last), "disqualified",
+                f"Disqualified for {round_data['disqualified_for']}"
+            ))
+        
+        self.events = events
+        self.event_ticks = sorted({e[0] for e in events})
+
+    def next_event(self, index=None):
+        index = self.tick_index if index is None else index
+        pos = bisect_right(self.event_ticks, index)
+        return self.event_ticks[pos] if pos < len(self.event_ticks) else None
+
+    def prev_event(self, index=None):
+        index = self.tick_index if index is None else index
+        pos = bisect_left(self.event_ticks, index)
+        return self.event_ticks[pos - 1] if pos > 0 else None
+    def set_round(self, index):
+        if index < 0 or index >= len(self.rounds):
+            return
+        self.round_index = index
+        self.rebuild_round()
+
+    @instrumented("set_tick")
+    def set_tick(self, index):
+        if not self.ticks:
+            self.tick_index = 0
+            return
+        self.tick_index = max(0, min(index, len(self.ticks) - 1))
+        self.rebuild_trail()
+
+    def current_tick_data(self):
+        if not self.ticks:
+            return None
+        self.debug_extra(self.tick_index)
+        return self.ticks[self.tick_index]
+
+    @instrumented("rebuild_trail")
+    def rebuild_trail(self):
+        self.trail = []
+        for i in range(0, self.tick_index + 1):
+            bot_pos = self.ticks[i].get("bot_pos")
+            if bot_pos:
+                self.trail.append(bot_pos)
+
+
+# stand-in bot for replays: answers every tick with the next line the real bot sent
+REPLAY_BOT = """import json, sys
+lines = json.load(open("replay_lines.json", encoding="utf-8"))
+for line in lines:
+    if not sys.stdin.readline():
+        break
+    print(line, flush=True)
+"""
+# runner options that do not change the simulation, or that the replay sets itself; name -> takes a value
+REPLAY_SKIP_ARGS = {
+    "--seed": True, "--rounds": True, "--round-seeds": True, "--write-profile-json": True,
+    "--verbose": True, "--max-tps": True, "--threads": True, "--coordinator": True, "--shard-size": True,
+    "--shard-worker": True, "--docker-pool": True, "--docker-slot": True, "--adaptive-ci": True,
+    "--adaptive-sprt": True, "--adaptive-min-rounds": True, "--resource-sample-every": True,
+    "--stderr-cap": True, "--stderr-spill": True,
+    "--multi-core": False, "--use-docker": False, "--no-use-docker": False, "--warm-bots": False,
+    "--no-warm-bots": False, "--replay-debug": False, "--no-replay-debug": False, "--enable-debug": False,
+    "--no-enable-debug": False, "--start-paused": False, "--no-start-paused": False, "--announcer": False,
+    "--no-announcer": False, "--show-timings": False, "--no-show-timings": False, "--profile": False,
+    "--check-determinism": False, "--no-check-determinism": False,
+}
+
+
+def replay_args(args):
+    out = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in REPLAY_SKIP_ARGS:
+            skip = REPLAY_SKIP_ARGS[arg]
+        else:
+            out.append(arg)
+    return out
+
+
+class Launcher:
+    """Prepares bot folders, patches the runner and builds runner command lines."""
+
+    def __init__(self, base):
+        self.base = base
+        self.profile = os.path.join(base, "last_profile.json")
+        self.results_db = os.path.join(base, "results.sqlite")
+
+    def sanitize(self, x):
+        result = str(x).replace("–", "-").replace("—", "-")
+        if sys.platform.startswith("win"):
+            result = result.replace("\\", "/")
+        return result
+    def normalize_file(self,path):
+        try:
+            data=open(path,"rb").read()
+            if b"\r" in data:
+                data=data.replace(b"\r\n",b"\n").replace(b"\r",b"\n")
+                open(path,"wb").write(data)
+        except: pass
+    def normalize_tree(self,root,exts):
+        for d,_,files in os.walk(root):
+            for f in files:
+                if any(f.endswith(e) for e in exts):
+                    self.normalize_file(os.path.join(d,f))
+    def ensure_python_flush(self,bot_py):
+        if not os.path.exists(bot_py): return
+        try:
+            txt=open(bot_py,"r",encoding="utf-8").read()
+        except: return
+        if "sys.stdout.reconfigure" in txt: return
+        lines=txt.splitlines()
+        out=[];has_sys=False
+        i=0
+        while i<len(lines) and (lines[i].startswith("#!") or (lines[i].startswith("#") and "coding" in lines[i])):
+            out.append(lines[i]);i+=1
+        while i<len(lines) and lines[i].startswith("import"):
+            line=lines[i]
+            if "import sys" in line: has_sys=True
+            out.append(line);i+=1
+        if not has_sys:
+            out.append("import sys")
+        out.append("sys.stdout.reconfigure(line_buffering=True)")
+        while i<len(lines):
+            out.append(lines[i]);i+=1
+        open(bot_py,"w",encoding="utf-8",newline="\n").write("\n".join(out)+"\n")
+    def ensure_start_sh(self, bot_dir):
+        start = os.path.join(bot_dir, "start.sh")
+        if not os.path.exists(start):
+            cmd = None
+            if os.path.exists(os.path.join(bot_dir, "bot.py")):
+                cmd = "python3 bot.py"
+            elif os.path.exists(os.path.join(bot_dir, "bot.rb")):
+                cmd = "ruby bot.rb"
+            elif os.path.exists(os.path.join(bot_dir, "bot.js")):
+                cmd = "node bot.js"
+            if cmd:
+                open(start, "w", encoding="utf-8", newline="\n").write(
+                    "#!/usr/bin/env bash\n" + cmd + "\n"
+                )
+                if not sys.platform.startswith("win"):
+                    os.chmod(start, os.stat(start).st_mode | stat.S_IEXEC)
+        self.normalize_file(start)
+    def prepare_bot_folder(self, bot_dir):
+        bot_dir = self.sanitize(bot_dir)
+        self.normalize_tree(bot_dir, (".py", ".sh"))
+        bot_py = os.path.join(bot_dir, "bot.py")
+        self.ensure_python_flush(bot_py)
+        self.ensure_start_sh(bot_dir)
+    def build_args(self, s):
+        a=[]
+        def add(f,v):
+            if v not in("","None",None):
+                a.append("--"+self.sanitize(f));a.append(self.sanitize(v))
+        add("seed",s["seed"])
+        add("width",s["width"])
+        add("height",s["height"])
+        add("generator",s["generator"])
+        add("ticks",s["ticks"])
+        add("vis-radius",s["vis_radius"])
+        add("gem-spawn",s["gem_spawn"])
+        add("gem-ttl",s["gem_ttl"])
+        add("max-gems",s["max_gems"])
+        if s["emit_signals"]: a.append("--emit-signals")
+        if s["swap_bots"]: a.append("--swap-bots")
+        if s["cache"]: a.append("--cache")
+        if s["profile"]: a.append("--profile")
+        if s["check_determinism"]: a.append("--check-determinism")
+        # the pool starts its own containers, so the runner's per-round docker start stays off
+        if s["docker_pool"]: add("docker-pool",s["docker_pool"])
+        elif s["use_docker"]: a.append("--use-docker")
+        if s["warm_bots"]: a.append("--warm-bots")
+        if not s["map_cache"]: a.append("--no-map-cache")
+        if s["stderr_cap_kb"]>0: add("stderr-cap",s["stderr_cap_kb"]*1024)
+        if s["stderr_spill"]: add("stderr-spill",STDERR_SPILL_DIR)
+        add("rounds",s["rounds"])
+        add("round-seeds",s["round_seeds"])
+        add("verbose",s["verbose"])
+        add("max-tps",s["max_tps"])
+        if s["announcer"]: a.append("--announcer")
+        if s["show_timings"]: a.append("--show-timings")
+        if s["start_paused"]: a.append("--start-paused")
+        add("highlight-color",s["highlight_color"])
+        if s["enable_debug"]: a.append("--enable-debug")
+        if s["replay_debug"]: a.append("--replay-debug")
+        if s["resource_sample_every"]>0: add("resource-sample-every",s["resource_sample_every"])
+        if s["multi_core"]:
+            a.append("--multi-core")
+            add("threads",s["threads"] or "auto")
+            if s["adaptive_ci"]>0: add("adaptive-ci",s["adaptive_ci"])
+            if s["adaptive_sprt"]>0: add("adaptive-sprt",s["adaptive_sprt"])
+            if s["coordinator"]:
+                add("coordinator",s["coordinator"])
+                add("shard-size",s["shard_size"])
+        return a
+    def convert_bot_paths(self, paths):
+        out = []
+        for path in paths:
+            path = self.sanitize(path)
+            self.prepare_bot_folder(path)
+            
+            if sys.platform.startswith("win"):
+                wsl_path = subprocess.run(
+                    ["wsl", "wslpath", path],
+                    capture_output=True, text=True
+                ).stdout.strip()
+                if wsl_path:
+                    out.append(wsl_path)
+            else:
+                out.append(path)
+        
+        return out
+    def prepare_project(self):
+        self.normalize_tree(self.base,(".rb",".sh"))
+    def runner_file(self):
+        if os.path.exists(os.path.join(self.base, "runner_patched.rb")):
+            return "runner_patched.rb"
+        return "runner.rb"
+    def shell_command(self, args, bots, runner_file):
+        arg = " ".join(shlex.quote(str(x)) for x in args)
+        bts = " ".join(shlex.quote(str(x)) for x in bots)
+        if sys.platform.startswith("win"):
+            runner_win = self.sanitize(os.path.join(self.base, "runner.rb"))
+            runner_wsl = subprocess.run(
+                ["wsl", "wslpath", runner_win],
+                capture_output=True, text=True
+            ).stdout.strip()
+            run_dir = os.path.dirname(runner_wsl)
+        else:
+            run_dir = self.base
+        return f'cd "{run_dir}" && ruby {runner_file} {arg} {bts}'
+    def prepare_run(self, settings, bot_dirs, log=print):
+        self.prepare_project()
+        self.require_patched(log)
+        args = self.build_args(settings)
+        bots = self.convert_bot_paths(bot_dirs)
+        
+        if os.path.exists(self.profile):
+            try:
+                os.remove(self.profile)
+            except:
+                pass
+        
+        args += ["--write-profile-json", "last_profile.json"]
+        runner_file = self.runner_file()
+        if runner_file == "runner_patched.rb":
+            log("🔧 Using PATCHED runner (debug protocol enabled)")
+        else:
+            log("⚠️ Using ORIGINAL runner (no debug protocol - click 'Patch Runner' first!)")
+        return self.shell_command(args, bots, runner_file)
+
+    def ingest(self, bot_dirs, log=print, profile=None):
+        try:
+            store = ResultsStore(self.results_db)
+            try:
+                run_id = store.ingest(profile or self.profile, [self.sanitize(d) for d in bot_dirs])
+            finally:
+                store.close()
+        except Exception as e:
+            log(f"⚠️ Results store: {e}")
+            return None
+        if run_id:
+            log(f"🗄 Run {run_id} stored in {os.path.basename(self.results_db)}")
+        return run_id
+
+    def archive_profile(self, log=print, profile=None):
+        """Store a compressed copy of the profile under profiles/ so it survives the next run."""
+        profile = profile or self.profile
+        try:
+            reports = read_reports(profile)
+            first = reports[0] if reports else {}
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(first.get("timestamp") or os.path.getmtime(profile)))
+            stage = re.sub(r"[^\w.-]", "_", str(first.get("stage_key") or "custom"))
+            folder = os.path.join(self.base, "profiles")
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"{stamp}-{stage}.hgprof")
+            write_archive(reports, path)
+        except Exception as e:
+            log(f"⚠️ Archiving profile failed: {e}")
+            return None
+        log(f"🗜 Profile archived to profiles/{os.path.basename(path)} ({os.path.getsize(path) // 1024} KB)")
+        return path
+
+    def round_seeds(self, settings, log=print):
+        """Ask the patched runner which round seeds a run with these settings will play."""
+        self.prepare_project()
+        self.require_patched(log)
+        args = self.build_args(dict(settings, multi_core=False)) + ["--print-round-seeds"]
+        cmd = self.shell_command(args, [], self.runner_file())
+        if sys.platform.startswith("win"):
+            proc = subprocess.run(["wsl.exe", "bash", "-lc", cmd], capture_output=True, text=True)
+        else:
+            proc = subprocess.run(["bash", "-c", cmd], capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"runner failed (status {proc.returncode}): {proc.stderr.strip()[-500:]}")
+        return [x for x in proc.stdout.strip().splitlines()[-1].split(",") if x]
+
+    def rerun_settings(self, settings, seeds):
+        """Settings that replay only the given round seeds, single-core with the debug protocol on."""
+        return dict(settings, rounds=len(seeds), round_seeds=",".join(seeds), enable_debug=True,
+                    multi_core=False, adaptive_ci=0.0, adaptive_sprt=0.0)
+
+    def replay_round(self, reports, round_index, log=print):
+        """Re-simulate one round of a --replay-debug profile from its seed and the recorded bot output.
+
+        Returns that round of every report, with debug protocol and map restored.
+        """
+        rounds = [r["rounds"][round_index] for r in reports]
+        if not all(rd.get("replay") for rd in rounds):
+            raise ValueError(f"round {round_index + 1} was not recorded with --replay-debug")
+        self.require_patched(log)
+        import tempfile
+        with tempfile.TemporaryDirectory(prefix="hg_replay_") as tmp:
+            bot_dirs = []
+            for k, (report, rd) in enumerate(zip(reports, rounds)):
+                # the folder name becomes the bot name in the replayed report
+                bot_dir = os.path.join(tmp, str(k), report.get("name") or f"bot{k}")
+                os.makedirs(bot_dir)
+                with open(os.path.join(bot_dir, "bot.py"), "w", encoding="utf-8") as f:
+                    f.write(REPLAY_BOT)
+                with open(os.path.join(bot_dir, "replay_lines.json"), "w", encoding="utf-8") as f:
+                    json.dump(rd["replay"]["lines"], f)
+                bot_dirs.append(bot_dir)
+            # one file per call: grid cells replay concurrently from threads of one process
+            fd, path = tempfile.mkstemp(prefix=".hg_replay_", suffix=".json", dir=self.base)
+            os.close(fd)
+            os.remove(path)
+            out = os.path.basename(path)
+            args = replay_args(rounds[0]["replay"].get("args") or [])
+            args += ["--seed", rounds[0]["seed"], "--enable-debug", "--verbose", "0", "--max-tps", "0",
+                     "--write-profile-json", out]
+            cmd = self.shell_command(args, self.convert_bot_paths(bot_dirs), self.runner_file())
+            if sys.platform.startswith("win"):
+                proc = subprocess.run(["wsl.exe", "bash", "-lc", cmd], capture_output=True, text=True)
+            else:
+                proc = subprocess.run(["bash", "-c", cmd], capture_output=True, text=True)
+            try:
+                if not os.path.exists(path):
+                    raise RuntimeError(f"replay failed (status {proc.returncode}): {proc.stderr.strip()[-500:]}")
+                with open(path, "r", encoding="utf-8") as f:
+                    replayed = json.load(f)
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+        return [r["rounds"][0] for r in replayed]
+
+    def expand_replays(self, reports, log=print):
+        """Replace the replay records of every round with the re-simulated debug protocol."""
+        for i in range(len(reports[0]["rounds"]) if reports else 0):
+            if not reports[0]["rounds"][i].get("replay"):
+                continue
+            for report, rd in zip(reports, self.replay_round(reports, i, log)):
+                report["rounds"][i] = dict(report["rounds"][i], debug_protocol=rd.get("debug_protocol"), map=rd.get("map"))
+                del report["rounds"][i]["replay"]
+        return reports
+
+    def patch_status(self):
+        """Return (state, message); state is "current", "incomplete", "stale", "missing" or "no-runner"."""
+        runner = os.path.join(self.base, "runner.rb")
+        out = os.path.join(self.base, "runner_patched.rb")
+        if not os.path.exists(runner):
+            return "no-runner", "runner.rb not found"
+        if not os.path.exists(out):
+            return "missing", "runner_patched.rb not generated yet"
+        with open(out, "r", encoding="utf-8") as f:
+            header = PATCH_HEADER_RE.search(f.read())
+        if not header:
+            return "stale", "runner_patched.rb has no patch header"
+        if header.group(1) != file_sha256(runner):
+            return "stale", "runner.rb changed since runner_patched.rb was generated"
+        if int(header.group(2)) != PATCHSET_VERSION:
+            return "stale", f"patch set {header.group(2)} is outdated (current {PATCHSET_VERSION})"
+        if header.group(3):
+            return "incomplete", f"runner_patched.rb lacks required patches: {header.group(3).replace(',', ', ')}"
+        return "current", "runner_patched.rb is up to date"
+
+    def ensure_patched(self, log=print):
+        state, message = self.patch_status()
+        if state == "stale":
+            log(f"🔄 {message}, regenerating")
+            return self.patch_runner(log, force=True)
+        if state == "incomplete":
+            log(f"⚠️ {message}")
+        return state == "current"
+
+    def require_patched(self, log=print):
+        """ensure_patched, but refuse to run a runner_patched.rb that lacks required patches."""
+        if not self.ensure_patched(log) and os.path.exists(os.path.join(self.base, "runner_patched.rb")):
+            raise RuntimeError("runner_patched.rb lacks required patches (see the patch log above); "
+                               "adapt the patches to runner.rb or delete runner_patched.rb to run the original runner")
+
+    def patch_runner(self, log=print, force=False):
+        state, message = self.patch_status()
+        if state == "current" and not force:
+            log(f"✔ {message}")
+            return True
+        results = []
+        def sub(name, pattern, repl, code, count=0, flags=0, required=True):
+            code, n = re.subn(pattern, repl, code, count=count, flags=flags)
+            results.append((name, n, required))
+            return code
+        def insert_helpers(name, helpers, code):
+            results.append((name, int('class Runner' in code), True))
+            return code.replace('class Runner', helpers + '\nclass Runner', 1)
+        try:
+            runner = os.path.join(self.base, "runner.rb")
+            out = os.path.join(self.base, "runner_patched.rb")
+            code = open(runner, "r", encoding="utf-8").read()
+            source_hash = file_sha256(runner)
+
+            if "require 'rbconfig'" not in code:
+                code = sub(
+                    "requires",
+                    r"(require 'zlib')",
+                    r"\1\nrequire 'rbconfig'\nrequire 'tmpdir'",
+                    code
+                )
+            
+            code = sub("threads_constant", r'\nTHREADS = \d+', '', code, required=False)
+            
+            if 'def kill_bot_process' not in code:
+                kill_method = '''
+    def kill_bot_process(bot_io)
+        return if $hg_warm_bots && WarmBotPool.release(bot_io)
+        return if $hg_docker_pool && ContainerPool.release(bot_io)
+        pid = bot_io.wait_thr.pid
+        if Gem.win_platform?
+            system("taskkill /PID #{pid} /T /F >NUL 2>&1")
+        else
+            begin
+                if @use_docker
+                    Process.kill('TERM', pid)
+                else
+                    Process.kill('TERM', -pid)
+                end
+            rescue Errno::ESRCH
+            end
+        end
+    end
+'''
+                code = sub(
+                    "kill_bot_process",
+                    r'(Bot\.new\(stdin, stdout, stderr, wait_thr\)\s+end)',
+                    r'\1\n' + kill_method,
+                    code
+                )
+            
+            if 'spawn_opts = {' not in code:
+                code = sub(
+                    "process_group_spawn",
+                    r'stdin, stdout, stderr, wait_thr = Open3\.popen3\(\[path, File\.basename\(path\)\], chdir: File\.dirname\(path\)\)',
+                    '''spawn_opts = { chdir: File.dirname(path) }
+                if Gem.win_platform?
+                    spawn_opts[:new_pgroup] = true
+                else
+                    spawn_opts[:pgroup] = true
+                end
+                stdin, stdout, stderr, wait_thr = Open3.popen3([path, File.basename(path)], spawn_opts)''',
+                    code
+                )
+            
+            if 'class WarmBotPool' not in code:
+                warm_pool = r'''
+
+# Keeps bot processes alive across rounds for --warm-bots. After a round the bot gets
+# a {"reset":true} line and must answer RESET within RESET_TIMEOUT seconds, otherwise
+# it is killed and the next round starts it cold. stderr goes through a per-round pipe
+# so readers from a finished round see EOF while the process lives on.
+class WarmBotPool
+  RESET_LINE = '{"reset":true}'
+  RESET_ACK = 'RESET'
+  RESET_TIMEOUT = 2.0
+
+  Entry = Struct.new(:path, :stdin, :stdout, :stderr, :wait_thr, :sink)
+
+  @idle = Hash.new { |h, k| h[k] = [] }
+  @entries = {}
+  @mutex = Mutex.new
+
+  def self.checkout(path)
+    loop do
+      entry = @mutex.synchronize { @idle[path].pop }
+      return nil unless entry
+      if entry.wait_thr.alive?
+        reader, entry.sink = IO.pipe
+        return [entry.stdin, entry.stdout, reader, entry.wait_thr]
+      end
+      @mutex.synchronize { @entries.delete(entry.wait_thr.pid) }
+    end
+  end
+
+  def self.adopt(path, stdin, stdout, stderr, wait_thr)
+    reader, writer = IO.pipe
+    entry = Entry.new(path, stdin, stdout, stderr, wait_thr, writer)
+    @mutex.synchronize { @entries[wait_thr.pid] = entry }
+    Thread.new do
+      begin
+        loop do
+          chunk = stderr.readpartial(4096)
+          sink = entry.sink
+          begin
+            sink.write(chunk) if sink
+          rescue IOError, SystemCallError
+          end
+        end
+      rescue IOError, SystemCallError
+      end
+      entry.sink.close if entry.sink && !entry.sink.closed?
+    end
+    [stdin, stdout, reader, wait_thr]
+  end
+
+  def self.release(bot_io)
+    entry = @mutex.synchronize { @entries[bot_io.wait_thr.pid] }
+    return false unless entry
+    ok = entry.wait_thr.alive? && begin
+      entry.stdin.puts(RESET_LINE)
+      entry.stdin.flush
+      deadline = Process.clock_gettime(Process::CLOCK_MONOTONIC) + RESET_TIMEOUT
+      acked = false
+      loop do
+        remaining = deadline - Process.clock_gettime(Process::CLOCK_MONOTONIC)
+        break if remaining <= 0 || !IO.select([entry.stdout], nil, nil, remaining)
+        line = entry.stdout.gets
+        break if line.nil?
+        # stale replies from a bot that timed out are skipped
+        if line.strip == RESET_ACK
+          acked = true
+          break
+        end
+      end
+      acked
+    rescue IOError, SystemCallError
+      false
+    end
+    sink = entry.sink
+    entry.sink = nil
+    sink.close if sink && !sink.closed?
+    @mutex.synchronize do
+      if ok
+        @idle[entry.path] << entry
+      else
+        @entries.delete(entry.wait_thr.pid)
+      end
+    end
+    ok
+  end
+
+  def self.shutdown
+    @mutex.synchronize { @entries.values }.each do |entry|
+      begin
+        Process.kill('KILL', -entry.wait_thr.pid)
+      rescue Errno::ESRCH, Errno::EPERM
+      end
+    end
+  end
+end
+
+at_exit { WarmBotPool.shutdown if $hg_warm_bots }
+'''
+                code = insert_helpers("warm_bot_pool", warm_pool, code)
+            if 'class ContainerPool' not in code:
+                container_pool = r'''
+
+# Long-lived bot containers for --docker-pool IMAGE: each container mounts one bot folder
+# and idles on `sleep infinity`; a round runs the bot with `docker exec -i`, and at round
+# end every process in the container except PID 1 is killed before it goes back to the pool.
+# Containers handed in by a multi-core parent (--docker-slot) are reused but not removed.
+class ContainerPool
+  @idle = Hash.new { |h, k| h[k] = [] }
+  @in_use = {}
+  @owned = []
+  @mutex = Mutex.new
+
+  class << self
+    attr_accessor :image
+  end
+
+  def self.bot_dir(path)
+    path = File.expand_path(path)
+    File.directory?(path) ? path : File.dirname(path)
+  end
+
+  def self.start(dir)
+    started_at = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+    out, err, status = Open3.capture3('docker', 'run', '-d', '--rm', '--network', 'none',
+                                      '-v', "#{dir}:/bot", '-w', '/bot', @image, 'sleep', 'infinity')
+    raise "docker run failed for #{dir}: #{err.strip}" unless status.success?
+    cid = out.strip
+    @mutex.synchronize { @owned << cid }
+    [cid, ((Process.clock_gettime(Process::CLOCK_MONOTONIC) - started_at) * 1000).round(1)]
+  end
+
+  def self.preload(dirs, cids)
+    @mutex.synchronize do
+      dirs.zip(cids).each { |dir, cid| @idle[dir] << cid if cid }
+    end
+  end
+
+  def self.spawn(path)
+    dir = bot_dir(path)
+    cid = @mutex.synchronize { @idle[dir].pop }
+    if cid
+      info = { hit: true }
+    else
+      cid, start_ms = start(dir)
+      info = { hit: false, start_ms: start_ms }
+    end
+    stdin, stdout, stderr, wait_thr = Open3.popen3('docker', 'exec', '-i', cid, "./#{File.basename(path)}", pgroup: true)
+    @mutex.synchronize { @in_use[wait_thr.pid] = [dir, cid] }
+    [stdin, stdout, stderr, wait_thr, info]
+  end
+
+  def self.release(bot_io)
+    pid = bot_io.wait_thr.pid
+    dir, cid = @mutex.synchronize { @in_use.delete(pid) }
+    return false unless cid
+    begin
+      Process.kill('TERM', -pid)
+    rescue Errno::ESRCH
+    end
+    reset = system('docker', 'exec', cid, 'sh', '-c', 'kill -9 -1 2>/dev/null; true',
+                   out: File::NULL, err: File::NULL)
+    if reset
+      @mutex.synchronize { @idle[dir] << cid }
+    else
+      system('docker', 'rm', '-f', cid, out: File::NULL, err: File::NULL)
+    end
+    true
+  end
+
+  def self.shutdown
+    owned = @mutex.synchronize { @owned.dup }
+    system('docker', 'rm', '-f', *owned, out: File::NULL, err: File::NULL) unless owned.empty?
+  end
+end
+
+at_exit { ContainerPool.shutdown if $hg_docker_pool }
+'''
+                code = insert_helpers("container_pool", container_pool, code)
+            if 'WarmBotPool.checkout' not in code:
+                code = sub(
+                    "warm_bot_spawn",
+                    r'stdin, stdout, stderr, wait_thr = Open3\.popen3\(\[path, File\.basename\(path\)\], spawn_opts\)',
+                    '''hg_spawned_at = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+                warm = $hg_warm_bots && !@use_docker && WarmBotPool.checkout(path)
+                container = nil
+                if warm
+                    stdin, stdout, stderr, wait_thr = warm
+                else
+                    if $hg_docker_pool
+                        stdin, stdout, stderr, wait_thr, container = ContainerPool.spawn(path)
+                    else
+                        stdin, stdout, stderr, wait_thr = Open3.popen3([path, File.basename(path)], spawn_opts)
+                    end
+                    if $hg_warm_bots && !@use_docker
+                        stdin, stdout, stderr, wait_thr = WarmBotPool.adopt(path, stdin, stdout, stderr, wait_thr)
+                    end
+                end
+                (@bot_spawned_at ||= {})[wait_thr.pid] = [hg_spawned_at, !!warm, container]''',
+                    code
+                )
+            
+            code = sub(
+                "kill_on_round_end",
+                r'@bots_io\.each do \|b\|\s+b\.wait_thr\.join\([^)]+\)[^\n]+\n\s+end',
+                '@bots_io.each { |b| kill_bot_process(b) }',
+                code
+            )
+
+            code = sub(
+                "enable_debug_option",
+                r"(%w\(stage_key width height generator max_ticks emit_signals vis_radius max_gems\s+gem_spawn_rate gem_ttl signal_radius signal_cutoff signal_noise\s+signal_quantization signal_fade)\)",
+                r"\1 enable_debug)",
+                code
+            )
+
+            code = sub(
+                "command_split_nil_safe",
+                r"command = line\.split\(' '\)\.first\.strip",
+                "command = (line.split(' ').first || '').strip",
+                code
+            )
+
+            # the runner arguments without the bot paths, kept with replayable rounds
+            if '$hg_run_args' not in code:
+                code = sub("replay_argv", r'(\nOptionParser\.new do)', r'\n$hg_argv = ARGV.dup\1', code)
+                code = sub("replay_run_args", r'(\nend\.parse!\n)', r'\1$hg_run_args = $hg_argv[0, $hg_argv.size - ARGV.size]\n$hg_enable_debug = options[:enable_debug]\n', code)
+                # same derivation as the runner and the multi-core block, so the GUI knows the seeds before a run
+                print_seeds = '''if $hg_print_round_seeds
+  seeds = if options[:round_seeds]
+    options[:round_seeds].first(options[:rounds])
+  elsif options[:rounds] == 1
+    [options[:seed].to_s(36)]
+  else
+    seed_rng = PCG32.new(Digest::SHA256.digest("#{options[:seed]}/rounds").unpack1('L<'))
+    Array.new(options[:rounds]) { seed_rng.randrange(2 ** 32).to_s(36) }
+  end
+  puts seeds.join(',')
+  exit 0
+end
+'''
+                code = sub("print_round_seeds", r'(\n\$hg_enable_debug = [^\n]*\n)', lambda m: m.group(1) + print_seeds, code)
+
+            # the method that sets up @visibility (maze, floor tiles, visibility table) gets its
+            # results cached on disk; skipped if that work is part of run/initialize themselves
+            visibility = re.search(r'@visibility\s*=', code)
+            setup = visibility and re.findall(r'\n\s*def ([\w?!]+)', code[:visibility.start()])
+            if setup and setup[-1] not in ("run", "initialize") and 'module MapCache' not in code:
+                map_cache = '''
+require 'fileutils'
+
+$hg_map_cache = true
+
+# content-addressed on-disk cache for the map setup method: every instance variable it sets or
+# changes is stored with Marshal under .hg_map_cache/, keyed by runner source, generator, size,
+# seed and vis radius, so rounds and worker processes on the same map load it instead
+module MapCache
+  DIR = File.join(File.dirname(File.expand_path(__FILE__)), '.hg_map_cache')
+  @memo = {}
+
+  def self.key(runner)
+    @source_hash ||= Digest::SHA256.file(File.expand_path(__FILE__)).hexdigest
+    parts = %w(generator width height seed vis_radius).map { |k| runner.instance_variable_get("@#{k}") }
+    Digest::SHA256.hexdigest(([@source_hash] + parts).inspect)
+  end
+
+  def self.dump(value)
+    Marshal.dump(value)
+  rescue TypeError
+    nil
+  end
+
+  def self.load(key)
+    @memo[key] ||= (File.binread(File.join(DIR, "#{key}.bin")) rescue nil)
+    @memo[key] && Marshal.load(@memo[key])
+  end
+
+  def self.store(key, data)
+    bytes = dump(data)
+    return unless bytes
+    @memo[key] = bytes
+    FileUtils.mkdir_p(DIR)
+    tmp = File.join(DIR, "#{key}.#{Process.pid}.tmp")
+    File.binwrite(tmp, bytes)
+    File.rename(tmp, File.join(DIR, "#{key}.bin"))
+  rescue SystemCallError
+    nil
+  end
+
+  def self.wrap(klass, name)
+    klass.prepend(Module.new do
+      define_method(name) do |*args, **kw, &blk|
+        return super(*args, **kw, &blk) unless $hg_map_cache
+        key = MapCache.key(self)
+        if (cached = MapCache.load(key))
+          cached[:ivars].each { |k, v| instance_variable_set(k, v) }
+          next cached[:result]
+        end
+        before = instance_variables.to_h { |k| v = instance_variable_get(k); [k, [v, MapCache.dump(v)]] }
+        result = super(*args, **kw, &blk)
+        changed = instance_variables.to_h { |k| [k, instance_variable_get(k)] }
+        # unmarshallable values (IO, procs) count as unchanged while they stay the same object;
+        # a new one among the changes makes the call uncacheable, as store cannot dump it
+        changed.reject! do |k, v|
+          old, dumped = before[k]
+          before.key?(k) && (dumped ? dumped == MapCache.dump(v) : old.equal?(v))
+        end
+        MapCache.store(key, {ivars: changed, result: result})
+        result
+      end
+    end)
+  end
+end
+'''
+                code = insert_helpers("map_cache", map_cache, code)
+                code = sub("map_cache_wrap", r'(\n\$hg_argv = ARGV\.dup)', f'\nMapCache.wrap(Runner, :{setup[-1]})\\1', code)
+
+            if not re.search(r'@round_debug_protocol\s*=', code):
+                code = sub(
+                    "debug_protocol_init",
+                    r'(@protocol\s*=\s*@bots\.map\s+\{\s*\|b\|\s*\[\]\s*\})',
+                    r'\1\n@round_debug_protocol = @bots.map { |b| [] }\n@round_replay_lines = @bots.map { |b| [] }\n@known_walls = @bots.map { |b| Set.new }',
+                    code
+                )
+            # Set is only autoloaded from Ruby 3.2 on
+            if "require 'set'" not in code:
+                code = sub("require_set", r"(require 'zlib')", r"\1\nrequire 'set'", code, count=1)
+            if 'def compute_state_delta' not in code:
+                helper_funcs = '\n\ndef compute_state_delta(prev_state, current_state)\n  delta = {added: [], removed: [], changed: []}\n  delta\nend\n\ndef compute_influence_map(width, height, bot_pos, gems)\n  map = Array.new(height) { Array.new(width, 0.0) }\n  gems.each do |gem|\n    gx, gy = gem[:position]\n    (0...height).each do |y|\n      (0...width).each do |x|\n        dist = Math.sqrt((x - gx)**2 + (y - gy)**2)\n        map[y][x] += 1.0 / (1.0 + dist) if dist > 0\n      end\n    end\n  end\n  map\nend\n\ndef compute_gem_probability_map(width, height, floor_tiles, gems, bot_pos)\n  map = Array.new(height) { Array.new(width, 0.0) }\n  base_rate = 0.05\n  floor_tiles.each do |offset|\n    x = offset & 0xFFFF\n    y = offset >> 16\n    next unless y < height && x < width\n    prob = base_rate\n    bot_dist = Math.sqrt((x - bot_pos[0])**2 + (y - bot_pos[1])**2)\n    prob *= (1.0 + bot_dist * 0.15)\n    gems.each do |gem|\n      gx, gy = gem[:position]\n      gem_dist = Math.sqrt((x - gx)**2 + (y - gy)**2)\n      prob *= (0.2 + gem_dist * 0.1) if gem_dist < 8\n    end\n    map[y][x] = prob\n  end\n  max_val = map.flatten.max\n  if max_val > 0\n    map.each_with_index do |row, y|\n      row.each_with_index do |val, x|\n        map[y][x] = val / max_val if val > 0\n      end\n    end\n  end\n  map\nend\n'
+                code = insert_helpers("debug_helpers", helper_funcs, code)
+            if 'def map_rows' not in code:
+                map_func = '''
+# static map of a round, emitted once in the round header: one string per row, '#' wall, '.' floor
+def map_rows(width, height, floor_tiles)
+  (0...height).map { |y| (0...width).map { |x| floor_tiles.include?((y << 16) | x) ? '.' : '#' }.join }
+end
+'''
+                code = insert_helpers("map_helpers", map_func, code)
+
+            if not re.search(r'@round_debug_protocol\[i\]\s*<<\s*debug_entry', code):
+                enhanced_entry = '''
+                        bot_pos_for_debug = @bots[i][:position]
+                        @round_replay_lines[i] << line.chomp if $hg_replay_debug
+                        if $hg_enable_debug
+                        bots_for_debug = @protocol[i].last[:bots]
+                        data_for_debug = bots_for_debug[:data] || {}
+                        known_walls = @known_walls[i]
+                        new_walls = (data_for_debug[:wall] || []).reject { |w| known_walls.include?(w) }
+                        known_walls.merge(new_walls)
+                        bots_for_debug = bots_for_debug.merge(data: data_for_debug.reject { |k, _| k == :wall }.merge(wall_new: new_walls))
+                        state_delta = compute_state_delta(nil, nil)
+                        visible_tiles = @visibility[(bot_pos_for_debug[1] << 16) | bot_pos_for_debug[0]].to_a.map { |offset| [offset & 0xFFFF, offset >> 16] }
+                        influence_map = compute_influence_map(@width, @height, bot_pos_for_debug, @gems)
+                        gem_spawn_probability_map = compute_gem_probability_map(@width, @height, @floor_tiles, @gems, bot_pos_for_debug)
+                        all_gems = @gems.map { |g| {position: g[:position], ttl: g[:ttl]} }
+
+                        debug_entry = {
+                          tick: @tick,
+                          bots: bots_for_debug,
+                          state_delta: state_delta,
+                          fov: visible_tiles,
+                          influence: influence_map,
+                          gem_prediction: gem_spawn_probability_map,
+                          all_gems: all_gems
+                        }
+                        @round_debug_protocol[i] << debug_entry
+                        end
+'''
+                code = sub(
+                    "debug_entry",
+                    r"(elsif command == 'WAIT'\s+else\s+end)",
+                    r'\1' + enhanced_entry,
+                    code,
+                    flags=re.DOTALL
+                )
+            if not re.search(r'results\[i\]\[:debug_protocol\]\s*=\s*@round_debug_protocol', code):
+                code = sub(
+                    "debug_protocol_result",
+                    r'(results\[i\]\[:stderr_log\]\s*=\s*bot\[:stderr_log\])',
+                    r'\1\nresults[i][:debug_protocol] = @round_debug_protocol[i]\nresults[i][:map] = map_rows(@width, @height, @floor_tiles) unless @round_debug_protocol[i].empty?\nif $hg_replay_debug\nresults[i][:replay] = {args: $hg_run_args, lines: @round_replay_lines[i]}\nresults[i][:debug_protocol] = nil\nresults[i][:map] = nil\nend',
+                    code
+                )
+            if not re.search(r'round_entry\[:debug_protocol\]', code):
+                code = sub(
+                    "debug_protocol_round_entry",
+                    r'(round_entry\s*=\s*\{[^}]*:response_time_stats\s*=>\s*rts,)',
+                    r'\1\n:debug_protocol => results[i][:debug_protocol],\n:map => results[i][:map],\n:replay => results[i][:replay],',
+                    code
+                )
+
+            if 'def pack_ns_column' not in code:
+                ns_column_func = '\n\ndef pack_ns_column(values)\n  values = (values || []).map { |v| v.to_i.clamp(0, 2 ** 31 - 1) }\n  { dtype: "int32", data: [values.pack("l<*")].pack("m0") }\nend\n'
+                code = insert_helpers("ns_column_helpers", ns_column_func, code)
+            if not re.search(r'results\[i\]\[:response_times_ns\]\s*=', code):
+                code = sub(
+                    "response_times_result",
+                    r'(results\[i\]\[:stderr_log\]\s*=\s*bot\[:stderr_log\])',
+                    r'\1\nresults[i][:response_times_ns] = pack_ns_column(bot[:response_times])',
+                    code
+                )
+            if not re.search(r'round_entry\[:response_times_ns\]|:response_times_ns\s*=>\s*results', code):
+                code = sub(
+                    "response_times_round_entry",
+                    r'(round_entry\s*=\s*\{[^}]*:response_time_stats\s*=>\s*rts,)',
+                    r'\1\n:response_times_ns => results[i][:response_times_ns],',
+                    code
+                )
+
+            if 'def sample_process_group' not in code:
+                resource_funcs = """
+
+def sample_process_group(pgid)
+  return nil unless File.directory?('/proc/self')
+  cpu_ticks = 0
+  rss_pages = 0
+  Dir.glob('/proc/[0-9]*/stat').each do |stat_path|
+    fields = (File.read(stat_path).split(')').last || '').split(' ') rescue next
+    next unless fields[2].to_i == pgid
+    cpu_ticks += fields[11].to_i + fields[12].to_i
+    rss_pages += fields[21].to_i
+  end
+  {
+    cpu_ms: cpu_ticks * 1000 / Etc.sysconf(Etc::SC_CLK_TCK),
+    rss_kb: rss_pages * (Etc.sysconf(Etc::SC_PAGESIZE) / 1024)
+  }
+end
+"""
+                code = insert_helpers("resource_helpers", resource_funcs, code)
+                if "require 'etc'" not in code:
+                    code = sub("require_etc", r"(require 'zlib')", r"\1\nrequire 'etc'", code, count=1)
+            if not re.search(r'@round_resource_samples\s*=\s*nil', code):
+                code = sub(
+                    "resource_samples_init",
+                    r'(@protocol\s*=\s*@bots\.map\s+\{\s*\|b\|\s*\[\]\s*\})',
+                    r'\1\n@round_resource_samples = nil',
+                    code
+                )
+            if not re.search(r'@round_resource_samples\[i\]', code):
+                resource_entry = '''
+                        if $hg_resource_sample_every && !@use_docker && @tick % $hg_resource_sample_every == 0
+                          @round_resource_samples ||= @bots.map { |b| {tick: [], cpu_ms: [], rss_kb: []} }
+                          resource_sample = sample_process_group(@bots_io[i].wait_thr.pid)
+                          if resource_sample
+                            @round_resource_samples[i][:tick] << @tick
+                            @round_resource_samples[i][:cpu_ms] << resource_sample[:cpu_ms]
+                            @round_resource_samples[i][:rss_kb] << resource_sample[:rss_kb]
+                          end
+                        end
+'''
+                code = sub(
+                    "resource_sampling",
+                    r"(elsif command == 'WAIT'\s+else\s+end)",
+                    r'\1' + resource_entry,
+                    code,
+                    flags=re.DOTALL
+                )
+            if not re.search(r'results\[i\]\[:resource_samples\]\s*=', code):
+                code = sub(
+                    "resource_samples_result",
+                    r'(results\[i\]\[:stderr_log\]\s*=\s*bot\[:stderr_log\])',
+                    r'\1\nresults[i][:resource_samples] = @round_resource_samples && @round_resource_samples[i]',
+                    code
+                )
+            if not re.search(r':resource_samples\s*=>\s*results', code):
+                code = sub(
+                    "resource_samples_round_entry",
+                    r'(round_entry\s*=\s*\{[^}]*:response_time_stats\s*=>\s*rts,)',
+                    r'\1\n:resource_samples => results[i][:resource_samples],',
+                    code
+                )
+
+            if not re.search(r'@bot_startup\s*=\s*\[\]', code):
+                code = sub(
+                    "bot_startup_init",
+                    r'(@protocol\s*=\s*@bots\.map\s+\{\s*\|b\|\s*\[\]\s*\})',
+                    r'\1\n@bot_startup = []',
+                    code
+                )
+            if not re.search(r'@bot_startup\[i\]\s*=', code):
+                startup_entry = '''
+                        if @bot_startup[i].nil? && @bot_spawned_at
+                          spawned = @bot_spawned_at[@bots_io[i].wait_thr.pid]
+                          if spawned
+                            @bot_startup[i] = {
+                              warm: spawned[1],
+                              startup_ms: ((Process.clock_gettime(Process::CLOCK_MONOTONIC) - spawned[0]) * 1000).round(1)
+                            }
+                            @bot_startup[i][:container] = spawned[2] if spawned[2]
+                          end
+                        end
+'''
+                code = sub(
+                    "bot_startup_measure",
+                    r"(elsif command == 'WAIT'\s+else\s+end)",
+                    r'\1' + startup_entry,
+                    code,
+                    flags=re.DOTALL
+                )
+            if not re.search(r'results\[i\]\[:bot_startup\]\s*=', code):
+                code = sub(
+                    "bot_startup_result",
+                    r'(results\[i\]\[:stderr_log\]\s*=\s*bot\[:stderr_log\])',
+                    r'\1\nresults[i][:bot_startup] = @bot_startup && @bot_startup[i]',
+                    code
+                )
+            if not re.search(r':bot_startup\s*=>\s*results', code):
+                code = sub(
+                    "bot_startup_round_entry",
+                    r'(round_entry\s*=\s*\{[^}]*:response_time_stats\s*=>\s*rts,)',
+                    r'\1\n:bot_startup => results[i][:bot_startup],',
+                    code
+                )
+
+            if 'class StderrRing' not in code:
+                stderr_ring = '''
+require 'fileutils'
+
+# bounded stand-in for a bot's stderr_log string: keeps the first and the last cap/2 bytes,
+# counts the rest; with a spill dir the full log also goes to a gzip side file per round
+class StderrRing
+  SPILL_PAGE = 64 * 1024
+  @cap = 64 * 1024
+  @spill_dir = nil
+  class << self
+    attr_accessor :cap, :spill_dir
+  end
+
+  attr_reader :total_bytes
+
+  def initialize
+    @half = [StderrRing.cap / 2, 1].max
+    @head = ''.b
+    @tail = ''.b
+    @total_bytes = 0
+    @mutex = Mutex.new
+    if StderrRing.spill_dir
+      FileUtils.mkdir_p(StderrRing.spill_dir)
+      @spill_path = File.join(StderrRing.spill_dir, "#{Process.pid}-#{object_id}.log.gz.tmp")
+      @spill = File.open(@spill_path, 'wb')
+      @spill_page = ''.b
+    end
+  end
+
+  def <<(text)
+    text = text.to_s.b
+    @mutex.synchronize do
+      @total_bytes += text.bytesize
+      if @spill
+        @spill_page << text
+        while @spill_page.bytesize >= SPILL_PAGE
+          write_spill_page(@spill_page.byteslice(0, SPILL_PAGE))
+          @spill_page = @spill_page.byteslice(SPILL_PAGE, @spill_page.bytesize)
+        end
+      end
+      room = @half - @head.bytesize
+      if room > 0
+        @head << text.byteslice(0, room)
+        text = text.byteslice(room, text.bytesize) || ''.b
+      end
+      unless text.empty?
+        @tail << text
+        # trimmed once it holds twice the tail size, so appends stay amortized O(1)
+        @tail = @tail.byteslice(-@half, @half) if @tail.bytesize > 2 * @half
+      end
+    end
+    self
+  end
+
+  def to_s
+    @mutex.synchronize do
+      tail = @tail.bytesize > @half ? @tail.byteslice(-@half, @half) : @tail
+      omitted = @total_bytes - @head.bytesize - tail.bytesize
+      text = @head.dup
+      text << "\\n... [#{omitted} bytes omitted] ...\\n" if omitted > 0
+      text << tail
+      text.force_encoding('UTF-8').scrub
+    end
+  end
+  alias to_str to_s
+
+  def to_json(*args)
+    to_s.to_json(*args)
+  end
+
+  def empty?
+    @total_bytes == 0
+  end
+
+  # every page of the side file is a gzip member of its own whose header extra field ('HG') holds
+  # the member size, so a reader can jump to a page without decompressing the ones before it
+  def write_spill_page(data)
+    deflate = Zlib::Deflate.new(Zlib::DEFAULT_COMPRESSION, -Zlib::MAX_WBITS)
+    body = deflate.deflate(data, Zlib::FINISH)
+    deflate.close
+    @spill.write([0x1f, 0x8b, 8, 4, 0, 0, 255, 8, 72, 71, 4, 20 + body.bytesize + 8].pack('CCCCVCCvCCvV'))
+    @spill.write(body)
+    @spill.write([Zlib.crc32(data), data.bytesize].pack('VV'))
+  end
+
+  # close the side file and give it its final name; returns its path relative to the runner, if any
+  def finish(name)
+    return nil unless @spill
+    @mutex.synchronize do
+      write_spill_page(@spill_page) if !@spill_page.empty? || @spill.pos == 0
+      @spill.close
+      @spill = nil
+    end
+    path = File.join(StderrRing.spill_dir, "#{name}.log.gz")
+    File.rename(@spill_path, path)
+    path.delete_prefix(File.dirname(File.expand_path(__FILE__)) + '/')
+  end
+end
+'''
+                code = insert_helpers("stderr_ring", stderr_ring, code)
+                code = sub("stderr_ring_init", r"stderr_log:\s*(?:''|\"\"|String\.new)", "stderr_log: StderrRing.new", code)
+                code = sub(
+                    "stderr_ring_result",
+                    r'(results\[i\]\[:stderr_log\]\s*=\s*bot\[:stderr_log\])',
+                    lambda m: m.group(1) + '''
+if bot[:stderr_log].is_a?(StderrRing)
+  results[i][:stderr_bytes] = bot[:stderr_log].total_bytes
+  results[i][:stderr_file] = bot[:stderr_log].finish("#{@seed.to_s(36)}-#{i}")
+  results[i][:stderr_log] = bot[:stderr_log].to_s
+end''',
+                    code
+                )
+                code = sub(
+                    "stderr_ring_round_entry",
+                    r'(round_entry\s*=\s*\{[^}]*:response_time_stats\s*=>\s*rts,)',
+                    r'\1\n:stderr_bytes => results[i][:stderr_bytes],\n:stderr_file => results[i][:stderr_file],',
+                    code
+                )
+
+            if "--multi-core" not in code:
+                if 'opts.on("--[no-]enable-debug"' in code:
+                    code = sub(
+                        "multi_core_options",
+                        r'(opts\.on\("--\[no-\]enable-debug".*?\n\s*end\n)(\s*end\.parse!)',
+                        r'\1    opts.on("--multi-core", "Enable multi-core parallel execution") do |x|\n        options[:multi_core] = x\n    end\n    opts.on("--threads N", String, "Number of threads for multi-core execution, or auto (default: auto from nproc and cgroup CPU limit)") do |x|\n        options[:threads] = x == "auto" ? nil : Integer(x)\n    end\n    opts.on("--resource-sample-every N", Integer, "Sample bot CPU time and RSS from /proc every N ticks") do |x|\n        $hg_resource_sample_every = x if x > 0\n    end\n    opts.on("--adaptive-ci WIDTH", Float, "Stop multi-core runs once the 95% CI half-width of every bot on mean score is <= WIDTH") do |x|\n        $hg_adaptive_ci = x if x > 0\n    end\n    opts.on("--adaptive-sprt DELTA", Float, "Stop multi-core runs once an SPRT on bot 1 vs bot 2 win rate (0.5 +- DELTA) decides") do |x|\n        $hg_adaptive_sprt = x if x > 0 && x < 0.5\n    end\n    opts.on("--adaptive-min-rounds N", Integer, "Minimum rounds before a stopping rule is checked (default: 30)") do |x|\n        $hg_adaptive_min_rounds = x\n    end\n    opts.on("--coordinator [HOST:]PORT", String, "Hand out multi-core round shards to --shard-worker processes over TCP") do |x|\n        $hg_coordinator = x\n    end\n    opts.on("--shard-size N", Integer, "Rounds per shard handed to a worker by --coordinator (default: 8)") do |x|\n        $hg_shard_size = x if x > 0\n    end\n    opts.on("--shard-worker HOST:PORT", String, "Run round shards for a --coordinator instead of playing locally") do |x|\n        $hg_shard_worker = x\n    end\n    opts.on("--[no-]warm-bots", "Keep bots that answer the reset handshake alive across rounds") do |x|\n        $hg_warm_bots = x\n    end\n    opts.on("--docker-pool IMAGE", String, "Run bots in pooled, reused containers of IMAGE instead of one container per round") do |x|\n        $hg_docker_pool = x\n        ContainerPool.image = x\n    end\n    opts.on("--[no-]replay-debug", "Store the bot output lines per round instead of the debug protocol, to be re-simulated on demand") do |x|\n        $hg_replay_debug = x\n    end\n    opts.on("--[no-]map-cache", "Load maze, floor tiles and visibility from .hg_map_cache/ when generated before (default: on)") do |x|\n        $hg_map_cache = x\n    end\n    opts.on("--print-round-seeds", "Print the seeds of all rounds (base 36, comma separated) and exit") do\n        $hg_print_round_seeds = true\n    end\n    opts.on("--stderr-cap BYTES", Integer, "Keep at most BYTES of each bot stderr log per round, half from the start and half from the end (default: 65536)") do |x|\n        StderrRing.cap = x if x > 0\n    end\n    opts.on("--stderr-spill DIR", String, "Also write every full bot stderr log to DIR/<seed>-<bot>.log.gz") do |x|\n        StderrRing.spill_dir = File.expand_path(x)\n    end\n    opts.on("--docker-slot IDS", Array, "Container ids (one per bot, in bot order) pre-started by a multi-core parent") do |x|\n        $hg_docker_slot = x\n    end\n\2',
+                        code,
+                        flags=re.DOTALL
+                    )
+                if "require 'socket'" not in code:
+                    code = sub("require_socket", r"(require 'zlib')", r"\1\nrequire 'socket'", code, count=1)
+                
+                multicore_patch = r"""
+
+hg_runner_path = File.expand_path("runner_patched.rb", __dir__)
+hg_runner_path = File.expand_path("runner.rb", __dir__) unless File.exist?(hg_runner_path)
+
+# nproc, capped by a cgroup v2 (cpu.max) or v1 (cfs quota) CPU limit
+auto_thread_count = lambda do
+  cpus = Etc.nprocessors
+  quota = nil
+  begin
+    if File.exist?('/sys/fs/cgroup/cpu.max')
+      limit, period = File.read('/sys/fs/cgroup/cpu.max').split
+      quota = limit.to_f / period.to_f if limit != 'max' && period.to_f > 0
+    elsif File.exist?('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+      limit = File.read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us').to_i
+      period = File.read('/sys/fs/cgroup/cpu/cpu.cfs_period_us').to_i
+      quota = limit.to_f / period if limit > 0 && period > 0
+    end
+  rescue SystemCallError
+  end
+  cpus = [cpus, quota.ceil].min if quota
+  [cpus, 1].max
+end
+
+if $hg_docker_pool && $hg_docker_slot
+  ContainerPool.preload(bot_paths.map { |p| ContainerPool.bot_dir(p) }, $hg_docker_slot)
+end
+
+# one container per bot for each of count worker threads, started in parallel;
+# returns per thread the --docker-slot arguments and the start latencies in ms
+prestart_docker_slots = lambda do |count|
+  starts = Array.new(count) do
+    bot_paths.map { |p| Thread.new { ContainerPool.start(ContainerPool.bot_dir(p)) } }
+  end
+  starts.map do |threads|
+    started = threads.map(&:value)
+    [['--docker-slot', started.map(&:first).join(',')], started.map(&:last)]
+  end
+end
+
+# one child runner for one or more seeds (several with --warm-bots, so the bots stay warm
+# between them); returns a report list per seed, each holding only that round
+run_child_rounds = lambda do |child_args, seeds36|
+  Dir.mktmpdir("runner_round_") do |dir|
+    json_path = File.join(dir, "round.json")
+    cmd = [RbConfig.ruby, hg_runner_path] + child_args
+    cmd += ['--seed', seeds36[0], '--write-profile-json', json_path]
+    cmd += ['--rounds', seeds36.size.to_s, '--round-seeds', seeds36.join(',')] if seeds36.size > 1
+    cmd += bot_paths
+
+    stdout, stderr, status = Open3.capture3(*cmd)
+
+    unless status.success? && File.exist?(json_path)
+      error = "child failed or JSON missing (status #{status.exitstatus})"
+      error += " STDERR: #{stderr}" unless stderr.empty?
+      next [nil, error]
+    end
+
+    data = JSON.parse(File.read(json_path))
+    per_round = seeds36.each_index.map do |j|
+      data.map { |report| report.merge('rounds' => [report['rounds'][j]]) }
+    end
+    [per_round, nil]
+  end
+end
+
+if $hg_shard_worker
+  host, port = $hg_shard_worker.split(':', 2)
+  runner_sha = Digest::SHA256.file(hg_runner_path).hexdigest
+  shard_threads = Array.new(options[:threads] || auto_thread_count.call) do |t|
+    Thread.new do
+      begin
+        sock = TCPSocket.new(host, port.to_i)
+        hello = JSON.parse(sock.gets)
+        if hello['bot_count'] != bot_paths.size
+          warn "Worker #{t + 1}: coordinator runs #{hello['bot_count']} bots, got #{bot_paths.size}"
+          next
+        end
+        worker_args = hello['args']
+        image_at = worker_args.index('--docker-pool')
+        if image_at
+          $hg_docker_pool = ContainerPool.image = worker_args[image_at + 1]
+          worker_args += prestart_docker_slots.call(1)[0][0]
+        end
+        if t == 0 && hello['runner_sha'] != runner_sha
+          warn "⚠️  runner_patched.rb differs from the coordinator's copy"
+        end
+        done = 0
+        loop do
+          sock.puts({type: 'pull'}.to_json)
+          line = sock.gets
+          break unless line
+          msg = JSON.parse(line)
+          break if msg['type'] == 'done'
+          if msg['type'] == 'wait'
+            sleep 0.5
+            next
+          end
+          pairs = msg['rounds']
+          batches = worker_args.include?('--warm-bots') ? [pairs] : pairs.map { |pair| [pair] }
+          batches.each do |batch|
+            round_start = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+            per_round, error = run_child_rounds.call(worker_args, batch.map(&:last))
+            secs = (Process.clock_gettime(Process::CLOCK_MONOTONIC) - round_start) / batch.size
+            batch.each_with_index do |(idx, _), j|
+              data = per_round && per_round[j]
+              sock.puts({type: 'result', idx: idx, data: data, error: error, secs: secs}.to_json)
+              done += 1
+            end
+          end
+        end
+        warn "Worker #{t + 1}: #{done} rounds done"
+      rescue IOError, SystemCallError => e
+        warn "Worker #{t + 1}: #{e.message}"
+      ensure
+        sock.close if sock && !sock.closed?
+      end
+    end
+  end
+  shard_threads.each(&:join)
+  exit 0
+end
+
+if options[:multi_core] && options[:rounds].to_i > 1
+  og_seed = options[:seed]
+  round_seed_base = Digest::SHA256.digest("#{options[:seed]}/rounds").unpack1('L<')
+  seed_rng        = PCG32.new(round_seed_base)
+
+  all_seed = []
+  options[:rounds].times do |i|
+    round_seed_value = if options[:round_seeds]
+      options[:round_seeds][i].to_i(36)
+    else
+      seed_rng.randrange(2 ** 32)
+    end
+    all_seed << round_seed_value
+  end
+
+  bot_count = bot_paths.size
+
+  all_score              = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_utilization        = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_ttfc               = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_tc                 = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_disqualified_for   = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_response_time_stats = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_response_times     = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_resource_samples   = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_stderr_logs        = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_bot_startup        = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_replay             = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_stderr_bytes       = Array.new(bot_count) { Array.new(options[:rounds]) }
+  all_stderr_files       = Array.new(bot_count) { Array.new(options[:rounds]) }
+  round_done             = Array.new(options[:rounds], false)
+
+  bot_data       = Array.new(bot_count)
+
+  # everything a child runner needs except --seed, --write-profile-json and the bot paths,
+  # which differ per round and per worker host
+  child_args = []
+  child_args += ['--stage', stage_key] if stage_key
+  child_args += [
+    '--generator',        options[:generator],
+    '--ticks',            options[:max_ticks].to_s,
+    '--vis-radius',       options[:vis_radius].to_s,
+    (options[:emit_signals] ? '--emit-signals' : '--no-emit-signals'),
+    '--signal-radius',        options[:signal_radius].to_s,
+    '--signal-quantization',  options[:signal_quantization].to_s,
+    '--signal-noise',         options[:signal_noise].to_s,
+    '--signal-cutoff',        options[:signal_cutoff].to_s,
+    '--signal-fade',          options[:signal_fade].to_s,
+    (options[:swap_bots] ? '--swap-bots' : '--no-swap-bots'),
+    (options[:cache] ? '--cache' : '--no-cache'),
+    (options[:use_docker] ? '--use-docker' : '--no-use-docker'),
+    (options[:announcer_enabled] ? '--announcer' : '--no-announcer'),
+    (options[:show_timings] ? '--show-timings' : '--no-show-timings'),
+    (options[:start_paused] ? '--start-paused' : '--no-start-paused'),
+    '--highlight-color',  options[:highlight_color],
+    '--profile',
+    '--rounds', '1',
+    '--verbose', '0',
+    '--max-tps', '0'
+  ]
+  child_args += ['--resource-sample-every', $hg_resource_sample_every.to_s] if $hg_resource_sample_every
+  child_args += ['--warm-bots'] if $hg_warm_bots
+  child_args += ['--replay-debug'] if $hg_replay_debug
+  child_args += ['--stderr-cap', StderrRing.cap.to_s] if defined?(StderrRing)
+  child_args += ['--stderr-spill', StderrRing.spill_dir] if defined?(StderrRing) && StderrRing.spill_dir
+  child_args += ['--no-map-cache'] if defined?(MapCache) && !$hg_map_cache
+  child_args += ['--docker-pool', $hg_docker_pool] if $hg_docker_pool
+
+  # seconds per round from earlier runs with the same arguments, keyed by argument hash and seed
+  cost_path = File.join(__dir__, '.hg_round_costs.json')
+  cost_prefix = Digest::SHA256.hexdigest((child_args + bot_paths).join(' '))[0, 16]
+  round_costs = (JSON.parse(File.read(cost_path)) rescue {})
+  round_costs = {} unless round_costs.is_a?(Hash)
+  round_secs = Array.new(options[:rounds])
+
+  # longest rounds first so the tail does not leave threads idle; adaptive stopping
+  # keeps seed order, otherwise the early rounds it decides on would be biased by cost
+  order = (0...options[:rounds]).to_a
+  unless $hg_adaptive_ci || $hg_adaptive_sprt
+    seeds = order.map { |k| all_seed[k].to_s(36) }
+    known = seeds.map { |s| round_costs["#{cost_prefix}:#{s}"] }
+    # unseen with these arguments: the latest cost of the seed under other arguments,
+    # scaled by the median ratio on seeds known both ways; else the median estimate
+    other = {}
+    round_costs.each { |key, secs| other[key.split(':', 2)[1]] = secs unless key.start_with?("#{cost_prefix}:") }
+    ratios = seeds.each_index.select { |k| known[k] && other[seeds[k]].to_f > 0 }.map { |k| known[k] / other[seeds[k]] }.sort
+    scale = ratios.empty? ? 1.0 : ratios[ratios.size / 2]
+    estimate = seeds.each_index.map { |k| known[k] || (other[seeds[k]] && other[seeds[k]] * scale) }
+    if estimate.any?
+      fallback = estimate.compact.sort[estimate.compact.size / 2]
+      order = order.sort_by { |k| [-(estimate[k] || fallback), k] }
+    end
+  end
+
+  shard_size = ($hg_coordinator || $hg_warm_bots) ? ($hg_shard_size || 8) : 1
+  jobs = Queue.new
+  order.each_slice(shard_size) { |shard| jobs << shard }
+
+  adaptive_stop = nil
+  adaptive_enabled = $hg_adaptive_ci || $hg_adaptive_sprt
+  adaptive_min_rounds = $hg_adaptive_min_rounds || 30
+
+  check_stopping_rule = lambda do
+    if $hg_adaptive_ci
+      widths = all_score.map do |scores|
+        s = scores.compact
+        next nil if s.size < adaptive_min_rounds
+        m = s.sum(0.0) / s.size
+        sd = Math.sqrt(s.sum(0.0) { |x| (x - m) ** 2 } / (s.size - 1))
+        1.959964 * sd / Math.sqrt(s.size)
+      end
+      if widths.all? && widths.max <= $hg_adaptive_ci
+        next "ci_width: 95% CI half-width #{widths.max.round(2)} <= #{$hg_adaptive_ci}"
+      end
+    end
+    if $hg_adaptive_sprt && bot_count == 2
+      wins = 0
+      losses = 0
+      all_score[0].each_with_index do |a, k|
+        b = all_score[1][k]
+        next if a.nil? || b.nil? || a == b
+        a > b ? wins += 1 : losses += 1
+      end
+      if wins + losses >= adaptive_min_rounds
+        p0 = 0.5 - $hg_adaptive_sprt
+        p1 = 0.5 + $hg_adaptive_sprt
+        llr = wins * Math.log(p1 / p0) + losses * Math.log((1 - p1) / (1 - p0))
+        upper = Math.log((1 - 0.05) / 0.05)
+        lower = Math.log(0.05 / (1 - 0.05))
+        next "sprt: bot 1 better (#{wins}:#{losses}, llr #{llr.round(2)})" if llr >= upper
+        next "sprt: bot 2 better (#{wins}:#{losses}, llr #{llr.round(2)})" if llr <= lower
+      end
+    end
+    nil
+  end
+
+  progress_mutex   = Mutex.new
+  completed        = 0
+  handed_out       = 0
+  start_time       = Time.now
+  last_print_time  = start_time
+  total_rounds     = options[:rounds]
+
+  print_progress = lambda do
+    elapsed = Time.now - start_time
+    pct     = (completed * 100.0 / total_rounds).floor
+    rate    = (elapsed > 0 && completed > 0) ? (completed / elapsed) : 0.0
+    remain  = total_rounds - completed
+    eta_s   = (rate > 0) ? (remain / rate) : nil
+    eta_str = eta_s ? "%02d:%02d" % [eta_s.to_i / 60, eta_s.to_i % 60] : "--:--"
+    line    = "Progress: #{completed}/#{total_rounds} (#{pct}%) · ETA #{eta_str}"
+    $stderr.print("\r#{line.ljust(80)}")
+    $stderr.flush
+  end
+
+  take_shard = lambda do
+    progress_mutex.synchronize do
+      shard = (jobs.pop(true) rescue nil)
+      handed_out += shard.size if shard
+      shard
+    end
+  end
+
+  # rounds that were handed out but will not be reported: requeue them, or drop them once stopped
+  release_rounds = lambda do |idxs|
+    progress_mutex.synchronize do
+      handed_out -= idxs.size
+      if adaptive_stop
+        total_rounds -= idxs.size
+      else
+        jobs << idxs
+      end
+    end
+  end
+
+  all_finished = lambda { progress_mutex.synchronize { completed >= total_rounds } }
+
+  worker_stats = []
+
+  finish_round = lambda do |idx, data, secs, stats|
+    progress_mutex.synchronize do
+      unless round_done[idx]
+        round_done[idx] = true
+        round_secs[idx] = secs if data
+        stats[:rounds] += 1
+        stats[:busy_s] += secs
+        (data || []).each_with_index do |report, k|
+          bot_data[k] ||= { name: report['name'], emoji: report['emoji'] }
+
+          round = report['rounds'][0]
+          next unless round
+
+          all_score[k][idx]            = round['score']
+          all_utilization[k][idx]      = round['gem_utilization']
+          all_ttfc[k][idx]             = round['ticks_to_first_capture']
+          all_tc[k][idx]               = round['floor_coverage']
+          all_disqualified_for[k][idx] = round['disqualified_for']
+          all_response_time_stats[k][idx] = round['response_time_stats']
+          all_response_times[k][idx]   = round['response_times_ns']
+          all_resource_samples[k][idx] = round['resource_samples']
+          # only logs of disqualified rounds end up in the profile, so only those are kept
+          all_stderr_logs[k][idx]      = round['stderr_log'] if round['disqualified_for']
+          all_stderr_bytes[k][idx]     = round['stderr_bytes']
+          all_stderr_files[k][idx]     = round['stderr_file']
+          all_bot_startup[k][idx]      = round['bot_startup']
+          all_replay[k][idx]           = round['replay']
+        end
+
+        completed += 1
+        if adaptive_enabled && adaptive_stop.nil?
+          adaptive_stop = check_stopping_rule.call
+          if adaptive_stop
+            jobs.clear
+            total_rounds = handed_out
+          end
+        end
+        now = Time.now
+        if completed == total_rounds || (now - last_print_time) >= 0.5
+          print_progress.call
+          last_print_time = now
+        end
+      end
+    end
+  end
+
+  server = nil
+  if $hg_coordinator
+    bind_host, bind_port = $hg_coordinator.include?(':') ? $hg_coordinator.split(':', 2) : ['0.0.0.0', $hg_coordinator]
+    server = TCPServer.new(bind_host, bind_port.to_i)
+    hello = {
+      type: 'hello',
+      args: child_args,
+      bot_count: bot_count,
+      runner_sha: Digest::SHA256.file(hg_runner_path).hexdigest
+    }.to_json
+    warn "Coordinator listening on #{bind_host}:#{bind_port} · #{jobs.size} shards of up to #{shard_size} rounds"
+    Thread.new do
+      loop do
+        client = (server.accept rescue break)
+        Thread.new(client) do |sock|
+          pending = []
+          peer = (sock.peeraddr[2] rescue '?')
+          stats = { name: "#{peer}:#{(sock.peeraddr[1] rescue '?')}", rounds: 0, busy_s: 0.0 }
+          progress_mutex.synchronize { worker_stats << stats }
+          begin
+            sock.puts(hello)
+            while (line = sock.gets)
+              msg = JSON.parse(line)
+              if msg['type'] == 'pull'
+                shard = take_shard.call
+                if shard
+                  pending.concat(shard)
+                  sock.puts({type: 'shard', rounds: shard.map { |k| [k, all_seed[k].to_s(36)] }}.to_json)
+                elsif all_finished.call
+                  sock.puts({type: 'done'}.to_json)
+                  break
+                else
+                  sock.puts({type: 'wait'}.to_json)
+                end
+              elsif msg['type'] == 'result'
+                idx = msg['idx']
+                next unless pending.delete(idx)
+                warn "⚠️  Round #{idx + 1} on #{peer}: #{msg['error']}" if msg['error']
+                finish_round.call(idx, msg['data'], msg['secs'].to_f, stats)
+              end
+            end
+          rescue IOError, SystemCallError, JSON::ParserError
+          ensure
+            unless pending.empty?
+              warn "⚠️  Worker #{peer} left with #{pending.size} rounds pending, requeueing"
+              release_rounds.call(pending)
+            end
+            sock.close unless sock.closed?
+          end
+        end
+      end
+    end
+  end
+
+  threads_to_use = options[:threads] || auto_thread_count.call
+  docker_slots = []
+  if $hg_docker_pool
+    prestart_at = Time.now
+    docker_slots = prestart_docker_slots.call(threads_to_use)
+    warn "Container pool: #{threads_to_use * bot_count} containers of #{$hg_docker_pool} started in #{(Time.now - prestart_at).round(1)} s"
+  end
+  workers = Array.new(threads_to_use) do |t|
+    stats = { name: "local #{t + 1}", rounds: 0, busy_s: 0.0 }
+    worker_stats << stats
+    thread_args = docker_slots[t] ? child_args + docker_slots[t][0] : child_args
+    Thread.new do
+      loop do
+        shard = take_shard.call
+        unless shard
+          # remote shards may still be requeued by a disconnecting worker
+          break if server.nil? || all_finished.call
+          sleep 0.2
+          next
+        end
+
+        batches = $hg_warm_bots ? [shard] : shard.map { |idx| [idx] }
+        batches.each_with_index do |batch, j|
+          if adaptive_stop
+            release_rounds.call(batches[j..].flatten)
+            break
+          end
+          round_start = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+          per_round, error = run_child_rounds.call(thread_args, batch.map { |idx| all_seed[idx].to_s(36) })
+          secs = (Process.clock_gettime(Process::CLOCK_MONOTONIC) - round_start) / batch.size
+          warn "⚠️  Round #{batch.map { |idx| idx + 1 }.join(', ')}: #{error}" if error
+          batch.each_with_index do |idx, m|
+            finish_round.call(idx, per_round && per_round[m], secs, stats)
+          end
+        end
+      end
+    end
+  end
+
+  workers.each(&:join)
+  sleep 0.2 until all_finished.call if server
+  server.close if server
+  $stderr.puts
+
+  wall_s = Time.now - start_time
+  scheduler = {
+    :threads => threads_to_use,
+    :auto    => options[:threads].nil?,
+    :wall_s  => wall_s,
+    :workers => worker_stats.map do |w|
+      w.merge(:utilization => wall_s > 0 ? w[:busy_s] / wall_s : 0.0)
+    end
+  }
+  puts "Scheduler: #{threads_to_use} local threads#{options[:threads].nil? ? ' (auto)' : ''}, wall #{wall_s.round(1)} s"
+  scheduler[:workers].each do |w|
+    puts sprintf("  %-24s %5d rounds  busy %7.1f s  %5.1f %%", w[:name], w[:rounds], w[:busy_s], w[:utilization] * 100)
+  end
+
+  round_secs.each_with_index do |secs, k|
+    next unless secs
+    key = "#{cost_prefix}:#{all_seed[k].to_s(36)}"
+    round_costs.delete(key)
+    round_costs[key] = secs
+  end
+  round_costs = round_costs.to_a.last(50_000).to_h
+  File.write(cost_path, JSON.generate(round_costs)) rescue nil
+
+  ran = (0...options[:rounds]).select { |k| all_score.any? { |scores| !scores[k].nil? } }
+  if ran.size < options[:rounds]
+    [all_score, all_utilization, all_ttfc, all_tc, all_disqualified_for,
+     all_response_time_stats, all_response_times, all_resource_samples, all_stderr_logs,
+     all_bot_startup, all_replay, all_stderr_bytes, all_stderr_files].each do |columns|
+      columns.map! { |column| column.values_at(*ran) }
+    end
+    all_seed = all_seed.values_at(*ran)
+  end
+
+  if adaptive_stop
+    puts "Stopped early after #{ran.size}/#{options[:rounds]} rounds: #{adaptive_stop}"
+  end
+
+  puts
+
+  all_reports = []
+  bot_data.each_with_index do |data, i|
+    next unless data
+
+    puts "Results for #{data[:emoji]} #{data[:name]}"
+
+    n    = all_utilization[i].size
+    mean = all_utilization[i].sum(0.0) / n
+    var  = all_utilization[i].map { |x| (x - mean) ** 2 }.sum / n
+    sd   = Math.sqrt(var)
+    cv   = sd / mean * 100.0
+
+    puts sprintf("Total Score     : %5d", all_score[i].sum)
+    puts sprintf("Gem Utilization : %5.1f %%", mean)
+    if cv.nan?
+      puts sprintf("Chaos Factor    :     -")
+    else
+      puts sprintf("Chaos Factor    : %5.1f %%", cv)
+    end
+    puts sprintf("Floor Coverage  : %5.1f %%", mean(all_tc[i]))
+
+    report = {}
+    report[:timestamp]            = Time.now.to_i
+    report[:stage_key]            = stage_key
+    report[:stage_title]          = stage_title
+    report[:git_hash]             = `git describe --always --dirty`.strip
+    report[:seed]                 = og_seed.to_s(36)
+    report[:name]                 = data[:name]
+    report[:emoji]                = data[:emoji]
+    report[:total_score]          = all_score[i].sum
+    report[:gem_utilization_mean] = mean
+    report[:gem_utilization_cv]   = cv.nan? ? nil : cv
+    report[:floor_coverage_mean]  = mean(all_tc[i])
+    report[:scheduler] = scheduler
+    if $hg_docker_pool
+      containers = all_bot_startup[i].map { |startup| startup && startup['container'] }.compact
+      report[:container_pool] = {
+        :image      => $hg_docker_pool,
+        :prestarted => docker_slots.size,
+        :start_ms   => docker_slots.map { |slot| slot[1][i] },
+        :hits       => containers.count { |c| c['hit'] },
+        :misses     => containers.count { |c| !c['hit'] }
+      }
+    end
+    if adaptive_enabled
+      report[:adaptive] = {
+        :stopped_early    => !adaptive_stop.nil?,
+        :reason           => adaptive_stop,
+        :rounds_completed => ran.size,
+        :rounds_requested => options[:rounds]
+      }
+    end
+
+    report[:rounds] = all_score[i].map.with_index do |_, k|
+      d = {
+        :seed                  => all_seed[k].to_s(36),
+        :score                 => all_score[i][k],
+        :gem_utilization       => all_utilization[i][k],
+        :floor_coverage        => all_tc[i][k],
+        :ticks_to_first_capture => all_ttfc[i][k],
+        :disqualified_for      => all_disqualified_for[i][k],
+        :response_time_stats   => all_response_time_stats[i][k],
+        :response_times_ns     => all_response_times[i][k],
+        :resource_samples      => all_resource_samples[i][k],
+        :bot_startup           => all_bot_startup[i][k],
+      }
+      if d[:disqualified_for]
+        d[:stderr_log] = all_stderr_logs[i][k]
+      end
+      d[:stderr_bytes] = all_stderr_bytes[i][k] if all_stderr_bytes[i][k]
+      d[:stderr_file] = all_stderr_files[i][k] if all_stderr_files[i][k]
+      d[:replay] = all_replay[i][k] if $hg_replay_debug
+      d
+    end
+
+    all_reports << report
+  end
+
+  if write_profile_json_path
+    File.open(write_profile_json_path, 'w') do |f|
+      f.write(JSON.pretty_generate(all_reports))
+    end
+  end
+  
+  exit 0
+end
+
+options.delete(:multi_core)
+options.delete(:threads)
+"""
+                if 'runner = Runner.new(' in code:
+                    code = sub(
+                        "multi_core_block",
+                        r'(bot_paths << "random-walker"\nend\n)',
+                        r'\1' + multicore_patch + '\n',
+                        code,
+                        flags=re.DOTALL
+                    )
+                else:
+                    code += multicore_patch
+                    results.append(("multi_core_block_appended", 1, False))
+
+            # kept as the last line so shebang and magic comments stay first; missed patches keep it from counting as current
+            missed = [name for name, n, required in results if required and n == 0]
+            stamp = f"\n# hg-patch source-sha256={source_hash} patchset={PATCHSET_VERSION}{' missed=' + ','.join(missed) if missed else ''}\n"
+            open(out, "w", encoding="utf-8", newline="\n").write(code.rstrip("\n") + "\n" + stamp)
+        except Exception as e:
+            log("Patch failed: " + str(e))
+            return False
+        matched = [name for name, n, required in results if n]
+        log(f"  matched {len(matched)}/{len(results)}: {', '.join(matched)}")
+        for name, n, required in results:
+            if not n:
+                log(f"  {'✘' if required else '·'} {name}: no match{'' if required else ' (optional)'}")
+        if missed:
+            log(f"⚠️ runner_patched.rb generated, {len(missed)} patches did not match: {', '.join(missed)}")
+        else:
+            log("✔ runner_patched.rb generated")
+        return not missed
+
+
+def format_summary(profile):
+    lines = []
+    lines.append(f"{profile.get('name', '')} [{profile.get('emoji', '')}]  {profile.get('stage_key') or ''}")
+    lines.append(f"Score: {profile.get('total_score', '')}")
+    adaptive = profile.get("adaptive")
+    if adaptive and adaptive.get("stopped_early"):
+        lines.append(f"Stopped early: {adaptive.get('rounds_completed')}/{adaptive.get('rounds_requested')} rounds, {adaptive.get('reason')}")
+    scheduler = profile.get("scheduler")
+    if scheduler:
+        lines.append(f"Scheduler: {scheduler.get('threads')} threads{' (auto)' if scheduler.get('auto') else ''}, wall {scheduler.get('wall_s', 0):.1f} s")
+        for w in scheduler.get("workers", []):
+            lines.append(f"  {w.get('name'):<24} {w.get('rounds'):>5} rounds  busy {w.get('busy_s', 0):7.1f} s  {w.get('utilization', 0) * 100:5.1f} %")
+    pool = profile.get("container_pool")
+    if pool:
+        start_ms = pool.get("start_ms") or []
+        mean_start = f", start {sum(start_ms) / len(start_ms):.0f} ms" if start_ms else ""
+        lines.append(f"Container pool {pool.get('image')}: {pool.get('hits')} hits / {pool.get('misses')} misses{mean_start}")
+    rounds = profile.get("rounds", [])
+    if len(rounds) > 1:
+        analytics = ProfileAnalytics(profile)
+        lines.append(f"Rounds: {analytics.n}  disqualified: {int(analytics.disqualified.sum())}")
+        for name, title in ProfileAnalytics.PLOTS:
+            summary = analytics.summary(name)
+            if summary is None:
+                continue
+            lo, hi = summary["ci"]
+            lines.append(
+                f"{title:<24} mean {summary['mean']:>10.4g} [{lo:.4g}, {hi:.4g}]  "
+                f"p5 {summary['p5']:.4g}  p50 {summary['p50']:.4g}  p95 {summary['p95']:.4g}"
+            )
+    return "\n".join(lines)
+
+
+def format_comparison(c):
+    lines = [f"Paired rounds: {c['n']} (unmatched A {c['unmatched_a']}, B {c['unmatched_b']})"]
+    if not c["n"]:
+        return "\n".join(lines)
+    lines.append(f"Mean A / B: {c['mean_a']:.2f} / {c['mean_b']:.2f}")
+    lines.append(f"Mean delta: {c['mean_delta']:+.2f}  median {c['median_delta']:+.2f}  sd {c['sd_delta']:.2f}")
+    lines.append(f"B wins / losses / ties: {c['wins']} / {c['losses']} / {c['ties']}")
+    lines.append(f"Sign test p: {c['sign_p']:.4g}  Wilcoxon p: {c['wilcoxon_p']:.4g}")
+    lines.append(f"Rounds for significance: {c['rounds_needed'] if c['rounds_needed'] is not None else '-'}")
+    for seed, score_a, score_b, delta in c["worst"]:
+        lines.append(f"  {seed}: {score_a} -> {score_b} ({delta:+g})")
+    return "\n".join(lines)
+
+
+def add_settings_arguments(parser):
+    for key, default in DEFAULT_SETTINGS.items():
+        flag = "--" + key.replace("_", "-")
+        if isinstance(default, bool):
+            parser.add_argument(flag, dest=key, action=argparse.BooleanOptionalAction, default=None)
+        else:
+            parser.add_argument(flag, dest=key, type=type(default), default=None)
+
+
+def settings_from_options(options, base):
+    settings = dict(DEFAULT_SETTINGS)
+    if options.preset:
+        stages, customstages = load_stages(base)
+        preset = stages.get(options.preset) or customstages.get(options.preset)
+        if preset is None:
+            print(f"Unknown preset: {options.preset}", file=sys.stderr)
+            return None
+        apply_preset(settings, preset)
+    for key in DEFAULT_SETTINGS:
+        if getattr(options, key) is not None:
+            settings[key] = getattr(options, key)
+    return settings
+
+
+def cmd_run(options, base):
+    launcher = Launcher(base)
+    settings = settings_from_options(options, base)
+    if settings is None:
+        return 2
+    if options.rerun:
+        rounds = (read_reports(options.rerun) or [{}])[0].get("rounds", [])
+        seeds = [rounds[i]["seed"] for i in select_rounds(rounds, options.select, options.worst)]
+        if not seeds:
+            print(f"No {options.select} rounds in {options.rerun}")
+            return 0
+        print(f"Re-running {len(seeds)} {options.select} rounds with debug: {','.join(seeds)}")
+        settings = launcher.rerun_settings(settings, seeds)
+    
+    try:
+        cmd = launcher.prepare_run(settings, options.bots)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    print(cmd)
+    if sys.platform.startswith("win"):
+        status = subprocess.run(["wsl.exe", "bash", "-lc", cmd]).returncode
+    else:
+        status = subprocess.run(["bash", "-c", cmd]).returncode
+    if os.path.exists(launcher.profile):
+        print(format_summary(load_profile(launcher.profile)))
+        launcher.ingest(options.bots)
+        if settings["archive_profiles"]:
+            launcher.archive_profile()
+    return status
+
+
+def cmd_seeds(options, base):
+    settings = settings_from_options(options, base)
+    if settings is None:
+        return 2
+    print(",".join(Launcher(base).round_seeds(settings)))
+    return 0
+
+
+def cmd_patch(options, base):
+    return 0 if Launcher(base).patch_runner(force=options.force) else 1
+
+
+def cmd_worker(options, base):
+    launcher = Launcher(base)
+    launcher.prepare_project()
+    try:
+        launcher.require_patched()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    args = ["--shard-worker", options.coordinator, "--threads", options.threads or "auto"]
+    cmd = launcher.shell_command(args, launcher.convert_bot_paths(options.bots), launcher.runner_file())
+    print(cmd)
+    if sys.platform.startswith("win"):
+        return subprocess.run(["wsl.exe", "bash", "-lc", cmd]).returncode
+    return subprocess.run(["bash", "-c", cmd]).returncode
+
+
+def cmd_archive(options, base):
+    for path in options.profiles:
+        out = options.output if options.output and len(options.profiles) == 1 else os.path.splitext(path)[0] + ".hgprof"
+        write_archive(read_reports(path), out, options.codec)
+        print(f"{path} -> {out} ({os.path.getsize(path) // 1024} KB -> {os.path.getsize(out) // 1024} KB)")
+    return 0
+
+
+def cmd_replay(options, base):
+    reports = Launcher(base).expand_replays(read_reports(options.profile))
+    out = options.output or os.path.splitext(options.profile)[0] + "-replayed.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(reports, f)
+    print(f"{options.profile} -> {out}")
+    return 0
+
+
+def cmd_ingest(options, base):
+    launcher = Launcher(base)
+    for path in options.profiles:
+        if launcher.ingest(options.bots, profile=path) is None:
+            print(f"{path}: already stored or empty")
+    return 0
+
+
+def cmd_history(options, base):
+    path = Launcher(base).results_db
+    if not os.path.exists(path):
+        print(f"No results stored yet ({path})", file=sys.stderr)
+        return 1
+    store = ResultsStore(path)
+    rows = store.history(name=options.bot, stage_key=options.stage, limit=options.limit)
+    store.close()
+    for row in rows:
+        mean = f"{row['mean_score']:.1f}" if row["mean_score"] is not None else "-"
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["timestamp"]))
+        print(f"{when}  {row['stage_key'] or '-':<16} {row['name'] or '-':<20} {row['bot_hash'][:10]}  "
+              f"rounds {row['rounds']:>4}  mean {mean:>8}  dq {row['disqualified']}")
+    return 0
+
+
+def cmd_analyze(options, base):
+    print(format_summary(load_profile(options.profile)))
+    return 0
+
+
+def cmd_compare(options, base):
+    print(format_comparison(compare_profiles(load_profile(options.a), load_profile(options.b))))
+    return 0
+
+
+def cmd_heatmap(options, base):
+    heatmaps = aggregate_heatmaps(options.profile, workers=options.workers)
+    if heatmaps is None:
+        print("no rounds with a debug protocol (run with --enable-debug)")
+        return 1
+    print(f"{heatmaps['rounds']} rounds, {heatmaps['width']}x{heatmaps['height']}, "
+          f"{heatmaps['skipped']} skipped (other map size), {heatmaps['no_protocol']} without debug protocol")
+    for name in HEATMAP_LAYERS:
+        grid = heatmaps[name]
+        top = sorted(((int(grid[y, x]), x, y) for y, x in zip(*grid.nonzero())), reverse=True)[:options.top]
+        print(f"{name:<9} total {int(grid.sum()):>9}  top: " + ", ".join(f"({x},{y}) {n}" for n, x, y in top))
+    if options.output:
+        import numpy as np
+        # savez appends .npz itself, so name the file it really writes
+        output = options.output if options.output.endswith(".npz") else options.output + ".npz"
+        np.savez_compressed(output, **{name: heatmaps[name] for name in HEATMAP_LAYERS})
+        print(f"saved {output}")
+    return 0
+
+
+def cmd_bench_startup(options, base):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    script = os.path.join(base, "run.py")
+    
+    def measure(cmd):
+        times = []
+        for _ in range(options.runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, env=env, check=True, stdout=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        return {"min_s": times[0], "median_s": times[len(times) // 2], "max_s": times[-1]}
+    
+    result = {
+        "runs": options.runs,
+        "python": measure([sys.executable, "-c", "pass"]),
+        "headless": measure([sys.executable, script, "--headless", "--help"]),
+        "gui_first_show": measure([sys.executable, script, "--startup-probe"]),
+    }
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def cmd_bench_gui(options, base):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import hg_bench
+    layers = [x for x in options.layers.split(",") if x]
+    unknown = set(layers) - set(hg_bench.LAYERS)
+    if unknown:
+        print(f"Unknown layers: {', '.join(sorted(unknown))} (known: {', '.join(hg_bench.LAYERS)})", file=sys.stderr)
+        return 2
+    params = {"width": options.width, "height": options.height, "ticks": options.ticks,
+              "rounds": options.rounds, "bots": options.bots, "layers": layers}
+    result = hg_bench.run(params, options.repeat, options.frames, archive=options.archive, base=base)
+    text = json.dumps(result, indent=2)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    if options.compare:
+        with open(options.compare, "r", encoding="utf-8") as f:
+            print("\n".join(hg_bench.compare(json.load(f), result)))
+    return 0
+
+
+def main(argv=None, base=None):
+    base = base or os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(prog="run.py --headless", description="Hidden Gems launcher without GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = commands.add_parser("run", help="run the (patched) runner in the foreground")
+    run_parser.add_argument("--preset", help="stage from stages.yaml or customstages.yaml")
+    add_settings_arguments(run_parser)
+    run_parser.add_argument("--rerun", metavar="PROFILE", help="play only rounds selected from PROFILE, with debug on")
+    run_parser.add_argument("--select", choices=ROUND_SELECTIONS, default="worst", help="rounds to re-run (default: worst)")
+    run_parser.add_argument("--worst", type=int, default=10, help="number of rounds for --select worst")
+    run_parser.add_argument("bots", nargs="+", help="bot folders")
+    run_parser.set_defaults(handler=cmd_run)
+    
+    seeds_parser = commands.add_parser("seeds", help="print the round seeds a run with these settings will play")
+    seeds_parser.add_argument("--preset", help="stage from stages.yaml or customstages.yaml")
+    add_settings_arguments(seeds_parser)
+    seeds_parser.set_defaults(handler=cmd_seeds)
+    
+    patch_parser = commands.add_parser("patch", help="generate runner_patched.rb from runner.rb")
+    patch_parser.add_argument("--force", action="store_true", help="regenerate even if up to date")
+    patch_parser.set_defaults(handler=cmd_patch)
+    
+    worker_parser = commands.add_parser("worker", help="run round shards for a multi-core run started with --coordinator")
+    worker_parser.add_argument("coordinator", help="HOST:PORT of the coordinating runner")
+    worker_parser.add_argument("--threads", type=int, default=0, help="rounds to run in parallel on this host (0: auto)")
+    worker_parser.add_argument("bots", nargs="+", help="bot folders on this host, same order as on the coordinator")
+    worker_parser.set_defaults(handler=cmd_worker)
+    
+    archive_parser = commands.add_parser("archive", help="convert profile JSON files to compressed .hgprof archives")
+    archive_parser.add_argument("profiles", nargs="+")
+    archive_parser.add_argument("-o", "--output", help="output path (single profile only)")
+    archive_parser.add_argument("--codec", choices=("zstd", "gzip"), help="default: zstd if installed, else gzip")
+    archive_parser.set_defaults(handler=cmd_archive)
+    
+    replay_parser = commands.add_parser("replay", help="re-simulate the rounds of a --replay-debug profile into a full debug profile")
+    replay_parser.add_argument("profile")
+    replay_parser.add_argument("-o", "--output", help="default: <profile>-replayed.json")
+    replay_parser.set_defaults(handler=cmd_replay)
+    
+    ingest_parser = commands.add_parser("ingest", help="store profile JSON files in results.sqlite")
+    ingest_parser.add_argument("profiles", nargs="+")
+    ingest_parser.add_argument("--bots", nargs="*", default=[], help="bot folders of the run, in order, for bot hashes")
+    ingest_parser.set_defaults(handler=cmd_ingest)
+    
+    history_parser = commands.add_parser("history", help="list stored runs from results.sqlite")
+    history_parser.add_argument("--bot", help="bot name")
+    history_parser.add_argument("--stage", help="stage key")
+    history_parser.add_argument("--limit", type=int, default=50)
+    history_parser.set_defaults(handler=cmd_history)
+    
+    analyze_parser = commands.add_parser("analyze", help="print profile analytics")
+    analyze_parser.add_argument("profile", nargs="?", default=os.path.join(base, "last_profile.json"))
+    analyze_parser.set_defaults(handler=cmd_analyze)
+    
+    compare_parser = commands.add_parser("compare", help="paired per-seed comparison of two profiles")
+    compare_parser.add_argument("a")
+    compare_parser.add_argument("b")
+    compare_parser.set_defaults(handler=cmd_compare)
+
+    heatmap_parser = commands.add_parser("heatmap", help="visit, capture and gem spawn counts summed over all rounds and bots")
+    heatmap_parser.add_argument("profile", nargs="?", default=os.path.join(base, "last_profile.json"))
+    heatmap_parser.add_argument("--workers", type=int, help="processes for .hgprof archives (default: CPU count)")
+    heatmap_parser.add_argument("--top", type=int, default=5, help="cells listed per layer (default: 5)")
+    heatmap_parser.add_argument("-o", "--output", help="save the grids as .npz")
+    heatmap_parser.set_defaults(handler=cmd_heatmap)
+    
+    bench_parser = commands.add_parser("bench-startup", help="measure cold start of the GUI and the headless CLI")
+    bench_parser.add_argument("--runs", type=int, default=5)
+    bench_parser.set_defaults(handler=cmd_bench_startup)
+    
+    bench_gui_parser = commands.add_parser("bench-gui", help="time profile load, round build, tick scrub and maze painting on a synthetic profile")
+    bench_gui_parser.add_argument("--width", type=int, default=19)
+    bench_gui_parser.add_argument("--height", type=int, default=19)
+    bench_gui_parser.add_argument("--ticks", type=int, default=1000)
+    bench_gui_parser.add_argument("--rounds", type=int, default=2)
+    bench_gui_parser.add_argument("--bots", type=int, default=1)
+    bench_gui_parser.add_argument("--layers", default="fov,influence,gem_prediction,debug_json,gems",
+                                  help="comma separated debug layers to generate (empty: none)")
+    bench_gui_parser.add_argument("--archive", action="store_true", help="load the profile as .hgprof instead of JSON")
+    bench_gui_parser.add_argument("--repeat", type=int, default=3)
+    bench_gui_parser.add_argument("--frames", type=int, default=50, help="ticks painted per paint measurement")
+    bench_gui_parser.add_argument("-o", "--output", help="also write the JSON result here")
+    bench_gui_parser.add_argument("--compare", help="earlier bench-gui JSON to print median changes against")
+    bench_gui_parser.set_defaults(handler=cmd_bench_gui)
+    
+    options = parser.parse_args(argv)
+    return options.handler(options, base)
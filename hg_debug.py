@@ -0,0 +1,1282 @@
+"""Debug dock and visualizer widgets, imported on first use by hg_gui."""
+import os
+import html
+import time
+import threading
+import concurrent.futures
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QTextEdit, QComboBox,
+    QHBoxLayout, QListWidget, QListWidgetItem, QCheckBox, QSlider, QTableWidget, QTableWidgetItem, QSpinBox,
+    QGridLayout
+)
+from PySide6.QtCore import Qt, QRectF, QPointF, Signal, QTimer
+from PySide6.QtGui import QColor, QPainter, QPen, QBrush, QFontDatabase, QImage
+
+import numpy as np
+import pyqtgraph as pg
+
+from hg_core import (
+    decode_ns_column, response_time_outliers, ProfileAnalytics,
+    load_profile, compare_profiles, DebugModel, ResultsStore, INSTRUMENTATION, instrumented, select_rounds,
+    StderrPages, aggregate_heatmaps
+)
+
+
+def safe_disconnect(signal):
+    """Safely disconnect a Qt signal without crashes on Linux."""
+    try:
+        signal.disconnect()
+    except (TypeError, RuntimeError):
+        pass
+
+
+class DebugDock(QWidget):
+    BACKGROUND = "#181818"
+    TEXT = "#cccccc"
+    YELLOW = "#d7d5a3"
+    GREEN = "#4ec9b0"
+    GRAY = "#6e7681"
+    STRING = "#ce9178"
+    GEM_TTL = 300
+    RERUN_MODES = (("Worst N", "worst"), ("Disqualified", "disqualified"), ("Outliers", "outliers"),
+                   ("Selected Round", "selected"))
+    # round seeds to play again with the debug protocol on
+    rerun_requested = Signal(list)
+
+    def __init__(self):
+        super().__init__()
+        self.debug = None
+        self.path = ""
+        self.analytics = None
+        self.other = None
+        self.other_path = ""
+        
+        main_layout = QHBoxLayout(self)
+        left_layout = QVBoxLayout()
+        right_layout = QVBoxLayout()
+        
+        self.open_button = QPushButton("Open JSON")
+        self.reload_button = QPushButton("Reload")
+        self.compare_button = QPushButton("Compare...")
+        self.open_button.clicked.connect(self.open)
+        self.reload_button.clicked.connect(self.reload)
+        self.compare_button.clicked.connect(self.open_comparison)
+        
+        left_layout.addWidget(self.open_button)
+        left_layout.addWidget(self.reload_button)
+        left_layout.addWidget(self.compare_button)
+        
+        rerun_layout = QHBoxLayout()
+        self.rerun_mode = QComboBox()
+        for label, _ in self.RERUN_MODES:
+            self.rerun_mode.addItem(label)
+        self.rerun_count = QSpinBox()
+        self.rerun_count.setRange(1, 999)
+        self.rerun_count.setValue(10)
+        rerun_layout.addWidget(self.rerun_mode)
+        rerun_layout.addWidget(self.rerun_count)
+        left_layout.addLayout(rerun_layout)
+        self.rerun_button = QPushButton("Re-run with Debug")
+        self.rerun_button.clicked.connect(self.request_rerun)
+        left_layout.addWidget(self.rerun_button)
+        
+        self.list = QListWidget()
+        self.list.currentRowChanged.connect(self.on_selection_changed)
+        left_layout.addWidget(self.list)
+        
+        self.text = QTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setStyleSheet(
+            f"background:{self.BACKGROUND};color:{self.TEXT};font-family:Consolas;"
+        )
+        right_layout.addWidget(self.text)
+        
+        # pages of a round's full stderr log when the runner spilled it (--stderr-spill)
+        self.stderr_pages = None
+        self.stderr_page = 0
+        self.stderr_round = 0
+        stderr_layout = QHBoxLayout()
+        self.stderr_prev = QPushButton("◀")
+        self.stderr_next = QPushButton("▶")
+        self.stderr_label = QLabel()
+        self.stderr_back = QPushButton("Round Info")
+        self.stderr_prev.clicked.connect(lambda: self.show_stderr_page(self.stderr_page - 1))
+        self.stderr_next.clicked.connect(lambda: self.show_stderr_page(self.stderr_page + 1))
+        self.stderr_back.clicked.connect(lambda: self.show_round(self.stderr_round))
+        stderr_layout.addWidget(self.stderr_prev)
+        stderr_layout.addWidget(self.stderr_label)
+        stderr_layout.addWidget(self.stderr_next)
+        stderr_layout.addStretch()
+        stderr_layout.addWidget(self.stderr_back)
+        self.stderr_bar = QWidget()
+        self.stderr_bar.setLayout(stderr_layout)
+        self.stderr_bar.setVisible(False)
+        right_layout.addWidget(self.stderr_bar)
+        
+        self.plots = pg.GraphicsLayoutWidget()
+        self.plots.setBackground(self.BACKGROUND)
+        self.plots.setMinimumHeight(240)
+        self.plots.setVisible(False)
+        right_layout.addWidget(self.plots)
+        
+        main_layout.addLayout(left_layout)
+        main_layout.addLayout(right_layout)
+
+    def span(self, text, color):
+        return f'<span style="color:{color}">{text}</span>'
+    def open(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Open Profile", "", "Profiles (*.json *.hgprof);;All (*.*)"
+        )
+        if path:
+            self.load(path)
+
+    def reload(self):
+        if self.path:
+            self.load(self.path)
+
+    @instrumented("DebugDock.load")
+    def load(self, path):
+        try:
+            self.debug = load_profile(path)
+            self.path = path
+            self.populate()
+        except:
+            pass
+
+    def open_comparison(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Compare with Profile", "", "Profiles (*.json *.hgprof);;All (*.*)"
+        )
+        if path:
+            self.load_comparison(path)
+
+    def load_comparison(self, path):
+        try:
+            self.other = load_profile(path)
+            self.other_path = path
+        except:
+            return
+        self.populate()
+        self.list.setCurrentRow(self.list.count() - 1)
+
+    def request_rerun(self):
+        rounds = self.debug.get("rounds", []) if self.debug else []
+        mode = self.RERUN_MODES[self.rerun_mode.currentIndex()][1]
+        if mode == "selected":
+            row = self.list.currentRow() - 1
+            indices = [row] if 0 <= row < len(rounds) else []
+        else:
+            indices = select_rounds(rounds, mode, self.rerun_count.value())
+        seeds = [rounds[i]["seed"] for i in indices if rounds[i].get("seed")]
+        if seeds:
+            self.rerun_requested.emit(seeds)
+        else:
+            self.text.setHtml(self.span(f"No rounds to re-run ({self.rerun_mode.currentText()})", self.GRAY))
+
+    def populate(self):
+        self.list.clear()
+        self.analytics = None
+        if not self.debug:
+            return
+        
+        rounds = self.debug.get("rounds", [])
+        self.list.addItem("Overview")
+        for i in range(len(rounds)):
+            self.list.addItem(f"Round {i+1}")
+        self.list.addItem("Analytics")
+        if self.other:
+            self.list.addItem("Comparison")
+        self.list.setCurrentRow(0)
+        self.show_overview()
+
+    def on_selection_changed(self, index):
+        if not self.debug:
+            return
+        
+        num_rounds = len(self.debug.get("rounds", []))
+        self.plots.setVisible(False)
+        self.stderr_bar.setVisible(False)
+        if index == 0:
+            self.show_overview()
+        elif 1 <= index <= num_rounds:
+            self.show_round(index - 1)
+        elif index == num_rounds + 1:
+            self.show_analytics()
+        elif index == num_rounds + 2 and self.other:
+            self.show_comparison()
+    def show_overview(self):
+        d = self.debug
+        html_parts = []
+        
+        timestamp = time.asctime(time.gmtime(d.get("timestamp", 0)))
+        html_parts.append(self.span(timestamp, self.GRAY) + "<br>")
+        
+        stage_key = self.span(d.get("stage_key", ""), self.GRAY)
+        stage_title = self.span(d.get("stage_title", ""), self.GRAY)
+        html_parts.append(f"{stage_key} {stage_title}<br><br>")
+        
+        html_parts.append(
+            self.span("Seed: ", self.YELLOW) + 
+            self.span(str(d.get("seed", "")), self.STRING) + "<br>"
+        )
+        html_parts.append(
+            self.span("Name: ", self.YELLOW) + 
+            self.span(f"{d.get('name', '')} [{d.get('emoji', '')}]", self.GREEN) + "<br>"
+        )
+        html_parts.append(
+            self.span("Score: ", self.YELLOW) + str(d.get("total_score", "")) + "<br>"
+        )
+        
+        if d.get("gem_utilization_cv") is not None:
+            gu_mean = round(d.get("gem_utilization_mean"), 2)
+            gu_cv = round(d.get("gem_utilization_cv"), 2)
+            floor_cov = round(d.get("floor_coverage_mean"), 2)
+            html_parts.append(self.span("GU mean: ", self.YELLOW) + f"{gu_mean}%<br>")
+            html_parts.append(self.span("GU cv: ", self.YELLOW) + f"{gu_cv}<br>")
+            html_parts.append(self.span("Floor Coverage: ", self.YELLOW) + f"{floor_cov}%<br>")
+        
+        adaptive = d.get("adaptive")
+        if adaptive:
+            completed = f"{adaptive.get('rounds_completed')}/{adaptive.get('rounds_requested')} rounds"
+            if adaptive.get("stopped_early"):
+                html_parts.append(
+                    self.span("Stopped early: ", self.YELLOW) + 
+                    self.span(f"{completed}, {adaptive.get('reason')}", self.STRING) + "<br>"
+                )
+            else:
+                html_parts.append(
+                    self.span("Adaptive: ", self.YELLOW) + 
+                    self.span(f"{completed}, no stopping rule fired", self.GRAY) + "<br>"
+                )
+        
+        scheduler = d.get("scheduler")
+        if scheduler:
+            workers = scheduler.get("workers", [])
+            mean_util = sum(w.get("utilization", 0) for w in workers) / len(workers) * 100 if workers else 0
+            html_parts.append(
+                self.span("Scheduler: ", self.YELLOW) + 
+                f"{scheduler.get('threads')} threads{' (auto)' if scheduler.get('auto') else ''}, "
+                f"wall {scheduler.get('wall_s', 0):.1f} s, mean utilization {mean_util:.0f}%<br>"
+            )
+            for w in workers:
+                html_parts.append(
+                    "&nbsp;&nbsp;" + self.span(w.get("name", ""), self.GRAY) + 
+                    f" {w.get('rounds')} rounds, busy {w.get('busy_s', 0):.1f} s ({w.get('utilization', 0) * 100:.0f}%)<br>"
+                )
+        
+        pool = d.get("container_pool")
+        if pool:
+            start_ms = pool.get("start_ms") or []
+            mean_start = f", start {sum(start_ms) / len(start_ms):.0f} ms" if start_ms else ""
+            html_parts.append(
+                self.span("Container pool: ", self.YELLOW) + 
+                f"{pool.get('image')}, {pool.get('hits')} hits / {pool.get('misses')} misses{mean_start}<br>"
+            )
+        
+        html_parts.append(
+            self.span("Git Hash: ", self.YELLOW) + 
+            self.span(d.get("git_hash", ""), self.STRING)
+        )
+        
+        self.text.setHtml("<html><body>" + "".join(html_parts) + "</body></html>")
+    def show_round(self, round_index):
+        r = self.debug["rounds"][round_index]
+        rt = r.get("response_time_stats", {})
+        html_parts = []
+        
+        html_parts.append(self.span(f"Round {round_index + 1}", self.GRAY) + "<br><br>")
+        html_parts.append(
+            self.span("Seed: ", self.YELLOW) + 
+            self.span(str(r.get("seed", "")), self.STRING) + "<br>"
+        )
+        html_parts.append(
+            self.span("Score: ", self.YELLOW) + str(r.get("score", "")) + "<br>"
+        )
+        
+        if r.get("gem_utilization") is not None:
+            html_parts.append(
+                self.span("GU: ", self.YELLOW) + f"{r['gem_utilization']}%<br>"
+            )
+            html_parts.append(
+                self.span("Floor Coverage: ", self.YELLOW) + f"{r['floor_coverage']}%<br>"
+            )
+        
+        first_capture = r.get("ticks_to_first_capture")
+        html_parts.append(
+            self.span("First capture: ", self.YELLOW) + 
+            self.span(f"tick {first_capture}", self.GRAY) + "<br>"
+        )
+        
+        if r.get("disqualified_for") is not None:
+            html_parts.append(
+                self.span("Disqualified for: ", self.YELLOW) + 
+                self.span(str(r["disqualified_for"]), self.STRING) + "<br>"
+            )
+        
+        startup = r.get("bot_startup")
+        if startup:
+            html_parts.append(
+                self.span("Bot startup: ", self.YELLOW) + 
+                self.span(f"{startup.get('startup_ms')} ms ({'warm' if startup.get('warm') else 'cold'})", self.GRAY) + "<br>"
+            )
+            container = startup.get("container")
+            if container:
+                html_parts.append(
+                    self.span("Container: ", self.YELLOW) + 
+                    self.span("pool hit" if container.get("hit") else f"pool miss, started in {container.get('start_ms')} ms", self.GRAY) + "<br>"
+                )
+        
+        html_parts.append("<br>" + self.span("Response times:", self.YELLOW) + "<br>")
+        for key in ["first", "min", "median", "max"]:
+            ns_value = rt.get(key, 0)
+            ms = round(ns_value / 1_000_000, 2) if ns_value is not None else 0
+            html_parts.append(
+                self.span(f"{key}: ", self.YELLOW) + 
+                self.span(f"{ms} ms", self.GRAY) + "<br>"
+            )
+        
+        times_ns = decode_ns_column(r.get("response_times_ns"))
+        if times_ns is not None and len(times_ns):
+            p95, p99, spikes = response_time_outliers(times_ns)
+            html_parts.append(
+                self.span("p95: ", self.YELLOW) + 
+                self.span(f"{round(p95 / 1_000_000, 2)} ms", self.GRAY) + "<br>"
+            )
+            html_parts.append(
+                self.span("p99: ", self.YELLOW) + 
+                self.span(f"{round(p99 / 1_000_000, 2)} ms", self.GRAY) + "<br>"
+            )
+            html_parts.append(
+                self.span("Spikes: ", self.YELLOW) + 
+                self.span(", ".join(str(i) for i in spikes[:20]) or "-", self.STRING) + "<br>"
+            )
+        
+        samples = r.get("resource_samples")
+        if samples and samples.get("tick"):
+            html_parts.append("<br>" + self.span("Resources:", self.YELLOW) + "<br>")
+            html_parts.append(
+                self.span("CPU time: ", self.YELLOW) + 
+                self.span(f"{samples['cpu_ms'][-1]} ms", self.GRAY) + "<br>"
+            )
+            html_parts.append(
+                self.span("Peak RSS: ", self.YELLOW) + 
+                self.span(f"{round(max(samples['rss_kb']) / 1024, 1)} MB", self.GRAY) + "<br>"
+            )
+            html_parts.append(
+                self.span("RSS growth: ", self.YELLOW) + 
+                self.span(f"{round((samples['rss_kb'][-1] - samples['rss_kb'][0]) / 1024, 1)} MB", self.GRAY) + "<br>"
+            )
+            self.show_resources(samples)
+        
+        if r.get("gem_utilization"):
+            gu = r["gem_utilization"]
+            estimated_gems = round(r["score"] / gu * 100 / self.GEM_TTL) if gu else 0
+            avg_score = round(r["score"] / estimated_gems, 2) if estimated_gems else 0
+            html_parts.append("<br>" + self.span("Gems spawned: ", self.YELLOW) + str(estimated_gems) + "<br>")
+            html_parts.append(self.span("Mean gem score: ", self.YELLOW) + str(avg_score) + "<br>")
+            html_parts.append(
+                self.span("Capture mean: ", self.YELLOW) + 
+                self.span(f"{round(self.GEM_TTL - avg_score, 2)} ticks", self.GRAY)
+            )
+        
+        log = r.get("stderr_log")
+        if log or r.get("stderr_bytes"):
+            html_parts.append("<br><br>" + self.span("Stderr: ", self.YELLOW) + self.span(f"{r.get('stderr_bytes', len(log or ''))} bytes", self.GRAY) + "<br>")
+            if log:
+                html_parts.append(f'<pre style="color:{self.GRAY}">{html.escape(log)}</pre>')
+        self.show_stderr_bar(round_index, r.get("stderr_file"))
+        
+        self.text.setHtml("<html><body>" + "".join(html_parts) + "</body></html>")
+
+    def show_stderr_bar(self, round_index, path):
+        self.stderr_pages = None
+        self.stderr_round = round_index
+        if path:
+            # relative to the runner directory, which is the launcher directory
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        if path and os.path.exists(path):
+            self.stderr_pages = StderrPages(path)
+            self.stderr_page = -1
+            self.stderr_label.setText(f"Full stderr: {len(self.stderr_pages)} pages")
+        self.stderr_prev.setEnabled(False)
+        self.stderr_next.setEnabled(self.stderr_pages is not None)
+        self.stderr_back.setEnabled(False)
+        self.stderr_bar.setVisible(self.stderr_pages is not None)
+
+    def show_stderr_page(self, page):
+        pages = self.stderr_pages
+        if pages is None or not 0 <= page < len(pages):
+            return
+        self.stderr_page = page
+        self.stderr_label.setText(f"Full stderr: page {page + 1}/{len(pages)}")
+        self.stderr_prev.setEnabled(page > 0)
+        self.stderr_next.setEnabled(page + 1 < len(pages))
+        self.stderr_back.setEnabled(True)
+        self.text.setHtml(f'<html><body><pre style="color:{self.TEXT}">{html.escape(pages.page(page))}</pre></body></html>')
+
+    def show_resources(self, samples):
+        ticks = np.asarray(samples["tick"], dtype=float)
+        cpu_ms = np.asarray(samples["cpu_ms"], dtype=float)
+        rss_mb = np.asarray(samples["rss_kb"], dtype=float) / 1024
+        self.plots.clear()
+        
+        cpu_plot = self.plots.addPlot(row=0, col=0, title="CPU ms / tick")
+        if len(ticks) > 1:
+            cpu_per_tick = np.diff(cpu_ms) / np.maximum(np.diff(ticks), 1)
+            cpu_plot.plot(ticks[1:], cpu_per_tick, pen=pg.mkPen(self.GREEN))
+        cpu_plot.showGrid(x=True, y=True, alpha=0.2)
+        
+        rss_plot = self.plots.addPlot(row=1, col=0, title="RSS MB")
+        rss_plot.plot(ticks, rss_mb, pen=pg.mkPen(self.STRING))
+        rss_plot.showGrid(x=True, y=True, alpha=0.2)
+        rss_plot.setXLink(cpu_plot)
+        self.plots.setVisible(True)
+
+    def show_analytics(self):
+        d = self.debug
+        total = d.get("total_score", 0)
+        rounds = d.get("rounds", [])
+        html_parts = []
+        
+        html_parts.append(self.span("Score: ", self.YELLOW) + str(total) + "<br>")
+        
+        if len(rounds) > 1:
+            if self.analytics is None:
+                self.analytics = ProfileAnalytics(d)
+            
+            gu_mean = d.get("gem_utilization_mean", 1)
+            total_gems_value = total / gu_mean * 100
+            estimated_gems = int(round(total_gems_value / self.GEM_TTL)) if gu_mean else 0
+            avg_gem_score = round(total / estimated_gems, 2) if estimated_gems else 0
+            
+            html_parts.append(self.span("Rounds: ", self.YELLOW) + str(self.analytics.n) + "<br>")
+            html_parts.append(self.span("Disqualified: ", self.YELLOW) + str(int(self.analytics.disqualified.sum())) + "<br>")
+            html_parts.append(self.span("Total gems: ", self.YELLOW) + str(estimated_gems) + "<br>")
+            html_parts.append(self.span("Mean gem score: ", self.YELLOW) + str(avg_gem_score) + "<br>")
+            html_parts.append(
+                self.span("Capture mean: ", self.YELLOW) + 
+                self.span(f"{round(self.GEM_TTL - avg_gem_score, 2)} ticks", self.GRAY)
+            )
+            self.show_distributions()
+        
+        self.text.setHtml("<html><body>" + "".join(html_parts) + "</body></html>")
+
+    def show_distributions(self):
+        analytics = self.analytics
+        self.plots.clear()
+        for i, (name, title) in enumerate(ProfileAnalytics.PLOTS):
+            summary = analytics.summary(name)
+            if summary is None:
+                continue
+            counts, edges = analytics.histogram(name)
+            plot = self.plots.addPlot(row=i // 3, col=i % 3)
+            plot.setTitle(
+                f"{title}<br><span style='font-size:8pt'>"
+                f"mean {summary['mean']:.4g} [{summary['ci'][0]:.4g}, {summary['ci'][1]:.4g}] · "
+                f"p5 {summary['p5']:.4g} · p50 {summary['p50']:.4g} · p95 {summary['p95']:.4g}</span>"
+            )
+            plot.addItem(pg.BarGraphItem(
+                x0=edges[:-1], x1=edges[1:], height=counts,
+                brush=pg.mkBrush(self.GREEN), pen=pg.mkPen(self.BACKGROUND)
+            ))
+            plot.addItem(pg.LinearRegionItem(
+                values=summary["ci"], movable=False, brush=pg.mkBrush(215, 213, 163, 60)
+            ))
+            for key in ("p5", "p50", "p95"):
+                plot.addItem(pg.InfiniteLine(
+                    pos=summary[key], angle=90, pen=pg.mkPen(self.STRING, style=Qt.DashLine)
+                ))
+        self.plots.setVisible(True)
+
+    def show_comparison(self):
+        c = compare_profiles(self.debug, self.other)
+        html_parts = []
+        html_parts.append(self.span(f"A: {os.path.basename(self.path)}", self.GRAY) + "<br>")
+        html_parts.append(self.span(f"B: {os.path.basename(self.other_path)}", self.GRAY) + "<br><br>")
+        html_parts.append(
+            self.span("Paired rounds: ", self.YELLOW) + str(c["n"]) +
+            self.span(f" (unmatched A {c['unmatched_a']}, B {c['unmatched_b']})", self.GRAY) + "<br>"
+        )
+        if not c["n"]:
+            self.text.setHtml("<html><body>" + "".join(html_parts) + "</body></html>")
+            return
+        
+        html_parts.append(self.span("Mean A / B: ", self.YELLOW) + f"{round(c['mean_a'], 2)} / {round(c['mean_b'], 2)}<br>")
+        html_parts.append(self.span("Mean delta: ", self.YELLOW) + f"{round(c['mean_delta'], 2)}<br>")
+        html_parts.append(self.span("Median delta: ", self.YELLOW) + f"{round(c['median_delta'], 2)}<br>")
+        html_parts.append(
+            self.span("B wins / losses / ties: ", self.YELLOW) + f"{c['wins']} / {c['losses']} / {c['ties']}<br>"
+        )
+        html_parts.append(self.span("Sign test p: ", self.YELLOW) + self.span(f"{c['sign_p']:.4g}", self.STRING) + "<br>")
+        html_parts.append(self.span("Wilcoxon p: ", self.YELLOW) + self.span(f"{c['wilcoxon_p']:.4g}", self.STRING) + "<br>")
+        needed = c["rounds_needed"]
+        html_parts.append(
+            self.span("Rounds for significance: ", self.YELLOW) + 
+            self.span(str(needed) if needed is not None else "-", self.GRAY) + "<br>"
+        )
+        
+        if c["worst"]:
+            html_parts.append("<br>" + self.span("Worst regressions:", self.YELLOW) + "<br>")
+            for seed, score_a, score_b, delta in c["worst"]:
+                html_parts.append(
+                    self.span(str(seed), self.STRING) + 
+                    self.span(f" {score_a} → {score_b} ({delta:+g})", self.GRAY) + "<br>"
+                )
+        
+        self.text.setHtml("<html><body>" + "".join(html_parts) + "</body></html>")
+        
+        deltas = c["deltas"]
+        counts, edges = np.histogram(deltas, bins=min(40, max(1, len(deltas))))
+        self.plots.clear()
+        plot = self.plots.addPlot(title="Score delta B − A per seed")
+        plot.addItem(pg.BarGraphItem(
+            x0=edges[:-1], x1=edges[1:], height=counts,
+            brush=pg.mkBrush(self.GREEN), pen=pg.mkPen(self.BACKGROUND)
+        ))
+        plot.addItem(pg.InfiniteLine(pos=0, angle=90, pen=pg.mkPen(self.GRAY)))
+        plot.addItem(pg.InfiniteLine(pos=c["mean_delta"], angle=90, pen=pg.mkPen(self.STRING, style=Qt.DashLine)))
+        self.plots.setVisible(True)
+
+class HistoryPanel(QWidget):
+    """Score trends across stored runs, queried from results.sqlite."""
+    COLORS = ("#4ec9b0", "#d7d5a3", "#ce9178", "#569cd6", "#c586c0", "#6a9955", "#d16969", "#b5cea8")
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Run History")
+        self.resize(1000, 700)
+        self.store = ResultsStore(db_path)
+        
+        layout = QVBoxLayout(self)
+        filters = QHBoxLayout()
+        self.bot_combo = QComboBox()
+        self.stage_combo = QComboBox()
+        self.refresh_button = QPushButton("Refresh")
+        filters.addWidget(QLabel("Bot:"))
+        filters.addWidget(self.bot_combo, 2)
+        filters.addWidget(QLabel("Stage:"))
+        filters.addWidget(self.stage_combo, 1)
+        filters.addWidget(self.refresh_button)
+        layout.addLayout(filters)
+        
+        self.plot = pg.PlotWidget(axisItems={"bottom": pg.DateAxisItem()})
+        self.plot.setLabel("left", "Mean score per round")
+        self.plot.addLegend()
+        layout.addWidget(self.plot, 2)
+        
+        self.table = QTableWidget()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table, 1)
+        
+        self.bot_combo.currentIndexChanged.connect(self.update_view)
+        self.stage_combo.currentIndexChanged.connect(self.update_view)
+        self.refresh_button.clicked.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        bot, stage = self.bot_combo.currentData(), self.stage_combo.currentData()
+        for combo in (self.bot_combo, self.stage_combo):
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("All", None)
+        for digest, name, runs, _ in self.store.bots():
+            self.bot_combo.addItem(f"{name or '?'} · {digest.replace('name:', '')[:8]} · {runs} runs", digest)
+        for stage_key in self.store.stages():
+            self.stage_combo.addItem(stage_key, stage_key)
+        for combo, value in ((self.bot_combo, bot), (self.stage_combo, stage)):
+            index = combo.findData(value)
+            combo.setCurrentIndex(max(index, 0))
+            combo.blockSignals(False)
+        self.update_view()
+
+    def update_view(self):
+        rows = self.store.history(bot_hash=self.bot_combo.currentData(), stage_key=self.stage_combo.currentData())
+        
+        self.plot.clear()
+        series = {}
+        for row in rows:
+            if row["mean_score"] is not None:
+                series.setdefault((row["name"], row["bot_hash"]), []).append((row["timestamp"], row["mean_score"]))
+        # the most recently active bot versions get a curve each
+        latest = sorted(series, key=lambda key: series[key][-1][0], reverse=True)[:len(self.COLORS)]
+        for color, key in zip(self.COLORS, latest):
+            x, y = zip(*series[key])
+            self.plot.plot(
+                x, y, pen=pg.mkPen(color, width=2), symbol="o", symbolSize=5, symbolBrush=color,
+                name=f"{key[0] or '?'} {key[1].replace('name:', '')[:8]}"
+            )
+        
+        headers = ["Time", "Stage", "Bot", "Hash", "Rounds", "Mean score", "GU %", "Floor %", "DQ"]
+        self.table.clear()
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(reversed(rows)):
+            values = [
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(row["timestamp"])),
+                row["stage_key"] or "-",
+                f"{row['emoji'] or ''} {row['name'] or '?'}",
+                row["bot_hash"].replace("name:", "")[:8],
+                row["rounds"],
+                f"{row['mean_score']:.1f}" if row["mean_score"] is not None else "-",
+                f"{row['gem_utilization_mean']:.1f}" if row["gem_utilization_mean"] is not None else "-",
+                f"{row['floor_coverage_mean']:.1f}" if row["floor_coverage_mean"] is not None else "-",
+                row["disqualified"],
+            ]
+            for j, value in enumerate(values):
+                self.table.setItem(i, j, QTableWidgetItem(str(value)))
+        self.table.resizeColumnsToContents()
+
+class MazeView(QWidget):
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.show_heatmap = False
+        self.show_timings = False
+        # round label painted in the corner, used by the visualizer grid
+        self.caption = ""
+        # (counts grid, (r, g, b)) of a run-level heatmap, shown instead of the round's visits
+        self.run_heatmap = None
+        self.background = None
+        self.background_key = None
+        self.image = None
+        self.image_key = None
+        self.setMinimumSize(400, 400)
+
+    def cell_image(self, width, height):
+        """Walls, floor and heatmap with one pixel per cell, drawn scaled in a single call.
+
+        The round's background is cached per round and heatmap setting, the image with the walls
+        seen so far per tick, so repaints without a tick change cost one drawImage.
+        """
+        model = self.model
+        key = (id(model), model.generation, self.show_heatmap, id(self.run_heatmap), width, height)
+        if key != self.background_key:
+            rgb = np.full((height, width, 3), 30, dtype=np.uint8)
+            counts, color = self.run_heatmap or (None, None)
+            if counts is not None and counts.shape == (height, width) and counts.max() > 0:
+                # log scale, a few hot cells of 500 rounds would wash out everything else
+                level = np.log1p(counts) / np.log1p(counts.max())
+                seen = counts > 0
+                rgb[seen] = (np.asarray(color) * level[seen, None] * 180 / 255 + 6).astype(np.uint8)
+            elif self.show_heatmap and model.visits:
+                visits = np.zeros((height, width))
+                for (x, y), n in model.visits.items():
+                    if 0 <= x < width and 0 <= y < height:
+                        visits[y, x] = n
+                seen = visits > 0
+                # red at alpha 180 over the (20, 20, 20) background
+                rgb[seen] = (6, 6, 6)
+                rgb[seen, 0] = (255 * visits[seen] / visits.max() * 180 / 255 + 6).astype(np.uint8)
+            if model.walls is not None:
+                rgb[model.walls] = 45
+            self.background, self.background_key = rgb, key
+            self.image_key = None
+        if self.image_key != (key, model.tick_index):
+            rgb = self.background
+            if model.walls is not None:
+                # walls the bot has seen up to this tick are solid, the rest of the map is dimmed
+                rgb = rgb.copy()
+                rgb[model.walls & (model.wall_ticks <= model.tick_index)] = 70
+            rgb = np.ascontiguousarray(rgb)
+            self.image = QImage(rgb.data, width, height, width * 3, QImage.Format_RGB888).copy()
+            self.image_key = (key, model.tick_index)
+        return self.image
+
+    @instrumented("paintEvent")
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        
+        width = self.model.width or 1
+        height = self.model.height or 1
+        cell_width = self.width() / width
+        cell_height = self.height() / height
+        
+        tick_data = self.model.current_tick_data()
+        painter.fillRect(self.rect(), QColor(20, 20, 20))
+        painter.drawImage(QRectF(0, 0, width * cell_width, height * cell_height), self.cell_image(width, height))
+        if tick_data:
+            fov = tick_data.get("fov") or []
+            for tile in fov:
+                if len(tile) >= 2:
+                    x, y = tile[0], tile[1]
+                    rect = QRectF(x * cell_width, y * cell_height, cell_width, cell_height)
+                    painter.fillRect(rect, QColor(255, 255, 100, 40))
+            
+            debug_extra = tick_data.get("debug_extra") or {}
+            highlights = debug_extra.get("highlight") or []
+            for item in highlights:
+                if len(item) >= 3:
+                    x, y, color = item[0], item[1], item[2]
+                    rect = QRectF(x * cell_width, y * cell_height, cell_width, cell_height)
+                    try:
+                        qcolor = QColor(color)
+                        if not qcolor.isValid():
+                            qcolor = QColor(255, 0, 255, 120)
+                    except:
+                        qcolor = QColor(255, 0, 255, 120)
+                    painter.fillRect(rect, qcolor)
+            
+            for gem in tick_data.get("gems", []):
+                gx, gy = gem
+                center_x = gx * cell_width + cell_width / 2
+                center_y = gy * cell_height + cell_height / 2
+                size = min(cell_width, cell_height) * 0.4
+                diamond = [
+                    QPointF(center_x, center_y - size),
+                    QPointF(center_x + size, center_y),
+                    QPointF(center_x, center_y + size),
+                    QPointF(center_x - size, center_y)
+                ]
+                painter.setBrush(QBrush(QColor(0, 220, 255)))
+                painter.setPen(QPen(QColor(255, 255, 255), 2))
+                painter.drawPolygon(diamond)
+            
+            trail = self.model.trail
+            if trail:
+                pen = QPen(QColor(200, 200, 200))
+                pen.setWidthF(max(1.0, min(cell_width, cell_height) * 0.15))
+                painter.setPen(pen)
+                last_pos = None
+                for pos in trail:
+                    x, y = pos
+                    center_x = x * cell_width + cell_width / 2
+                    center_y = y * cell_height + cell_height / 2
+                    if last_pos is not None:
+                        painter.drawLine(last_pos[0], last_pos[1], center_x, center_y)
+                    last_pos = (center_x, center_y)
+            
+            bot_pos = tick_data.get("bot_pos")
+            if bot_pos:
+                bx, by = bot_pos
+                rect = QRectF(bx * cell_width, by * cell_height, cell_width, cell_height)
+                painter.setBrush(QBrush(QColor(255, 220, 100)))
+                painter.setPen(QPen(QColor(0, 0, 0)))
+                painter.drawEllipse(
+                    rect.adjusted(
+                        cell_width * 0.2, cell_height * 0.2,
+                        -cell_width * 0.2, -cell_height * 0.2
+                    )
+                )
+            
+            state_delta = debug_extra.get("state_delta") or {}
+            for tile in state_delta.get("added", []):
+                if len(tile) >= 2:
+                    x, y = tile[0], tile[1]
+                    rect = QRectF(x * cell_width, y * cell_height, cell_width, cell_height)
+                    painter.fillRect(rect, QColor(0, 180, 0, 120))
+            
+            for tile in state_delta.get("removed", []):
+                if len(tile) >= 2:
+                    x, y = tile[0], tile[1]
+                    rect = QRectF(x * cell_width, y * cell_height, cell_width, cell_height)
+                    painter.fillRect(rect, QColor(180, 0, 0, 120))
+            
+            path = debug_extra.get("path") or []
+            if path:
+                pen = QPen(QColor(0, 255, 180))
+                pen.setWidthF(max(1.0, min(cell_width, cell_height) * 0.25))
+                painter.setPen(pen)
+                last_pos = None
+                for pos in path:
+                    if len(pos) < 2:
+                        continue
+                    x, y = pos[0], pos[1]
+                    center_x = x * cell_width + cell_width / 2
+                    center_y = y * cell_height + cell_height / 2
+                    if last_pos is not None:
+                        painter.drawLine(last_pos[0], last_pos[1], center_x, center_y)
+                    last_pos = (center_x, center_y)
+        
+        if self.caption:
+            painter.setPen(QPen(QColor(220, 220, 220)))
+            painter.drawText(QRectF(4, 2, self.width() - 8, 18), Qt.AlignLeft | Qt.AlignTop, self.caption)
+        if self.model.replaying:
+            painter.setPen(QPen(QColor(220, 220, 220)))
+            painter.drawText(QRectF(self.rect()), Qt.AlignCenter, "replaying…")
+        if self.show_timings:
+            self.paint_timings(painter)
+        painter.end()
+
+    def paint_timings(self, painter):
+        lines = [f"{'':<15}{'last':>8}{'mean':>8}{'p95':>8} ms"]
+        for name, s in INSTRUMENTATION.stats().items():
+            lines.append(f"{name:<15}{s['last_ms']:8.2f}{s['mean_ms']:8.2f}{s['p95_ms']:8.2f}")
+        painter.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        metrics = painter.fontMetrics()
+        box = QRectF(4, 4, max(metrics.horizontalAdvance(line) for line in lines) + 12,
+                     metrics.height() * len(lines) + 8)
+        painter.fillRect(box, QColor(0, 0, 0, 190))
+        painter.setPen(QPen(QColor(220, 220, 220)))
+        painter.drawText(box.adjusted(6, 4, -6, -4), Qt.AlignLeft | Qt.AlignTop, "\n".join(lines))
+
+class DebugVisualizerWindow(QWidget):
+    # generation of the model round whose debug_json finished decoding in the worker thread
+    debug_decoded = Signal(int)
+    GRID_SIZES = (1, 2, 3, 4)
+    # label, aggregate_heatmaps layer, color
+    RUN_HEATMAPS = (("Run Heatmap: Off", None, None), ("Run: Visits", "visits", (255, 0, 0)),
+                    ("Run: Captures", "captures", (0, 255, 120)), ("Run: Gem Spawns", "spawns", (0, 220, 255)))
+    heatmaps_ready = Signal(object)
+    # model, generation: a deferred replay finished in the replay pool
+    replay_done = Signal(object, int)
+    # at most one grid repaint per interval while scrubbing
+    SCRUB_INTERVAL_MS = 33
+
+    def __init__(self, debug_data, parent=None, replayer=None, heatmaps=None):
+        super().__init__(parent)
+        self.setWindowTitle("Hidden Gems Debug Visualizer")
+        # heatmaps() -> aggregate_heatmaps result over the whole run, computed on first use
+        self.heatmaps = heatmaps or (lambda: aggregate_heatmaps(reports=[debug_data]))
+        self.run_heatmaps = None
+        self.heatmaps_ready.connect(self.on_heatmaps_ready)
+        # grid cells replaying the same round share one replay, also while it is still running
+        self.replays = {}
+        self.replays_lock = threading.Lock()
+        self.replay_fn = replayer
+        self.replayer = self.shared_replay if replayer else None
+        # replays are runner subprocesses; they run here, never on the GUI thread
+        self.replay_pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count() or 1)
+        self.replay_done.connect(self.on_replay_done)
+        self.model = DebugModel(debug_data, self.replayer, defer_replay=True)
+        self.other = None
+        self.other_seeds = {}
+        self.grid_models = {}
+        self.grid_views = []
+        self.pending_tick = 0
+        self.scrub_timer = QTimer(self)
+        self.scrub_timer.setSingleShot(True)
+        self.scrub_timer.setInterval(self.SCRUB_INTERVAL_MS)
+        self.scrub_timer.timeout.connect(lambda: self.interaction(self.show_tick_index, self.pending_tick))
+        
+        main_layout = QVBoxLayout(self)
+        top_layout = QHBoxLayout()
+        
+        self.round_combo = QComboBox()
+        rounds = self.model.rounds
+        if rounds:
+            for i, _ in enumerate(rounds):
+                self.round_combo.addItem(f"Round {i+1}")
+        else:
+            self.round_combo.addItem("No rounds")
+        self.round_combo.currentIndexChanged.connect(self.change_round)
+        
+        self.tick_slider = QSlider(Qt.Horizontal)
+        self.tick_slider.setMinimum(0)
+        max_ticks = max(0, len(self.model.ticks) - 1)
+        self.tick_slider.setMaximum(max_ticks)
+        safe_disconnect(self.tick_slider.valueChanged)
+        self.tick_slider.valueChanged.connect(self.change_tick)
+        
+        self.tick_label = QLabel()
+        self.show_tick_info()
+        
+        top_layout.addWidget(QLabel("Round"))
+        top_layout.addWidget(self.round_combo)
+        top_layout.addWidget(QLabel("Tick"))
+        top_layout.addWidget(self.tick_slider)
+        top_layout.addWidget(self.tick_label)
+        
+        self.heatmap_toggle = QCheckBox("Show Heatmap")
+        self.heatmap_toggle.stateChanged.connect(self.toggle_heatmap)
+        top_layout.addWidget(self.heatmap_toggle)
+        self.run_heatmap_combo = QComboBox()
+        for label, _, _ in self.RUN_HEATMAPS:
+            self.run_heatmap_combo.addItem(label)
+        self.run_heatmap_combo.currentIndexChanged.connect(self.show_run_heatmap)
+        top_layout.addWidget(self.run_heatmap_combo)
+        
+        self.prev_event_button = QPushButton("◀ Event")
+        self.next_event_button = QPushButton("Event ▶")
+        self.prev_event_button.clicked.connect(self.seek_prev_event)
+        self.next_event_button.clicked.connect(self.seek_next_event)
+        top_layout.addWidget(self.prev_event_button)
+        top_layout.addWidget(self.next_event_button)
+        
+        self.grid_combo = QComboBox()
+        for n in self.GRID_SIZES:
+            self.grid_combo.addItem(f"{n}×{n}")
+        self.grid_combo.currentIndexChanged.connect(self.rebuild_grid)
+        self.grid_compare_button = QPushButton("Compare Profile...")
+        self.grid_compare_button.clicked.connect(self.open_grid_comparison)
+        top_layout.addWidget(QLabel("Grid"))
+        top_layout.addWidget(self.grid_combo)
+        top_layout.addWidget(self.grid_compare_button)
+        
+        self.timings_toggle = QCheckBox("Timings")
+        self.timings_toggle.stateChanged.connect(self.toggle_timings)
+        self.profile_button = QPushButton("Profile Next")
+        self.profile_button.setCheckable(True)
+        self.export_timings_button = QPushButton("Export Timings")
+        self.export_timings_button.clicked.connect(self.export_timings)
+        top_layout.addWidget(self.timings_toggle)
+        top_layout.addWidget(self.profile_button)
+        top_layout.addWidget(self.export_timings_button)
+        self.profile_view = None
+        
+        main_layout.addLayout(top_layout)
+        
+        view_layout = QHBoxLayout()
+        self.maze_view = MazeView(self.model)
+        view_layout.addWidget(self.maze_view, 1)
+        self.grid_widget = QWidget()
+        self.grid_layout = QGridLayout(self.grid_widget)
+        self.grid_layout.setSpacing(2)
+        self.grid_layout.setContentsMargins(0, 0, 0, 0)
+        self.grid_widget.setVisible(False)
+        view_layout.addWidget(self.grid_widget, 1)
+        
+        self.event_list = QListWidget()
+        self.event_list.setMaximumWidth(260)
+        self.event_list.itemActivated.connect(self.on_event_activated)
+        self.event_list.itemClicked.connect(self.on_event_activated)
+        view_layout.addWidget(self.event_list)
+        main_layout.addLayout(view_layout, 1)
+        self.populate_events()
+        
+        self.timeline = pg.PlotWidget()
+        self.timeline.setMaximumHeight(170)
+        self.timeline.setLabel("left", "Response", units="ms")
+        self.timeline.setLabel("bottom", "Tick")
+        self.timeline.showGrid(x=True, y=True, alpha=0.2)
+        self.timeline_cursor = pg.InfiniteLine(pos=0, angle=90, movable=True, pen=pg.mkPen("#d7d5a3"))
+        self.timeline_cursor.sigPositionChangeFinished.connect(self.on_timeline_cursor_moved)
+        main_layout.addWidget(self.timeline)
+        self.populate_timeline()
+        
+        self.debug_decoded.connect(self.on_debug_decoded)
+        self.decode_in_background()
+        self.start_replay(self.model)
+        self.resize(1060, 760)
+
+    def decode_in_background(self):
+        """Decode the round's debug_json off the GUI thread; debug events show up once it is done."""
+        if not self.model.debug_pending:
+            return
+        generation = self.model.generation
+        def work():
+            if self.model.decode_debug(generation, events=False):
+                self.debug_decoded.emit(generation)
+        threading.Thread(target=work, daemon=True).start()
+
+    def on_debug_decoded(self, generation):
+        if generation != self.model.generation:
+            return
+        self.model.rebuild_events()
+        self.populate_events()
+
+    def populate_timeline(self):
+        self.timeline.clear()
+        times_ns = self.model.response_times
+        if times_ns is None or not len(times_ns):
+            self.timeline.setVisible(False)
+            return
+        self.timeline.setVisible(True)
+        ms = times_ns / 1_000_000
+        p95, p99, spikes = response_time_outliers(times_ns)
+        self.timeline.plot(np.arange(len(ms)), ms, pen=pg.mkPen("#4ec9b0"))
+        self.timeline.addItem(pg.InfiniteLine(
+            pos=p95 / 1_000_000, angle=0, pen=pg.mkPen("#ce9178", style=Qt.DashLine),
+            label=f"p95 {p95 / 1_000_000:.2f} ms", labelOpts={"position": 0.05, "color": "#ce9178"}
+        ))
+        self.timeline.addItem(pg.InfiniteLine(
+            pos=p99 / 1_000_000, angle=0, pen=pg.mkPen("#f14c4c", style=Qt.DashLine),
+            label=f"p99 {p99 / 1_000_000:.2f} ms", labelOpts={"position": 0.15, "color": "#f14c4c"}
+        ))
+        if len(spikes):
+            self.timeline.addItem(pg.ScatterPlotItem(
+                spikes, ms[spikes], size=7, brush=pg.mkBrush("#f14c4c"), pen=None
+            ))
+        self.timeline.addItem(self.timeline_cursor)
+        self.timeline_cursor.setValue(self.model.tick_index)
+
+    def on_timeline_cursor_moved(self):
+        self.tick_slider.setValue(int(round(self.timeline_cursor.value())))
+
+    def populate_events(self):
+        self.event_list.clear()
+        if self.model.decode_errors:
+            item = QListWidgetItem(f"⚠ {self.model.decode_errors} undecodable debug_json")
+            item.setToolTip(self.model.decode_error)
+            item.setData(Qt.UserRole, -1)
+            self.event_list.addItem(item)
+        for index, tick, kind, text in self.model.events:
+            item = QListWidgetItem(f"{tick:>5}  {text}")
+            item.setData(Qt.UserRole, index)
+            self.event_list.addItem(item)
+
+    def on_event_activated(self, item):
+        if item.data(Qt.UserRole) >= 0:
+            self.tick_slider.setValue(item.data(Qt.UserRole))
+
+    def seek_next_event(self):
+        index = self.model.next_event()
+        if index is not None:
+            self.tick_slider.setValue(index)
+
+    def seek_prev_event(self):
+        index = self.model.prev_event()
+        if index is not None:
+            self.tick_slider.setValue(index)
+
+    def toggle_heatmap(self, state):
+        for view in [self.maze_view] + self.grid_views:
+            view.show_heatmap = (state == 2)
+            view.update()
+
+    def show_run_heatmap(self, index):
+        label, layer, color = self.RUN_HEATMAPS[index]
+        if layer is not None and self.run_heatmaps is None:
+            self.run_heatmap_combo.setEnabled(False)
+            self.tick_label.setText("Aggregating run heatmaps...")
+            def work():
+                try:
+                    self.heatmaps_ready.emit(self.heatmaps() or {})
+                except Exception as e:
+                    self.heatmaps_ready.emit({"error": str(e)})
+            threading.Thread(target=work, daemon=True).start()
+            return
+        run_heatmap = (self.run_heatmaps[layer], color) if layer and layer in self.run_heatmaps else None
+        for view in [self.maze_view] + self.grid_views:
+            if isinstance(view, MazeView):
+                view.run_heatmap = run_heatmap
+                view.update()
+
+    def on_heatmaps_ready(self, heatmaps):
+        self.run_heatmap_combo.setEnabled(True)
+        if heatmaps.get("error"):
+            # run_heatmaps stays None and the selector goes back to Off, choosing a layer again retries
+            self.tick_label.setText(f"Run heatmaps failed: {heatmaps['error']}")
+            self.run_heatmap_combo.blockSignals(True)
+            self.run_heatmap_combo.setCurrentIndex(0)
+            self.run_heatmap_combo.blockSignals(False)
+            return
+        self.run_heatmaps = heatmaps
+        if not heatmaps:
+            self.tick_label.setText("Run heatmaps: no rounds with a debug protocol")
+        else:
+            skipped = heatmaps["skipped"] + heatmaps["no_protocol"]
+            self.tick_label.setText(f"Run heatmaps: {heatmaps['rounds']} rounds" + (f", {skipped} skipped" if skipped else ""))
+        self.show_run_heatmap(self.run_heatmap_combo.currentIndex())
+
+    def open_grid_comparison(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Compare with Profile", "", "Profiles (*.json *.hgprof);;All (*.*)"
+        )
+        if path:
+            self.load_grid_comparison(load_profile(path))
+
+    def load_grid_comparison(self, other):
+        """Show the rounds of another profile (e.g. an older bot version) next to the same seeds in the grid."""
+        self.other = other
+        self.other_seeds = {r.get("seed"): i for i, r in enumerate(other.get("rounds", []))}
+        self.grid_models = {k: m for k, m in self.grid_models.items() if k[0] == "A"}
+        if self.grid_combo.currentIndex() == 0:
+            self.grid_combo.setCurrentIndex(1)
+        else:
+            self.rebuild_grid()
+
+    def grid_model(self, side, index):
+        if side == "A" and index == self.model.round_index:
+            return self.model
+        key = (side, index)
+        if key not in self.grid_models:
+            data = self.model.debug_data if side == "A" else self.other
+            self.grid_models[key] = DebugModel(data, self.replayer if side == "A" else None, round_index=index,
+                                               defer_replay=True)
+            self.start_replay(self.grid_models[key])
+        return self.grid_models[key]
+
+    def grid_cells(self, count):
+        """(model, caption) per grid cell, starting at the selected round; A/B pairs of one seed in compare mode."""
+        rounds = self.model.rounds
+        cells = []
+        for i in range(self.model.round_index, len(rounds)):
+            seed = rounds[i].get("seed", "")
+            if self.other is None:
+                if len(cells) == count:
+                    break
+                cells.append((self.grid_model("A", i), f"Round {i + 1} · {seed}"))
+                continue
+            if len(cells) + 2 > count:
+                break
+            cells.append((self.grid_model("A", i), f"A round {i + 1} · {seed}"))
+            j = self.other_seeds.get(seed)
+            if j is None:
+                cells.append((None, f"B: no round with seed {seed}"))
+            else:
+                cells.append((self.grid_model("B", j), f"B round {j + 1} · {seed}"))
+        return cells
+
+    def rebuild_grid(self):
+        for view in self.grid_views:
+            self.grid_layout.removeWidget(view)
+            view.deleteLater()
+        self.grid_views = []
+        n = self.GRID_SIZES[self.grid_combo.currentIndex()]
+        self.maze_view.setVisible(n == 1)
+        self.grid_widget.setVisible(n > 1)
+        if n == 1:
+            self.grid_models.clear()
+            self.apply_timings()
+            return
+        # A/B pairs stay side by side
+        columns = n + n % 2 if self.other is not None else n
+        cells = self.grid_cells(n * columns)
+        used = {id(model) for model, _ in cells}
+        self.grid_models = {k: m for k, m in self.grid_models.items() if id(m) in used}
+        for k, (model, caption) in enumerate(cells):
+            if model is None:
+                label = QLabel(caption)
+                label.setAlignment(Qt.AlignCenter)
+                view = label
+            else:
+                model.set_tick(self.tick_slider.value())
+                view = MazeView(model)
+                view.setMinimumSize(120, 120)
+                view.caption = caption
+                view.show_heatmap = self.maze_view.show_heatmap
+                view.run_heatmap = self.maze_view.run_heatmap
+            self.grid_views.append(view)
+            self.grid_layout.addWidget(view, k // columns, k % columns)
+        self.apply_timings()
+
+    def visible_views(self):
+        """Maze views on screen: the grid cells in grid mode, the single view otherwise."""
+        return [v for v in self.grid_views if isinstance(v, MazeView)] or [self.maze_view]
+
+    def toggle_timings(self, state):
+        INSTRUMENTATION.enabled = (state == 2)
+        self.apply_timings()
+
+    def apply_timings(self):
+        # the overlay goes on the first visible view only, sixteen copies would hide the grid
+        first = self.visible_views()[0]
+        for view in [self.maze_view] + self.grid_views:
+            if isinstance(view, MazeView):
+                view.show_timings = INSTRUMENTATION.enabled and view is first
+                view.update()
+
+    def export_timings(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timings", "timings.json", "JSON (*.json)")
+        if path:
+            INSTRUMENTATION.export(path)
+
+    def interaction(self, fn, *args):
+        """Run one visualizer interaction, under cProfile (including its repaint) if Profile Next is armed."""
+        if not self.profile_button.isChecked():
+            return fn(*args)
+        self.profile_button.setChecked(False)
+        INSTRUMENTATION.start_profile()
+        try:
+            fn(*args)
+            # grid cells created by fn are only shown and laid out by the event loop otherwise
+            self.grid_layout.activate()
+            for view in self.visible_views():
+                view.show()
+                view.repaint()
+        finally:
+            text = INSTRUMENTATION.stop_profile()
+        if self.profile_view is None:
+            self.profile_view = QTextEdit()
+            self.profile_view.setReadOnly(True)
+            self.profile_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+            self.profile_view.setWindowTitle("cProfile: last interaction")
+            self.profile_view.resize(900, 600)
+        self.profile_view.setPlainText(text)
+        self.profile_view.show()
+        self.profile_view.raise_()
+
+    def change_round(self, index):
+        self.interaction(self.show_round_index, index)
+
+    def show_round_index(self, index):
+        self.model.set_round(index)
+        self.refresh_round()
+        self.start_replay(self.model)
+        if self.grid_views:
+            self.rebuild_grid()
+
+    def shared_replay(self, round_index):
+        with self.replays_lock:
+            future = self.replays.get(round_index)
+            owner = future is None
+            if owner:
+                future = self.replays[round_index] = concurrent.futures.Future()
+        if owner:
+            try:
+                future.set_result(self.replay_fn(round_index))
+            except Exception as e:
+                # failures are not kept, so visiting the round again retries
+                with self.replays_lock:
+                    del self.replays[round_index]
+                future.set_exception(e)
+        return future.result()
+
+    def closeEvent(self, event):
+        self.replay_pool.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
+
+    def start_replay(self, model):
+        if not model.replaying:
+            return
+        generation = model.generation
+        def work():
+            model.replay(model.round_index)
+            self.replay_done.emit(model, generation)
+        self.replay_pool.submit(work)
+
+    def on_replay_done(self, model, generation):
+        if model.generation != generation:
+            return
+        model.rebuild_round()
+        if model is self.model:
+            self.refresh_round()
+        else:
+            model.set_tick(self.tick_slider.value())
+        for view in self.grid_views:
+            if isinstance(view, MazeView) and view.model is model:
+                view.update()
+
+    def refresh_round(self):
+        safe_disconnect(self.tick_slider.valueChanged)
+        self.tick_slider.setMaximum(max(0, len(self.model.ticks) - 1))
+        self.tick_slider.setValue(0)
+        self.tick_slider.valueChanged.connect(self.change_tick)
+        self.show_tick_info()
+        self.populate_events()
+        self.populate_timeline()
+        self.maze_view.update()
+        self.decode_in_background()
+
+    def show_tick_info(self):
+        if self.model.replaying:
+            self.tick_label.setText("Replaying round...")
+        elif self.model.replay_error:
+            self.tick_label.setText(f"Replay failed: {self.model.replay_error}")
+        elif self.model.ticks:
+            self.tick_label.setText("Tick: 0")
+        else:
+            self.tick_label.setText("No debug data - run with patched runner")
+
+    def change_tick(self, index):
+        if not self.grid_views:
+            return self.interaction(self.show_tick_index, index)
+        self.pending_tick = index
+        if not self.scrub_timer.isActive():
+            self.scrub_timer.start()
+
+    def show_tick_index(self, index):
+        self.model.set_tick(index)
+        tick_data = self.model.current_tick_data()
+        tick_num = tick_data.get("tick", 0) if tick_data else 0
+        self.tick_label.setText(f"Tick: {tick_num}")
+        self.timeline_cursor.setValue(self.model.tick_index)
+        self.maze_view.update()
+        for view in self.grid_views:
+            if isinstance(view, MazeView):
+                if view.model is not self.model:
+                    view.model.set_tick(index)
+                view.update()
@@ -0,0 +1,409 @@
+"""PySide6 front end of the Hidden Gems launcher (imported lazily by run.py)."""
+import sys
+import os
+import json
+import subprocess
+import shutil
+import threading
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QGridLayout, QLabel,
+    QLineEdit, QSpinBox, QDoubleSpinBox, QCheckBox, QPushButton, QFileDialog,
+    QTextEdit, QComboBox, QHBoxLayout, QListWidget, QDockWidget, QProgressBar,
+    QSystemTrayIcon, QStyle
+)
+from PySide6.QtCore import Qt, QTimer, Signal
+
+from hg_core import PRESET_KEYS, apply_preset, read_reports, load_stages, save_stages, Launcher, instrumented, aggregate_heatmaps
+
+
+class UI(QWidget):
+    stages_loaded=Signal(dict,dict)
+    # log lines from worker threads (visualizer replays)
+    log_line=Signal(str)
+    def __init__(self,main):
+        super().__init__()
+        self.main=main
+        self.conf=os.path.join(os.path.expanduser("~"),".hidden_gems_launcher.json")
+        self.last=os.path.expanduser("~")
+        self.base=os.path.dirname(os.path.abspath(__file__))
+        self.launcher=Launcher(self.base)
+        self.stages,self.customstages={},{}
+        self.customstages_path=os.path.join(self.base,"customstages.yaml")
+        self.profile=self.launcher.profile
+        self.m=None
+        self.run_bots=[]
+        self.run_settings={}
+        self.t=QTimer(self);self.t.timeout.connect(self.watch)
+        L=QVBoxLayout(self);g=QGridLayout();r=0
+        def tbox(n,d=""):
+            nonlocal r; l=QLabel(n);b=QLineEdit(str(d));g.addWidget(l,r,0);g.addWidget(b,r,1);r+=1;return b
+        def ibox(n,d):
+            nonlocal r; l=QLabel(n);b=QSpinBox();b.setRange(0,999999);b.setValue(d);g.addWidget(l,r,0);g.addWidget(b,r,1);r+=1;return b
+        def fbox(n,d):
+            nonlocal r; l=QLabel(n);b=QDoubleSpinBox();b.setRange(0,999999);b.setDecimals(4);b.setValue(d);g.addWidget(l,r,0);g.addWidget(b,r,1);r+=1;return b
+        def cbox(n,d):
+            nonlocal r; b=QCheckBox(n);b.setChecked(d);g.addWidget(b,r,0,1,2);r+=1;return b
+        self.stage=QComboBox()
+        self.stage.addItem("Custom")
+        self.stages_loaded.connect(self.on_stages_loaded)
+        threading.Thread(target=lambda:self.stages_loaded.emit(*load_stages(self.base)),daemon=True).start()
+        g.addWidget(QLabel("Stage"),r,0)
+        hb=QHBoxLayout()
+        hb.addWidget(self.stage)
+        self.loadpreset=QPushButton("Load Preset")
+        hb.addWidget(self.loadpreset)
+        g.addLayout(hb,r,1)
+        self.loadpreset.clicked.connect(self.apply)
+        r+=1
+        self.savepreset=QPushButton("Save Preset")
+        g.addWidget(self.savepreset,r,1)
+        self.savepreset.clicked.connect(self.save_preset)
+        r+=1
+        self.seed=tbox("Seed")
+        self.width=ibox("Width",19)
+        self.height=ibox("Height",19)
+        self.gen=tbox("Generator","arena")
+        self.ticks=ibox("Ticks",1000)
+        self.vis=ibox("Vis Radius",10)
+        self.gsr=fbox("Gem Spawn Rate",0.05)
+        self.gttl=ibox("Gem TTL",300)
+        self.gmax=ibox("Max Gems",1)
+        self.emit=cbox("Emit Signals",False)
+        self.swap=cbox("Swap Bots",False)
+        self.cache=cbox("Cache",False)
+        self.prof=cbox("Profile",False)
+        self.det=cbox("Check Determinism",False)
+        self.docker=cbox("Use Docker",False)
+        self.warm=cbox("Warm Bots (Reset Handshake)",False)
+        self.map_cache=cbox("Map Cache",True)
+        self.stderr_cap=ibox("Stderr Cap (KB)",64)
+        self.stderr_spill=cbox("Spill Full Stderr (stderr_logs/)",False)
+        self.docker_pool=tbox("Docker Pool Image")
+        self.use_multicore=cbox("Use Multi-Core Execution",False)
+        self.thread_count=ibox("Thread Count",0)
+        self.thread_count.setRange(0,256)
+        self.thread_count.setSpecialValueText("auto")
+        self.adaptive_ci=fbox("Adaptive CI Width",0)
+        self.adaptive_sprt=fbox("Adaptive SPRT Delta",0)
+        self.rsample=ibox("Sample Resources Every",0)
+        self.coordinator=tbox("Coordinator [Host:]Port")
+        self.shard_size=ibox("Shard Size",8)
+        self.rounds=ibox("Rounds",1)
+        self.rseeds=tbox("Round Seeds")
+        self.verb=ibox("Verbose",2)
+        self.tps=ibox("Max TPS",15)
+        self.ann=cbox("Announcer",True)
+        self.tim=cbox("Show Timings",False)
+        self.pause=cbox("Start Paused",False)
+        self.hcol=tbox("Highlight Color","#ffffff")
+        self.dbg=cbox("Enable Debug",True)
+        self.replay=cbox("Replay Debug (Seed + Bot Output Only)",False)
+        self.archive=cbox("Archive Profiles",True)
+        row=QHBoxLayout()
+        self.bots=QListWidget()
+        col=QVBoxLayout()
+        self.addb=QPushButton("Add Bot Folder")
+        self.remb=QPushButton("Remove")
+        col.addWidget(self.addb);col.addWidget(self.remb)
+        self.addb.clicked.connect(self.add_bot)
+        self.remb.clicked.connect(self.rem_bot)
+        row.addWidget(self.bots);row.addLayout(col)
+        g.addWidget(QLabel("Bots"),r,0);g.addLayout(row,r,1);r+=1
+        L.addLayout(g)
+        rr=QHBoxLayout()
+        self.runb=QPushButton("Run")
+        self.showd=QPushButton("Debug")
+        self.showviz=QPushButton("Visualizer")
+        self.showhist=QPushButton("History")
+        self.seedsb=QPushButton("Seeds")
+        self.patchrunner=QPushButton("Patch Runner")
+        rr.addWidget(self.runb)
+        rr.addWidget(self.showd)
+        rr.addWidget(self.showviz)
+        rr.addWidget(self.showhist)
+        rr.addWidget(self.seedsb)
+        rr.addWidget(self.patchrunner)
+        self.runb.clicked.connect(self.run)
+        self.showd.clicked.connect(self.main.show_debug)
+        self.showviz.clicked.connect(self.main.show_visualizer)
+        self.showhist.clicked.connect(self.main.show_history)
+        self.seedsb.clicked.connect(self.precompute_seeds)
+        self.patchrunner.clicked.connect(self.patch_runner)
+        L.addLayout(rr)
+        self.prog=QProgressBar();self.prog.setVisible(False)
+        L.addWidget(self.prog)
+        self.out=QTextEdit();self.out.setReadOnly(True)
+        self.log_line.connect(self.out.append)
+        L.addWidget(self.out)
+        self.load_conf()
+
+    def patch_runner(self):
+        self.launcher.patch_runner(self.out.append)
+    def on_stages_loaded(self,stages,customstages):
+        self.stages,self.customstages=stages,customstages
+        for s in self.stages: self.stage.addItem(s)
+        for s in self.customstages: self.stage.addItem(s)
+    def apply(self):
+        s=self.stage.currentText()
+        if s=="Custom": return
+        if s in self.stages:
+            st=self.stages[s]
+        else:
+            st=self.customstages[s]
+        widgets={
+            "width":self.width,
+            "height":self.height,
+            "generator":self.gen,
+            "emit_signals":self.emit,
+            "vis_radius":self.vis,
+            "gem_spawn":self.gsr,
+            "gem_ttl":self.gttl,
+            "max_gems":self.gmax,
+            "seed":self.seed,
+            "ticks":self.ticks,
+            "rounds":self.rounds,
+            "round_seeds":self.rseeds,
+            "verbose":self.verb,
+            "max_tps":self.tps,
+            "multi_core":self.use_multicore,
+            "threads":self.thread_count,
+        }
+        settings=apply_preset(self.settings(),st)
+        for k in PRESET_KEYS.values():
+            w,val=widgets[k],settings[k]
+            if isinstance(w,QLineEdit): w.setText(str(val))
+            elif isinstance(w,QSpinBox): w.setValue(int(val))
+            elif isinstance(w,QDoubleSpinBox): w.setValue(float(val))
+            elif isinstance(w,QCheckBox): w.setChecked(bool(val))
+    def save_preset(self):
+        name=self.stage.currentText()
+        if not name: return
+        settings=self.settings()
+        self.customstages[name]={k:settings[t] for k,t in PRESET_KEYS.items()}
+        save_stages(self.customstages_path, self.customstages)
+    def add_bot(self):
+        p=QFileDialog.getExistingDirectory(self,"Bot Folder",self.last)
+        if not p: return
+        p=self.launcher.sanitize(p)
+        self.last=p
+        ex=[self.bots.item(i).text() for i in range(self.bots.count())]
+        if p not in ex: self.bots.addItem(p)
+    def rem_bot(self):
+        for it in self.bots.selectedItems():
+            self.bots.takeItem(self.bots.row(it))
+    def load_conf(self):
+        if not os.path.exists(self.conf): return
+        try: c=json.load(open(self.conf,"r",encoding="utf-8"))
+        except: return
+        for b in c.get("bots",[]): self.bots.addItem(b)
+        if "use_multicore" in c: self.use_multicore.setChecked(c["use_multicore"])
+        if "thread_count" in c: self.thread_count.setValue(c["thread_count"])
+    def save_conf(self):
+        bs=[self.bots.item(i).text() for i in range(self.bots.count())]
+        with open(self.conf, "w", encoding="utf-8") as f:
+            json.dump({
+                "bots":bs,
+                "use_multicore":self.use_multicore.isChecked(),
+                "thread_count":self.thread_count.value()
+            }, f)
+    def settings(self):
+        return {
+            "seed":self.seed.text(),
+            "width":self.width.value(),
+            "height":self.height.value(),
+            "generator":self.gen.text(),
+            "ticks":self.ticks.value(),
+            "vis_radius":self.vis.value(),
+            "gem_spawn":self.gsr.value(),
+            "gem_ttl":self.gttl.value(),
+            "max_gems":self.gmax.value(),
+            "emit_signals":self.emit.isChecked(),
+            "swap_bots":self.swap.isChecked(),
+            "cache":self.cache.isChecked(),
+            "profile":self.prof.isChecked(),
+            "check_determinism":self.det.isChecked(),
+            "use_docker":self.docker.isChecked(),
+            "warm_bots":self.warm.isChecked(),
+            "map_cache":self.map_cache.isChecked(),
+            "stderr_cap_kb":self.stderr_cap.value(),
+            "stderr_spill":self.stderr_spill.isChecked(),
+            "docker_pool":self.docker_pool.text().strip(),
+            "multi_core":self.use_multicore.isChecked(),
+            "threads":self.thread_count.value(),
+            "adaptive_ci":self.adaptive_ci.value(),
+            "adaptive_sprt":self.adaptive_sprt.value(),
+            "resource_sample_every":self.rsample.value(),
+            "coordinator":self.coordinator.text().strip(),
+            "shard_size":self.shard_size.value(),
+            "rounds":self.rounds.value(),
+            "round_seeds":self.rseeds.text(),
+            "verbose":self.verb.value(),
+            "max_tps":self.tps.value(),
+            "announcer":self.ann.isChecked(),
+            "show_timings":self.tim.isChecked(),
+            "start_paused":self.pause.isChecked(),
+            "highlight_color":self.hcol.text(),
+            "enable_debug":self.dbg.isChecked(),
+            "replay_debug":self.replay.isChecked(),
+            "archive_profiles":self.archive.isChecked(),
+        }
+    def bot_dirs(self):
+        return [self.bots.item(i).text() for i in range(self.bots.count())]
+    def run(self):
+        self.start(self.settings())
+    def rerun(self,seeds):
+        self.out.append(f"🔁 Re-running {len(seeds)} rounds with debug: {','.join(seeds)}")
+        self.start(self.launcher.rerun_settings(self.settings(),seeds))
+    def precompute_seeds(self):
+        try: seeds=self.launcher.round_seeds(self.settings(),self.out.append)
+        except Exception as e:
+            self.out.append(f"❌ Seeds: {e}")
+            return
+        self.rseeds.setText(",".join(seeds))
+        self.out.append(f"🎲 {len(seeds)} round seeds: {','.join(seeds)}")
+    def start(self,settings):
+        self.run_bots=self.bot_dirs()
+        self.run_settings=settings
+        try: cmd = self.launcher.prepare_run(self.run_settings, self.run_bots, self.out.append)
+        except RuntimeError as e:
+            self.out.append(f"❌ {e}")
+            return
+        self.save_conf()
+        
+        if sys.platform.startswith("win"):
+            self.out.append(cmd)
+            self.prog.setRange(0, 0)
+            self.prog.setVisible(True)
+            
+            if shutil.which("wt"):
+                subprocess.Popen(["wt", "-w", "0", "new-tab", "wsl", "bash", "-lc", cmd])
+            else:
+                subprocess.Popen(
+                    ["wsl.exe", "bash", "-lc", cmd],
+                    creationflags=subprocess.CREATE_NEW_CONSOLE if sys.platform.startswith("win") else 0
+                )
+        else:
+            self.out.append(cmd)
+            self.prog.setRange(0, 0)
+            self.prog.setVisible(True)
+            
+            wrapped_cmd = f"bash -c \"{cmd}; echo; read -p 'Press ENTER to close...'\""
+            
+            terminal = (
+                shutil.which("x-terminal-emulator") or
+                shutil.which("xterm") or
+                shutil.which("gnome-terminal") or
+                shutil.which("konsole") or
+                shutil.which("xfce4-terminal")
+            )
+            
+            try:
+                if terminal is not None:
+                    if "gnome-terminal" in terminal:
+                        subprocess.Popen([terminal, "--", "bash", "-c", wrapped_cmd])
+                    else:
+                        subprocess.Popen([terminal, "-e", wrapped_cmd])
+                else:
+                    subprocess.Popen(cmd, shell=True)
+            except Exception as e:
+                self.out.append(f"❌ Terminal launch failed: {e}")
+        
+        self.m = None
+        self.t.start(800)
+    @instrumented("UI.watch")
+    def watch(self):
+        if not os.path.exists(self.profile): return
+        m=os.path.getmtime(self.profile)
+        if self.m is None or m!=self.m:
+            self.m=m
+            self.main.show_debug()
+            self.main.debug.load(self.profile)
+            self.launcher.ingest(self.run_bots,self.out.append)
+            if self.run_settings.get("archive_profiles"): self.launcher.archive_profile(self.out.append)
+            if self.main.history is not None: self.main.history.refresh()
+            self.prog.setVisible(False)
+            self.main.notify("Run Finished","Profile Loaded")
+            self.t.stop()
+
+class Main(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Hidden Gems Runner")
+        self.debug=None
+        self.ui=UI(self)
+        self.setCentralWidget(self.ui)
+        self.dock=QDockWidget("Debug",self)
+        self.addDockWidget(Qt.RightDockWidgetArea,self.dock)
+        self.dock.hide()
+        
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray = QSystemTrayIcon(self)
+            self.tray.setIcon(self.style().standardIcon(QStyle.SP_ComputerIcon))
+            self.tray.show()
+        else:
+            self.tray = None
+        
+        self.visualizer = None
+        self.history = None
+    def show_debug(self):
+        if self.debug is None:
+            from hg_debug import DebugDock
+            self.debug=DebugDock()
+            self.debug.rerun_requested.connect(self.ui.rerun)
+            self.dock.setWidget(self.debug)
+        self.dock.show();self.dock.raise_()
+    def show_visualizer(self):
+        path=None
+        if self.debug is not None and self.debug.path and os.path.exists(self.debug.path):
+            path=self.debug.path
+        elif os.path.exists(self.ui.profile):
+            path=self.ui.profile
+        if not path:
+            self.ui.out.append("❌ No profile data found. Run your bot first to generate data.")
+            return
+        self.ui.out.append(f"📊 Loading visualizer from: {path}")
+        try:
+            reports=read_reports(path)
+            data=reports[0] if reports else {}
+        except Exception as e:
+            self.ui.out.append(f"❌ Failed to load profile: {e}")
+            return
+        try:
+            self.ui.out.append("🔧 Creating visualizer window...")
+            if self.visualizer is not None:
+                self.visualizer.setParent(None)
+                self.visualizer.deleteLater()
+                self.visualizer = None
+            from hg_debug import DebugVisualizerWindow
+            replayer=lambda i:self.ui.launcher.replay_round(reports,i,self.ui.log_line.emit)[0]
+            heatmaps=lambda:aggregate_heatmaps(path,reports)
+            self.visualizer=DebugVisualizerWindow(data,None,replayer,heatmaps)
+            self.visualizer.setWindowFlags(Qt.Window)
+            self.visualizer.show()
+            self.visualizer.raise_()
+            self.visualizer.activateWindow()
+            self.ui.out.append("✅ Visualizer opened!")
+        except Exception as e:
+            self.ui.out.append(f"❌ Visualizer error: {e}")
+            import traceback
+            self.ui.out.append(traceback.format_exc())
+    def show_history(self):
+        if self.history is None:
+            from hg_debug import HistoryPanel
+            self.history=HistoryPanel(self.ui.launcher.results_db)
+            self.history.setWindowFlags(Qt.Window)
+        else:
+            self.history.refresh()
+        self.history.show();self.history.raise_()
+    def notify(self, t, m):
+        if self.tray is not None:
+            self.tray.showMessage(t, m, QSystemTrayIcon.Information, 3000)
+
+
+def main():
+    app = QApplication(sys.argv)
+    window = Main()
+    window.show()
+    if "--startup-probe" in sys.argv[1:]:
+        QTimer.singleShot(0, app.quit)
+    sys.exit(app.exec())
@@ -0,0 +1,121 @@
+"""Qt- and Ruby-free checks of the profile data path on synthetic profiles from hg_bench."""
+import os
+import sys
+import json
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import hg_core
+from hg_bench import synthetic_profile
+from hg_core import (DebugModel, LazyRound, aggregate_heatmaps, compare_profiles, decode_debug_json,
+                     iter_json_rounds, read_archive, read_reports, wilcoxon_signed_rank, write_archive)
+
+
+@pytest.fixture(scope="module")
+def reports():
+    return synthetic_profile(width=13, height=11, ticks=120, rounds=3, bots=2)
+
+
+@pytest.fixture(scope="module")
+def profile_json(reports, tmp_path_factory):
+    path = tmp_path_factory.mktemp("profile") / "profile.json"
+    path.write_text(json.dumps(reports))
+    return str(path)
+
+
+def test_archive_round_trip(reports, tmp_path):
+    path = str(tmp_path / "profile.hgprof")
+    write_archive(reports, path)
+    archived = read_archive(path)
+    assert [r["name"] for r in archived] == [r["name"] for r in reports]
+    for report, original in zip(archived, reports):
+        for round_data, original_round in zip(report["rounds"], original["rounds"]):
+            assert isinstance(round_data, LazyRound)
+            assert round_data["seed"] == original_round["seed"]
+            restored = round_data["debug_protocol"]
+            assert len(restored) == len(original_round["debug_protocol"])
+            for entry, original_entry in zip(restored, original_round["debug_protocol"]):
+                # fov is stored as a set delta, only its order may change
+                assert sorted(entry.pop("fov")) == sorted(original_entry["fov"])
+                assert entry == {k: v for k, v in original_entry.items() if k != "fov"}
+
+
+def test_debug_model_same_from_archive(reports, tmp_path):
+    path = str(tmp_path / "profile.hgprof")
+    write_archive(reports, path)
+    for index in range(len(reports[0]["rounds"])):
+        plain = DebugModel(reports[0], round_index=index)
+        archived = DebugModel(read_archive(path)[0], round_index=index)
+        assert (plain.width, plain.height) == (13, 11)
+        assert len(plain.ticks) == len(archived.ticks) == 120
+        assert np.array_equal(plain.walls, archived.walls)
+        assert np.array_equal(plain.wall_ticks, archived.wall_ticks)
+        assert plain.events == archived.events
+
+
+def test_debug_model_decodes_debug_json(reports):
+    model = DebugModel(reports[0])
+    model.decode_debug()
+    assert model.debug_pending == 0 and model.decode_errors == 0
+    assert set(model.debug_extra(0)) == {"highlight", "path", "decision", "state_delta"}
+
+
+def test_debug_model_counts_malformed_debug_json(reports, monkeypatch):
+    # the stdlib decoder raises TypeError for non-string payloads, orjson a ValueError
+    monkeypatch.setattr(hg_core, "json_decoder", lambda: ("json", json.loads))
+    data = json.loads(json.dumps(reports[0]))
+    protocol = data["rounds"][0]["debug_protocol"]
+    for tick, raw in ((3, '{"decision": '), (5, 42), (7, [1, 2]), (9, '"text"')):
+        protocol[tick]["bots"]["debug_json"] = raw
+    model = DebugModel(data)
+    model.decode_debug()
+    assert model.debug_pending == 0 and model.decode_errors == 4
+    assert model.decode_error.startswith("tick 3:")
+    assert model.debug_extra(5) is None
+
+
+def test_decode_debug_json():
+    assert decode_debug_json('{"decision": "wait", "memory": [1, 2]}') == {"decision": "wait"}
+    with pytest.raises(ValueError):
+        decode_debug_json('{"memory": [1, 2')
+    with pytest.raises(ValueError):
+        decode_debug_json("[1, 2]")
+
+
+def test_iter_json_rounds(reports, profile_json):
+    assert list(iter_json_rounds(profile_json)) == [r for report in reports for r in report["rounds"]]
+    assert read_reports(profile_json) == reports
+
+
+def test_compare_profiles(reports):
+    a = reports[0]
+    b = dict(a, rounds=[dict(r, score=r["score"] + 5) for r in a["rounds"]])
+    result = compare_profiles(a, b)
+    assert result["n"] == len(a["rounds"])
+    assert result["wins"] == result["n"] and result["losses"] == 0
+    assert result["mean_delta"] == 5
+    assert compare_profiles(a, a)["ties"] == result["n"]
+
+
+def test_wilcoxon_exact_for_few_rounds():
+    # 4 rounds all better: 2 of the 16 equally likely sign patterns are as extreme
+    assert wilcoxon_signed_rank(np.array([1.0, 2.0, 3.0, 4.0])) == (10.0, 0.125)
+    # tied ranks 1.5, 1.5, 3 (the zero is dropped): 3 of 8 patterns reach W+ >= 4.5
+    assert wilcoxon_signed_rank(np.array([1.0, -1.0, 2.0, 0.0])) == (4.5, 0.75)
+    assert wilcoxon_signed_rank(np.zeros(5)) == (0.0, 1.0)
+
+
+def test_heatmaps(reports, profile_json, tmp_path):
+    archive = str(tmp_path / "profile.hgprof")
+    write_archive(reports, archive)
+    in_memory = aggregate_heatmaps(reports=reports)
+    rounds = sum(len(r["rounds"]) for r in reports)
+    assert (in_memory["height"], in_memory["width"]) == (11, 13)
+    assert in_memory["rounds"] == rounds and in_memory["skipped"] == 0
+    # every tick of every round moves the bot onto one cell
+    assert in_memory["visits"].sum() == rounds * 120
+    for result in (aggregate_heatmaps(profile_json), aggregate_heatmaps(archive, workers=1)):
+        for name in ("visits", "captures", "spawns"):
+            assert np.array_equal(result[name], in_memory[name])
@@ -0,0 +1,50 @@
+"""Round 2 of a two-round single-core run must see only its own walls.
+
+Needs ruby and runner.rb in the launcher directory (or HG_TEST_BASE); skipped otherwise.
+"""
+import os
+import sys
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hg_core import Launcher, DebugModel, read_reports
+
+BASE = os.environ.get("HG_TEST_BASE", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BOT = """#!/usr/bin/env python3
+import sys
+moves = "NESW"
+for i, line in enumerate(sys.stdin):
+    print(moves[(i // 7) % 4], flush=True)
+"""
+
+
+@pytest.mark.skipif(shutil.which("ruby") is None or not os.path.exists(os.path.join(BASE, "runner.rb")),
+                    reason="needs ruby and runner.rb")
+def test_second_round_walls(tmp_path):
+    Launcher(BASE).patch_runner(lambda line: None)
+    bot = tmp_path / "bot"
+    bot.mkdir()
+    (bot / "start.sh").write_text(BOT)
+    (bot / "start.sh").chmod(0o755)
+    def run(name, *args):
+        profile = tmp_path / name
+        subprocess.run(["ruby", "runner_patched.rb", *args, "--ticks", "300", "--enable-debug", "--verbose", "0",
+                        "--max-tps", "0", "--write-profile-json", str(profile), str(bot)],
+                       cwd=BASE, check=True, capture_output=True, timeout=300)
+        return read_reports(str(profile))[0]
+
+    both = run("both.json", "--seed", "7", "--rounds", "2")
+    assert len(both["rounds"]) == 2
+    # the same round played on its own, with nothing seen before it
+    alone = run("alone.json", "--seed", both["rounds"][1]["seed"], "--rounds", "1")
+
+    second = DebugModel(both, round_index=1)
+    fresh = DebugModel(alone)
+    assert second.ticks and second.walls is not None
+    assert np.array_equal(second.walls, fresh.walls)
+    assert np.array_equal(second.wall_ticks, fresh.wall_ticks)